@@ -0,0 +1,65 @@
+-- ============================================================================
+-- FUNCOES ATOMICAS PARA A FILA DE MENSAGENS CLONADAS
+-- ============================================================================
+-- Execute este SQL no Supabase SQL Editor (depois de SQL_FILA_MENSAGENS.sql):
+-- https://app.supabase.com/project/[SEU_PROJETO]/sql
+--
+-- Sem estas funcoes o app continua funcionando (database.py usa o caminho
+-- antigo, com SELECT + UPDATE), mas duas instancias podem disputar a mesma
+-- mensagem e o contador de tentativas pode perder incrementos.
+
+-- ============================================================================
+-- REIVINDICAR MENSAGENS VENCIDAS EM LOTE
+-- ============================================================================
+-- Marca como 'enviando' ate p_limite mensagens pendentes ja vencidas e as
+-- retorna. FOR UPDATE SKIP LOCKED: linhas ja travadas por outra instancia sao
+-- puladas, entao cada mensagem e entregue a um unico worker, num unico round trip.
+-- Cada reivindicacao conta uma tentativa e carimba atualizado_em: uma mensagem
+-- que ficou em 'enviando' (processo morreu) e detectada pela idade e devolvida
+-- para a fila pelo app, com o historico de tentativas preservado.
+
+CREATE OR REPLACE FUNCTION reivindicar_mensagens_fila(p_limite INTEGER DEFAULT 100)
+RETURNS SETOF fila_mensagens_clonadas AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE fila_mensagens_clonadas
+    SET status = 'enviando',
+        tentativas = COALESCE(tentativas, 0) + 1,
+        atualizado_em = NOW()
+    WHERE id IN (
+        SELECT id
+        FROM fila_mensagens_clonadas
+        WHERE status = 'pendente'
+        AND agendamento_envio <= NOW()
+        ORDER BY agendamento_envio
+        LIMIT p_limite
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- REGISTRAR ERRO
+-- ============================================================================
+-- Substitui o SELECT tentativas + UPDATE feito pelo app. A tentativa ja foi
+-- contada atomicamente na reivindicacao, entao aqui so se grava o erro.
+
+CREATE OR REPLACE FUNCTION registrar_erro_mensagem_fila(p_id BIGINT, p_erro TEXT)
+RETURNS SETOF fila_mensagens_clonadas AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE fila_mensagens_clonadas
+    SET status = 'erro',
+        erro_mensagem = p_erro,
+        atualizado_em = NOW()
+    WHERE id = p_id
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- VERIFICAR
+-- ============================================================================
+-- SELECT * FROM reivindicar_mensagens_fila(10);
+-- SELECT * FROM registrar_erro_mensagem_fila(1, 'teste');
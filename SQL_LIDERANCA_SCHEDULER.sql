@@ -0,0 +1,64 @@
+-- ============================================================================
+-- LIDERANCA DOS SCHEDULERS (UM UNICO PROCESSO ENVIA MENSAGENS)
+-- ============================================================================
+-- Necessario apenas com SCHEDULER_LEADER_MODE=supabase (varias replicas/hosts).
+-- Execute este SQL no Supabase SQL Editor:
+-- https://app.supabase.com/project/[SEU_PROJETO]/sql
+
+-- Um lease por nome: quem e o dono e ate quando vale
+CREATE TABLE IF NOT EXISTS scheduler_lideranca (
+    nome VARCHAR(100) PRIMARY KEY,
+    dono VARCHAR(255) NOT NULL,
+    expira_em TIMESTAMPTZ NOT NULL,
+    atualizado_em TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Habilitar RLS (Row Level Security) - opcional, desabilite se nao precisar
+ALTER TABLE scheduler_lideranca ENABLE ROW LEVEL SECURITY;
+
+-- Politica para permitir todas as operacoes (ajuste conforme necessario)
+CREATE POLICY "Allow all operations on scheduler_lideranca" ON scheduler_lideranca
+    FOR ALL USING (true) WITH CHECK (true);
+
+-- ============================================================================
+-- ADQUIRIR / RENOVAR
+-- ============================================================================
+-- Retorna TRUE se p_dono e o lider apos a chamada. O lease so troca de dono
+-- quando o anterior expirou; o proprio dono renova chamando de novo.
+
+CREATE OR REPLACE FUNCTION adquirir_lideranca_scheduler(p_nome TEXT, p_dono TEXT, p_ttl_segundos INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_dono TEXT;
+BEGIN
+    INSERT INTO scheduler_lideranca (nome, dono, expira_em, atualizado_em)
+    VALUES (p_nome, p_dono, NOW() + make_interval(secs => p_ttl_segundos), NOW())
+    ON CONFLICT (nome) DO UPDATE
+        SET dono = EXCLUDED.dono,
+            expira_em = EXCLUDED.expira_em,
+            atualizado_em = NOW()
+        WHERE scheduler_lideranca.dono = EXCLUDED.dono
+        OR scheduler_lideranca.expira_em < NOW()
+    RETURNING dono INTO v_dono;
+
+    RETURN COALESCE(v_dono = p_dono, FALSE);
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- LIBERAR (DESLIGAMENTO LIMPO: OUTRO PROCESSO ASSUME SEM ESPERAR O TTL)
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION liberar_lideranca_scheduler(p_nome TEXT, p_dono TEXT)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM scheduler_lideranca
+    WHERE nome = p_nome
+    AND dono = p_dono;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- VERIFICAR
+-- ============================================================================
+-- SELECT * FROM scheduler_lideranca;
@@ -2,6 +2,9 @@
 
 import sys
 import os
+import atexit
+import signal
+import threading
 from flask import Flask
 from datetime import timedelta
 
@@ -28,11 +31,35 @@ def create_app():
     from . import routes
     app.register_blueprint(routes.main_bp)
 
-    # Iniciar scheduler de mensagens automáticas
+    # Iniciar schedulers apenas no processo líder (evita envios duplicados entre workers)
     from .scheduler import message_scheduler, clone_queue_scheduler
-    message_scheduler.start()
-    clone_queue_scheduler.start()
-    print('✅ Scheduler de mensagens iniciado', file=sys.stderr)
-    print('✅ Scheduler de fila de clonagem iniciado', file=sys.stderr)
+    from .leader_election import scheduler_leader
+    from .send_dispatcher import send_dispatcher
+
+    def iniciar_schedulers():
+        send_dispatcher.resume_leader_jobs()
+        message_scheduler.start()
+        clone_queue_scheduler.start()
+        print('✅ Scheduler de mensagens iniciado', file=sys.stderr)
+        print('✅ Scheduler de fila de clonagem iniciado', file=sys.stderr)
+
+    def parar_schedulers():
+        # Primeiro corta os envios dos schedulers (inclusive os já no pool), depois para as threads
+        send_dispatcher.suspend_leader_jobs()
+        message_scheduler.stop()
+        clone_queue_scheduler.stop()
+
+    # Todo worker observa mudanças de agendamento; fora do líder elas viram um aviso ao líder
+    from . import database
+    database.registrar_ouvinte_agendamento(message_scheduler.notificar_agendamento)
+
+    scheduler_leader.start(on_elected=iniciar_schedulers, on_demoted=parar_schedulers)
+    # Desligamento limpo entrega a liderança (no modo supabase outro processo assume sem esperar o TTL)
+    atexit.register(scheduler_leader.stop)
+    if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        # SIGTERM sem handler (python run.py no Docker) encerraria sem rodar o atexit
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if not scheduler_leader.is_leader:
+        print(f'⏸️ Schedulers em espera (líder é outro processo; modo {scheduler_leader.backend.mode})', file=sys.stderr)
 
     return app
\ No newline at end of file
@@ -9,6 +9,7 @@ import re
 import random
 import json
 from urllib.parse import quote_plus
+from .pagination import fetch_pages, search_rate_limiter
 
 load_dotenv()
 USER_AGENT = os.getenv("USER_AGENT")
@@ -641,123 +642,133 @@ def scrape_produto_amazon_especifico(url, afiliado_link=None, max_retries=3, use
         print(f"Último erro: {last_error}")
         print(f"Traceback: {traceback.format_exc()}")
     return None
-def scrape_amazon(produto, max_pages=2, categoria="", max_retries=2, use_api=True):
+def _scrape_pagina_amazon(produto_formatado, page, max_retries=2, use_api=True):
     """
-    Scraping robusto de busca Amazon com retry automático
-
-    Args:
-        produto: Termo de busca
-        max_pages: Número máximo de páginas
-        categoria: Categoria (não usado)
-        max_retries: Número máximo de tentativas por página
-        use_api: Se True, usa ScraperAPI; se False, usa requisição direta
+    Busca uma página de resultados da Amazon com retry automático.
+    Retorna a lista de produtos da página (vazia se não houver resultados)
+    e propaga o erro de requisição se todas as tentativas falharem.
     """
-    produtos = []
-    produto_formatado = quote_plus(produto)
     scraperapi_key = os.getenv("SCRAPERAPI_KEY")
 
-    for page in range(1, max_pages + 1):
-        page_success = False
+    for tentativa in range(max_retries):
+        try:
+            if tentativa > 0:
+                wait_time = random.uniform(3, 6)
+                print(f"⏳ Aguardando {wait_time:.1f}s antes de tentar novamente...")
+                time.sleep(wait_time)
 
-        for tentativa in range(max_retries):
-            try:
-                if tentativa > 0:
-                    wait_time = random.uniform(3, 6)
-                    print(f"⏳ Aguardando {wait_time:.1f}s antes de tentar novamente...")
-                    time.sleep(wait_time)
-
-                url = f'https://www.amazon.com.br/s?k={produto_formatado}&page={page}'
-
-                # Decidir se usa ScraperAPI
-                usar_api = use_api and scraperapi_key and scraperapi_key != ""
-
-                if usar_api:
-                    print(f"🔍 Fazendo scraping da página {page} via ScraperAPI: {url} (tentativa {tentativa + 1}/{max_retries})")
-                    api_url = 'http://api.scraperapi.com'
-                    payload = {
-                        'api_key': scraperapi_key,
-                        'url': url,
-                        'render': 'false'
-                    }
-                    response = requests.get(api_url, params=payload, timeout=60)
-                else:
-                    print(f"🔍 Fazendo scraping da página {page} (direto): {url} (tentativa {tentativa + 1}/{max_retries})")
-                    time.sleep(random.uniform(1.5, 3.5))
-                    response = requests.get(url, headers=headers, proxies=proxies, timeout=20)
+            url = f'https://www.amazon.com.br/s?k={produto_formatado}&page={page}'
 
-                # Tratar erros específicos
-                if response.status_code in [503, 500, 429]:
-                    print(f"⚠️ Servidor retornou {response.status_code}, tentando novamente...")
+            # Decidir se usa ScraperAPI
+            usar_api = use_api and scraperapi_key and scraperapi_key != ""
+
+            if usar_api:
+                print(f"🔍 Fazendo scraping da página {page} via ScraperAPI: {url} (tentativa {tentativa + 1}/{max_retries})")
+                api_url = 'http://api.scraperapi.com'
+                payload = {
+                    'api_key': scraperapi_key,
+                    'url': url,
+                    'render': 'false'
+                }
+                response = requests.get(api_url, params=payload, timeout=60)
+            else:
+                print(f"🔍 Fazendo scraping da página {page} (direto): {url} (tentativa {tentativa + 1}/{max_retries})")
+                time.sleep(random.uniform(1.5, 3.5))
+                response = requests.get(url, headers=headers, proxies=proxies, timeout=20)
+
+            # Tratar erros específicos
+            if response.status_code in [503, 500, 429]:
+                print(f"⚠️ Servidor retornou {response.status_code}, tentando novamente...")
+                continue
+
+            if response.status_code != 200:
+                print(f"⚠️ Status code: {response.status_code}")
+                if tentativa < max_retries - 1:
                     continue
+                print(f"❌ Parando a busca na Amazon após {max_retries} tentativas.")
+                raise requests.RequestException(f"Status {response.status_code} na página {page}")
 
-                if response.status_code != 200:
-                    print(f"⚠️ Status code: {response.status_code}")
-                    if tentativa < max_retries - 1:
-                        continue
-                    else:
-                        print(f"❌ Parando a busca na Amazon após {max_retries} tentativas.")
-                        return produtos
+            soup = BeautifulSoup(response.content, 'html.parser')
 
-                soup = BeautifulSoup(response.content, 'html.parser')
+            # Verificar se há conteúdo válido
+            if not soup or not soup.find():
+                print("⚠️ Página vazia, tentando novamente...")
+                continue
 
-                # Verificar se há conteúdo válido
-                if not soup or not soup.find():
-                    print("⚠️ Página vazia, tentando novamente...")
+            produtos_encontrados = soup.select('[data-component-type="s-search-result"]')
+            if not produtos_encontrados:
+                print("⚠️ Nenhum produto encontrado nesta página da Amazon.")
+                if tentativa < max_retries - 1:
                     continue
+                return []
 
-                produtos_encontrados = soup.select('[data-component-type="s-search-result"]')
-                if not produtos_encontrados:
-                    print("⚠️ Nenhum produto encontrado nesta página da Amazon.")
-                    if tentativa < max_retries - 1:
+            # Processar produtos encontrados
+            print(f"✅ Encontrados {len(produtos_encontrados)} produtos na página {page}")
+            produtos = []
+            for item in produtos_encontrados:
+                try:
+                    nome_elem = item.select_one('h2 .a-text-normal')
+                    if not nome_elem:
                         continue
-                    else:
-                        break
+                    nome = nome_elem.get_text().strip()
+                    link_elem = item.select_one('h2 a')
+                    link = f"https://www.amazon.com.br{link_elem['href']}" if link_elem else ""
+
+                    preco_info = extrair_preco_amazon(item)
+                    imagem = extrair_imagem_amazon(item)
+                    rating, reviews = extrair_rating_amazon(item)
+
+                    produto_dict = {
+                        'nome': nome, 'link': link, 'link_afiliado': gerar_link_afiliado_amazon(link),
+                        'imagem': imagem, 'comissao_pct': "8.0", 'fonte': 'Amazon',
+                        'rating': rating, 'reviews': reviews, **preco_info
+                    }
+                    produtos.append(produto_dict)
+                    print(f"✅ Produto Amazon adicionado: {nome[:50]}... | Preço: {preco_info['preco_atual']}")
 
-                # Processar produtos encontrados
-                print(f"✅ Encontrados {len(produtos_encontrados)} produtos na página {page}")
-                for item in produtos_encontrados:
-                    try:
-                        nome_elem = item.select_one('h2 .a-text-normal')
-                        if not nome_elem:
-                            continue
-                        nome = nome_elem.get_text().strip()
-                        link_elem = item.select_one('h2 a')
-                        link = f"https://www.amazon.com.br{link_elem['href']}" if link_elem else ""
-
-                        preco_info = extrair_preco_amazon(item)
-                        imagem = extrair_imagem_amazon(item)
-                        rating, reviews = extrair_rating_amazon(item)
-
-                        produto_dict = {
-                            'nome': nome, 'link': link, 'link_afiliado': gerar_link_afiliado_amazon(link),
-                            'imagem': imagem, 'comissao_pct': "8.0", 'fonte': 'Amazon',
-                            'rating': rating, 'reviews': reviews, **preco_info
-                        }
-                        produtos.append(produto_dict)
-                        print(f"✅ Produto Amazon adicionado: {nome[:50]}... | Preço: {preco_info['preco_atual']}")
-
-                    except Exception as e:
-                        print(f"⚠️ Erro ao processar item da Amazon: {e}")
-                        continue
+                except Exception as e:
+                    print(f"⚠️ Erro ao processar item da Amazon: {e}")
+                    continue
 
-                page_success = True
-                break  # Sair do loop de retry se teve sucesso
+            return produtos
 
-            except requests.RequestException as req_error:
-                print(f"⚠️ Erro de requisição (tentativa {tentativa + 1}/{max_retries}): {req_error}")
-                if tentativa == max_retries - 1:
-                    print(f"❌ Falha na página {page} após {max_retries} tentativas")
-                    return produtos
-                continue
+        except requests.RequestException as req_error:
+            print(f"⚠️ Erro de requisição (tentativa {tentativa + 1}/{max_retries}): {req_error}")
+            if tentativa == max_retries - 1:
+                print(f"❌ Falha na página {page} após {max_retries} tentativas")
+                raise
+            continue
 
-            except Exception as parse_error:
-                print(f"⚠️ Erro ao processar página (tentativa {tentativa + 1}/{max_retries}): {parse_error}")
-                if tentativa == max_retries - 1:
-                    print(f"❌ Falha na página {page} após {max_retries} tentativas")
-                continue
+        except Exception as parse_error:
+            print(f"⚠️ Erro ao processar página (tentativa {tentativa + 1}/{max_retries}): {parse_error}")
+            if tentativa == max_retries - 1:
+                print(f"❌ Falha na página {page} após {max_retries} tentativas")
+            continue
+
+    print(f"⚠️ Não foi possível carregar a página {page}")
+    return []
+
+def scrape_amazon(produto, max_pages=2, categoria="", max_retries=2, use_api=True):
+    """
+    Scraping robusto de busca Amazon com retry automático
+
+    Args:
+        produto: Termo de busca
+        max_pages: Número máximo de páginas
+        categoria: Categoria (não usado)
+        max_retries: Número máximo de tentativas por página
+        use_api: Se True, usa ScraperAPI; se False, usa requisição direta
+    """
+    produto_formatado = quote_plus(produto)
 
-        if not page_success:
-            print(f"⚠️ Não foi possível carregar a página {page}, continuando para próxima...")
+    # Páginas buscadas em paralelo dentro do rate limit; para na primeira página vazia ou com falha
+    produtos = fetch_pages(
+        lambda page: _scrape_pagina_amazon(produto_formatado, page, max_retries, use_api),
+        max_pages,
+        rate_limiter=search_rate_limiter,
+        domain='www.amazon.com.br',
+        platform='amazon'
+    )
 
     print(f"✅ Scraping da Amazon concluído. Total: {len(produtos)} produtos.")
     return produtos
\ No newline at end of file
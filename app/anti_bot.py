@@ -1,3 +1,4 @@
+import asyncio
 import time
 import random
 import requests
@@ -7,46 +8,94 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import logging
 import threading
+import weakref
 from collections import defaultdict
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
 from .config import ScrapingConfig
 
 logger = logging.getLogger(__name__)
 
 class RateLimiter:
-    """Limitador de taxa para evitar sobrecarga em requisições em massa"""
-    def __init__(self, max_requests_per_minute: int = 30):
+    """
+    Limitador de taxa por domínio (token bucket com reserva).
+    Cada chamada reserva um token sob um lock curto e recebe quanto tempo
+    deve esperar; a espera acontece fora do lock, então um domínio
+    estrangulado não bloqueia os demais.
+    """
+    def __init__(self, max_requests_per_minute: int = 30, burst: Optional[int] = None):
         self.max_requests = max_requests_per_minute
-        self.requests_by_domain = defaultdict(list)
+        self.burst = burst or max_requests_per_minute
+        self.buckets: Dict[str, Dict[str, float]] = {}
+        self.metrics = defaultdict(lambda: {'requests': 0, 'throttled': 0, 'total_wait': 0.0, 'max_wait': 0.0})
         self.lock = threading.Lock()
 
+    def reserve(self, domain: str) -> float:
+        """Reserva um token para o domínio e retorna quantos segundos aguardar antes de usá-lo"""
+        rate = self.max_requests / 60.0
+        with self.lock:
+            now = time.monotonic()
+            bucket = self.buckets.get(domain)
+            if bucket is None:
+                bucket = {'tokens': float(self.burst), 'updated': now}
+                self.buckets[domain] = bucket
+
+            # Repor tokens proporcionalmente ao tempo decorrido
+            bucket['tokens'] = min(self.burst, bucket['tokens'] + (now - bucket['updated']) * rate)
+            bucket['updated'] = now
+
+            # Consumir o token (pode ficar negativo: a dívida vira tempo de espera)
+            bucket['tokens'] -= 1
+            wait_time = -bucket['tokens'] / rate if bucket['tokens'] < 0 else 0.0
+
+            metrics = self.metrics[domain]
+            metrics['requests'] += 1
+            if wait_time > 0:
+                metrics['throttled'] += 1
+                metrics['total_wait'] += wait_time
+                metrics['max_wait'] = max(metrics['max_wait'], wait_time)
+            return wait_time
+
     def wait_if_needed(self, domain: str):
         """Aguarda se necessário para respeitar o rate limit"""
+        wait_time = self.reserve(domain)
+        if wait_time > 0:
+            logger.warning(f"Rate limit atingido para {domain}. Aguardando {wait_time:.1f}s")
+            time.sleep(wait_time)
+
+    async def acquire(self, domain: str):
+        """Versão assíncrona de wait_if_needed (não bloqueia o event loop)"""
+        wait_time = self.reserve(domain)
+        if wait_time > 0:
+            logger.warning(f"Rate limit atingido para {domain}. Aguardando {wait_time:.1f}s")
+            await asyncio.sleep(wait_time)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Retorna métricas de espera por domínio"""
+        rate = self.max_requests / 60.0
         with self.lock:
-            now = time.time()
-            # Remover requisições antigas (mais de 60 segundos)
-            self.requests_by_domain[domain] = [
-                req_time for req_time in self.requests_by_domain[domain]
-                if now - req_time < 60
-            ]
-
-            # Verificar se atingiu o limite
-            if len(self.requests_by_domain[domain]) >= self.max_requests:
-                oldest_request = self.requests_by_domain[domain][0]
-                wait_time = 60 - (now - oldest_request)
-                if wait_time > 0:
-                    logger.warning(f"Rate limit atingido para {domain}. Aguardando {wait_time:.1f}s")
-                    time.sleep(wait_time)
-                    # Limpar lista após esperar
-                    self.requests_by_domain[domain] = []
-
-            # Registrar esta requisição
-            self.requests_by_domain[domain].append(time.time())
+            now = time.monotonic()
+            result = {}
+            for domain, metrics in self.metrics.items():
+                bucket = self.buckets.get(domain)
+                tokens = min(self.burst, bucket['tokens'] + (now - bucket['updated']) * rate) if bucket else self.burst
+                result[domain] = {
+                    **metrics,
+                    'total_wait': round(metrics['total_wait'], 2),
+                    'max_wait': round(metrics['max_wait'], 2),
+                    'avg_wait': round(metrics['total_wait'] / metrics['requests'], 3) if metrics['requests'] else 0.0,
+                    'tokens_available': round(tokens, 2)
+                }
+            return result
 
 class ProxyManager:
     def __init__(self):
         self.proxies: List[Dict[str, str]] = []
         self.current_proxy_index = 0
         self.failed_proxies: set = set()
+        self.lock = threading.Lock()
         self._load_proxies()
 
     def _load_proxies(self):
@@ -70,31 +119,65 @@ class ProxyManager:
     def get_next_proxy(self) -> Optional[Dict[str, str]]:
         if not self.proxies:
             return None
-        available_proxies = [p for i, p in enumerate(self.proxies) if i not in self.failed_proxies]
-        if not available_proxies:
-            self.failed_proxies.clear()
-            available_proxies = self.proxies
-        if available_proxies:
-            proxy = random.choice(available_proxies)
-            self.current_proxy_index = self.proxies.index(proxy)
-            return proxy
+        with self.lock:
+            available_proxies = [p for i, p in enumerate(self.proxies) if i not in self.failed_proxies]
+            if not available_proxies:
+                self.failed_proxies.clear()
+                available_proxies = self.proxies
+            if available_proxies:
+                proxy = random.choice(available_proxies)
+                self.current_proxy_index = self.proxies.index(proxy)
+                return proxy
         return None
 
     def mark_proxy_failed(self, proxy: Dict[str, str]):
-        try:
-            index = self.proxies.index(proxy)
-            self.failed_proxies.add(index)
-        except ValueError:
-            pass
+        with self.lock:
+            try:
+                index = self.proxies.index(proxy)
+                self.failed_proxies.add(index)
+            except ValueError:
+                pass
 
-class AntiBotManager:
-    def __init__(self):
-        self.proxy_manager = ProxyManager()
-        self.scraperapi_key = os.getenv("SCRAPERAPI_KEY")
-        self.rate_limiter = RateLimiter(max_requests_per_minute=30)
+class PooledSession:
+    """Sessão HTTP reutilizável associada a um par (domínio, proxy)"""
+    def __init__(self, key: Tuple[str, str], session: requests.Session):
+        self.key = key
+        self.session = session
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.in_use = 0
+        self.requests = 0
+        self.broken = False
+
+class SessionPool:
+    """
+    Pool de sessões HTTP de longa duração, indexado por (domínio, proxy).
+    Mantém as conexões keep-alive abertas entre requisições para evitar um
+    novo handshake TCP+TLS a cada produto, e descarta sessões ociosas.
+    """
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 20,
+                 max_sessions: int = 32, idle_timeout: float = 120):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[Tuple[str, str], PooledSession] = {}
+        self.last_sweep = time.time()
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {'requests': 0, 'reused': 0, 'created': 0, 'evicted': 0, 'errors': 0})
+
+    @staticmethod
+    def _proxy_label(proxy: Optional[Dict[str, str]]) -> str:
+        """Identifica o proxy sem expor credenciais"""
+        if not proxy:
+            return 'direct'
+        parsed = urlparse(proxy.get('https') or proxy.get('http') or '')
+        if parsed.port:
+            return f"{parsed.hostname}:{parsed.port}"
+        return parsed.hostname or 'direct'
 
-    def _create_fresh_session(self):
-        """Cria uma nova sessão HTTP para evitar problemas de estado entre requisições"""
+    def _create_session(self) -> requests.Session:
+        """Cria uma sessão com retry e pool de conexões keep-alive"""
         session = requests.Session()
         retry_strategy = Retry(
             total=ScrapingConfig.RETRY_CONFIG['max_retries'],
@@ -102,11 +185,198 @@ class AntiBotManager:
             status_forcelist=ScrapingConfig.RETRY_CONFIG['status_forcelist'],
             allowed_methods=["HEAD", "GET", "OPTIONS"]
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
+        # Não guardar cookies entre requisições (mesmo comportamento da sessão fresca)
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
         return session
 
+    def _evict_expired(self, now: float):
+        """Remove sessões ociosas há mais de idle_timeout (deve ser chamada com lock)"""
+        self.last_sweep = now
+        for key, pooled in list(self.sessions.items()):
+            if pooled.in_use == 0 and now - pooled.last_used > self.idle_timeout:
+                self._remove(pooled)
+
+    def _evict_idle(self, now: float):
+        """Remove sessões ociosas e abre espaço para uma nova (deve ser chamada com lock)"""
+        self._evict_expired(now)
+
+        # Respeitar o número máximo de sessões removendo as menos usadas recentemente
+        if len(self.sessions) >= self.max_sessions:
+            idle = sorted((p for p in self.sessions.values() if p.in_use == 0), key=lambda p: p.last_used)
+            for pooled in idle[:len(self.sessions) - self.max_sessions + 1]:
+                self._remove(pooled)
+
+    def _remove(self, pooled: PooledSession):
+        """Tira a sessão do pool e fecha se ninguém estiver usando (deve ser chamada com lock)"""
+        if self.sessions.get(pooled.key) is pooled:
+            del self.sessions[pooled.key]
+            self.stats[self._stats_key(pooled.key)]['evicted'] += 1
+        if pooled.in_use == 0:
+            pooled.session.close()
+
+    @staticmethod
+    def _stats_key(key: Tuple[str, str]) -> str:
+        return f"{key[0]}|{key[1]}"
+
+    def _acquire(self, domain: str, proxy: Optional[Dict[str, str]]) -> PooledSession:
+        key = (domain, self._proxy_label(proxy))
+        with self.lock:
+            now = time.time()
+            stats = self.stats[self._stats_key(key)]
+            # Varredura periódica: sem ela, com poucas chaves sempre em uso, sessões
+            # de domínios/proxies abandonados só sairiam quando surgisse uma chave nova
+            if now - self.last_sweep >= self.idle_timeout:
+                self._evict_expired(now)
+            pooled = self.sessions.get(key)
+            if pooled is not None and pooled.in_use == 0 and now - pooled.last_used > self.idle_timeout:
+                # Conexões keep-alive paradas há tanto tempo provavelmente já foram fechadas pelo servidor
+                self._remove(pooled)
+                pooled = None
+            if pooled is None:
+                self._evict_idle(now)
+                pooled = PooledSession(key, self._create_session())
+                self.sessions[key] = pooled
+                stats['created'] += 1
+            else:
+                stats['reused'] += 1
+            pooled.in_use += 1
+            pooled.requests += 1
+            pooled.last_used = now
+            stats['requests'] += 1
+            return pooled
+
+    def _release(self, pooled: PooledSession):
+        with self.lock:
+            pooled.in_use -= 1
+            pooled.last_used = time.time()
+            if pooled.broken:
+                self._remove(pooled)
+
+    @contextmanager
+    def session(self, domain: str, proxy: Optional[Dict[str, str]] = None):
+        """Empresta a sessão do par (domínio, proxy), criando-a se necessário"""
+        pooled = self._acquire(domain, proxy)
+        try:
+            yield pooled.session
+        except requests.exceptions.ConnectionError:
+            # Conexão quebrada ou proxy com problema: a próxima requisição abre uma sessão nova
+            with self.lock:
+                pooled.broken = True
+                self.stats[self._stats_key(pooled.key)]['errors'] += 1
+            raise
+        finally:
+            self._release(pooled)
+
+    def close_all(self):
+        """Fecha todas as sessões do pool"""
+        with self.lock:
+            for pooled in list(self.sessions.values()):
+                pooled.broken = True
+                self._remove(pooled)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Retorna estatísticas por pool (domínio|proxy)"""
+        with self.lock:
+            now = time.time()
+            result = {}
+            for stats_key, stats in self.stats.items():
+                result[stats_key] = {**stats, 'active': False}
+            for key, pooled in self.sessions.items():
+                result[self._stats_key(key)].update({
+                    'active': True,
+                    'in_use': pooled.in_use,
+                    'age_seconds': round(now - pooled.created_at, 1),
+                    'idle_seconds': round(now - pooled.last_used, 1)
+                })
+            return result
+
+@dataclass
+class AsyncResponse:
+    """Resposta de uma requisição assíncrona (mesmos campos usados de requests.Response)"""
+    status_code: int
+    text: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} para {self.url}")
+
+class AsyncFetchEngine:
+    """
+    Motor de requisições assíncronas baseado em aiohttp.
+    Mantém uma ClientSession por event loop e limita a concorrência por domínio.
+    """
+    def __init__(self, max_per_domain: int = 4, max_connections: int = 100):
+        self.max_per_domain = max_per_domain
+        self.max_connections = max_connections
+        self._loops = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def _loop_state(self) -> Dict:
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            state = self._loops.get(loop)
+            if state is None:
+                state = {'session': None, 'semaphores': {}}
+                self._loops[loop] = state
+            return state
+
+    def _get_session(self, state: Dict):
+        import aiohttp
+        if state['session'] is None or state['session'].closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            # Sem cookies entre requisições, como nas sessões síncronas
+            state['session'] = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+        return state['session']
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None,
+                    proxy: Optional[Dict[str, str]] = None, timeout: float = 30, **kwargs) -> AsyncResponse:
+        import aiohttp
+        state = self._loop_state()
+        domain = urlparse(url).netloc
+        semaphore = state['semaphores'].setdefault(domain, asyncio.Semaphore(self.max_per_domain))
+        proxy_url = None
+        if proxy:
+            proxy_url = proxy.get('https') if url.startswith('https') else proxy.get('http')
+
+        async with semaphore:
+            session = self._get_session(state)
+            async with session.get(url, headers=headers, proxy=proxy_url,
+                                   timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as resp:
+                text = await resp.text(errors='replace')
+                return AsyncResponse(resp.status, text, str(resp.url), dict(resp.headers))
+
+    async def close(self):
+        """Fecha a sessão do event loop atual"""
+        state = self._loops.get(asyncio.get_running_loop())
+        if state and state['session'] is not None and not state['session'].closed:
+            await state['session'].close()
+
+    def run(self, coro):
+        """Executa uma corrotina a partir de código síncrono e fecha a sessão ao final"""
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.close()
+        return asyncio.run(runner())
+
+class AntiBotManager:
+    def __init__(self):
+        self.proxy_manager = ProxyManager()
+        self.scraperapi_key = os.getenv("SCRAPERAPI_KEY")
+        self.rate_limiter = RateLimiter(max_requests_per_minute=30)
+        self.session_pool = session_pool
+        self.async_engine = AsyncFetchEngine(**ScrapingConfig.ASYNC_FETCH_CONFIG)
+
     def get_request_config(self) -> Tuple[Dict[str, str], Optional[Dict[str, str]]]:
         headers = ScrapingConfig.get_random_headers()
         proxy = self.proxy_manager.get_next_proxy()
@@ -121,35 +391,28 @@ class AntiBotManager:
         payload = {'api_key': self.scraperapi_key, 'url': url, 'render': 'true'}
         logger.info(f"Fazendo requisição para {url} via ScraperAPI...")
 
-        # Criar uma sessão fresca para cada requisição via API
-        session = self._create_fresh_session()
         try:
-            response = session.get(api_url, params=payload, timeout=90)
+            # Reutilizar a conexão keep-alive com a ScraperAPI
+            with self.session_pool.session(urlparse(api_url).netloc) as session:
+                response = session.get(api_url, params=payload, timeout=90)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro ao fazer requisição via ScraperAPI: {e}")
             logger.warning("Tentando requisição direta como fallback...")
             return self.make_request(url, **kwargs)
-        finally:
-            # Fechar a sessão após o uso
-            session.close()
 
     def make_request(self, url: str, **kwargs) -> requests.Response:
         max_attempts = 3
-        session = None
 
         # Extrair domínio para rate limiting
-        from urllib.parse import urlparse
         domain = urlparse(url).netloc
 
         # Aplicar rate limiting por domínio
         self.rate_limiter.wait_if_needed(domain)
 
         for attempt in range(max_attempts):
-            # Criar uma sessão fresca para cada tentativa
-            session = self._create_fresh_session()
-
+            proxy = None
             try:
                 headers, proxy = self.get_request_config()
                 delay = random.uniform(
@@ -157,10 +420,55 @@ class AntiBotManager:
                     ScrapingConfig.DELAY_CONFIG['max_delay']
                 )
                 time.sleep(delay)
-                response = session.get(
+                # Sessão do pool (domínio, proxy): reaproveita conexões já abertas
+                with self.session_pool.session(domain, proxy) as session:
+                    response = session.get(
+                        url,
+                        headers=headers,
+                        proxies=proxy,
+                        timeout=ScrapingConfig.RETRY_CONFIG['timeout'],
+                        **kwargs
+                    )
+                if self._is_blocked(response):
+                    logger.warning(f"Possível bloqueio detectado na tentativa {attempt + 1}")
+                    if proxy:
+                        self.proxy_manager.mark_proxy_failed(proxy)
+                    if attempt < max_attempts - 1:
+                        time.sleep(ScrapingConfig.DELAY_CONFIG['retry_delay'])
+                        continue
+                return response
+            except requests.exceptions.ProxyError:
+                if proxy:
+                    self.proxy_manager.mark_proxy_failed(proxy)
+                logger.warning(f"Erro de proxy na tentativa {attempt + 1}")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erro na requisição: {e}")
+
+            if attempt < max_attempts - 1:
+                time.sleep(ScrapingConfig.DELAY_CONFIG['retry_delay'])
+
+        raise requests.exceptions.RequestException("Todas as tentativas falharam")
+
+    async def make_request_async(self, url: str, **kwargs) -> AsyncResponse:
+        """Versão assíncrona de make_request (mesmas tentativas, rotação de proxy e detecção de bloqueio)"""
+        import aiohttp
+        max_attempts = 3
+        domain = urlparse(url).netloc
+
+        await self.rate_limiter.acquire(domain)
+
+        for attempt in range(max_attempts):
+            proxy = None
+            try:
+                headers, proxy = self.get_request_config()
+                await asyncio.sleep(random.uniform(
+                    ScrapingConfig.DELAY_CONFIG['min_delay'],
+                    ScrapingConfig.DELAY_CONFIG['max_delay']
+                ))
+                response = await self.async_engine.fetch(
                     url,
                     headers=headers,
-                    proxies=proxy,
+                    proxy=proxy,
                     timeout=ScrapingConfig.RETRY_CONFIG['timeout'],
                     **kwargs
                 )
@@ -169,25 +477,41 @@ class AntiBotManager:
                     if proxy:
                         self.proxy_manager.mark_proxy_failed(proxy)
                     if attempt < max_attempts - 1:
-                        session.close()
-                        time.sleep(ScrapingConfig.DELAY_CONFIG['retry_delay'])
+                        await asyncio.sleep(ScrapingConfig.DELAY_CONFIG['retry_delay'])
                         continue
-                # Não fechar a sessão aqui, pois o response ainda precisa dela
                 return response
-            except requests.exceptions.ProxyError:
+            except aiohttp.ClientProxyConnectionError:
                 if proxy:
                     self.proxy_manager.mark_proxy_failed(proxy)
                 logger.warning(f"Erro de proxy na tentativa {attempt + 1}")
-                session.close()
-            except requests.exceptions.RequestException as e:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 logger.error(f"Erro na requisição: {e}")
-                session.close()
 
             if attempt < max_attempts - 1:
-                time.sleep(ScrapingConfig.DELAY_CONFIG['retry_delay'])
+                await asyncio.sleep(ScrapingConfig.DELAY_CONFIG['retry_delay'])
 
         raise requests.exceptions.RequestException("Todas as tentativas falharam")
 
+    async def make_request_via_api_async(self, url: str, **kwargs) -> AsyncResponse:
+        """Versão assíncrona de make_request_via_api"""
+        import aiohttp
+        if not self.scraperapi_key:
+            logger.warning("SCRAPERAPI_KEY não configurada. Usando requisição direta.")
+            return await self.make_request_async(url, **kwargs)
+
+        api_url = 'http://api.scraperapi.com'
+        payload = {'api_key': self.scraperapi_key, 'url': url, 'render': 'true'}
+        logger.info(f"Fazendo requisição para {url} via ScraperAPI...")
+
+        try:
+            response = await self.async_engine.fetch(api_url, params=payload, timeout=90)
+            response.raise_for_status()
+            return response
+        except (aiohttp.ClientError, asyncio.TimeoutError, requests.exceptions.HTTPError) as e:
+            logger.error(f"Erro ao fazer requisição via ScraperAPI: {e}")
+            logger.warning("Tentando requisição direta como fallback...")
+            return await self.make_request_async(url, **kwargs)
+
     def _is_blocked(self, response: requests.Response) -> bool:
         if response.status_code in [403, 429, 503]:
             return True
@@ -203,4 +527,7 @@ class AntiBotManager:
         return random.uniform(
             ScrapingConfig.DELAY_CONFIG['page_delay'],
             ScrapingConfig.DELAY_CONFIG['page_delay'] * 1.5
-        )
\ No newline at end of file
+        )
+
+# Pool global de sessões, compartilhado por todos os AntiBotManager
+session_pool = SessionPool(**ScrapingConfig.SESSION_POOL_CONFIG)
@@ -4,12 +4,22 @@ Sistema de cache para otimizar performance do web scraping
 """
 
 import time
+import copy
 import hashlib
+import heapq
+import inspect
+import itertools
 import json
 import threading
-from typing import Dict, Any, Optional, Union
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 from dataclasses import dataclass
 import logging
+from .canonical import canonical_product_key
+from .config import ScrapingConfig
+from .disk_cache import DiskCache
 
 logger = logging.getLogger(__name__)
 
@@ -21,203 +31,514 @@ class CacheEntry:
     ttl: float
     access_count: int = 0
     last_accessed: float = 0.0
+    size: int = 0  # bytes estimados, medidos uma única vez na inserção
+    stale_ttl: float = 0.0  # janela após o TTL em que ainda pode ser servida (stale-while-revalidate)
     
     def is_expired(self) -> bool:
         """Verifica se a entrada expirou"""
         return time.time() - self.timestamp > self.ttl
     
+    def is_removable(self) -> bool:
+        """Verifica se a entrada passou também da janela de stale"""
+        return time.time() > self.removable_at()
+    
+    def removable_at(self) -> float:
+        """Momento a partir do qual a entrada pode ser removida"""
+        return self.timestamp + self.ttl + self.stale_ttl
+    
     def is_stale(self, max_age: float) -> bool:
         """Verifica se a entrada está obsoleta"""
         return time.time() - self.timestamp > max_age
 
-class CacheManager:
-    """Gerenciador de cache com TTL e LRU"""
+def estimate_size(data: Any) -> int:
+    """Estimativa do tamanho em bytes de um valor (tamanho serializado em JSON)"""
+    try:
+        return len(json.dumps(data, default=str))
+    except Exception:
+        return 1000  # Estimativa para dados não serializáveis
+
+class CacheShard:
+    """
+    Fatia do cache: LRU O(1) (OrderedDict) protegida por um lock próprio.
+    As expirações ficam num min-heap (removable_at, seq, key); itens de entradas
+    já removidas ou substituídas são descartados quando chegam ao topo.
+    """
     
-    def __init__(self, max_size: int = 1000, default_ttl: float = 3600):
+    def __init__(self, max_size: int, max_bytes: Optional[int] = None):
         self.max_size = max_size
-        self.default_ttl = default_ttl
-        self.cache: Dict[str, CacheEntry] = {}
-        self.access_order: list = []  # Para implementar LRU
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.expiry_heap: List[Tuple[float, int, str]] = []
+        self.sequence = itertools.count()
         self.lock = threading.RLock()
         self.stats = {
             'hits': 0,
             'misses': 0,
             'evictions': 0,
-            'expired_cleanups': 0
+            'expired_cleanups': 0,
+            'rejected': 0,
+            'stale_hits': 0
         }
     
-    def _generate_key(self, *args, **kwargs) -> str:
-        """Gera chave única baseada nos argumentos"""
-        key_data = {
-            'args': args,
-            'kwargs': sorted(kwargs.items())
-        }
-        key_str = json.dumps(key_data, sort_keys=True, default=str)
-        return hashlib.md5(key_str.encode()).hexdigest()
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+        return entry
     
-    def get(self, key: str) -> Optional[Any]:
-        """Recupera valor do cache"""
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
         with self.lock:
-            if key not in self.cache:
+            entry = self.entries.get(key)
+            if entry is None:
                 self.stats['misses'] += 1
                 return None
             
-            entry = self.cache[key]
-            
-            # Verificar se expirou
+            # Verificar se expirou (mantém a entrada enquanto estiver na janela de stale)
             if entry.is_expired():
-                del self.cache[key]
-                self.access_order.remove(key)
+                if entry.is_removable():
+                    self._remove(key)
+                    self.stats['expired_cleanups'] += 1
+                elif allow_stale:
+                    self.stats['stale_hits'] += 1
+                    self.entries.move_to_end(key)
+                    return entry
                 self.stats['misses'] += 1
-                self.stats['expired_cleanups'] += 1
                 return None
             
             # Atualizar estatísticas de acesso
             entry.access_count += 1
             entry.last_accessed = time.time()
             
-            # Mover para o final da lista (mais recente)
-            self.access_order.remove(key)
-            self.access_order.append(key)
+            # Mover para o final (mais recente)
+            self.entries.move_to_end(key)
             
             self.stats['hits'] += 1
-            return entry.data
+            return entry
     
-    def set(self, key: str, data: Any, ttl: Optional[float] = None) -> None:
-        """Armazena valor no cache"""
+    def set(self, key: str, entry: CacheEntry) -> bool:
         with self.lock:
-            if ttl is None:
-                ttl = self.default_ttl
+            self._remove(key)
             
-            # Verificar se precisa remover itens para fazer espaço
-            if len(self.cache) >= self.max_size and key not in self.cache:
-                self._evict_lru()
+            # Item maior que o orçamento inteiro da fatia: não é armazenado
+            if self.max_bytes is not None and entry.size > self.max_bytes:
+                self.stats['rejected'] += 1
+                return False
             
-            # Criar entrada
-            entry = CacheEntry(
-                data=data,
-                timestamp=time.time(),
-                ttl=ttl
-            )
+            # Remove os itens menos recentemente usados até caber
+            while self.entries and (
+                len(self.entries) >= self.max_size or
+                (self.max_bytes is not None and self.current_bytes + entry.size > self.max_bytes)
+            ):
+                _, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.stats['evictions'] += 1
             
-            self.cache[key] = entry
+            self.entries[key] = entry
+            self.current_bytes += entry.size
+            heapq.heappush(self.expiry_heap, (entry.removable_at(), next(self.sequence), key))
             
-            # Atualizar ordem de acesso
-            if key in self.access_order:
-                self.access_order.remove(key)
-            self.access_order.append(key)
-    
-    def _evict_lru(self):
-        """Remove o item menos recentemente usado"""
-        if not self.access_order:
-            return
-        
-        # Remove o primeiro item da lista (menos recente)
-        lru_key = self.access_order.pop(0)
-        if lru_key in self.cache:
-            del self.cache[lru_key]
-            self.stats['evictions'] += 1
+            # Muitos itens órfãos (entradas removidas/substituídas): reconstrói o heap
+            if len(self.expiry_heap) > 2 * len(self.entries) + 1024:
+                self._rebuild_heap()
+            return True
+    
+    def _rebuild_heap(self):
+        self.expiry_heap = [
+            (entry.removable_at(), next(self.sequence), key) for key, entry in self.entries.items()
+        ]
+        heapq.heapify(self.expiry_heap)
     
     def delete(self, key: str) -> bool:
-        """Remove item do cache"""
         with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-                if key in self.access_order:
-                    self.access_order.remove(key)
-                return True
-            return False
+            return self._remove(key) is not None
     
     def clear(self):
-        """Limpa todo o cache"""
         with self.lock:
-            self.cache.clear()
-            self.access_order.clear()
+            self.entries.clear()
+            self.expiry_heap.clear()
+            self.current_bytes = 0
     
-    def cleanup_expired(self) -> int:
-        """Remove itens expirados do cache"""
+    def cleanup_expired(self, max_items: Optional[int] = None) -> Tuple[int, bool]:
+        """
+        Remove as entradas vencidas do topo do heap, no máximo max_items itens do heap
+        por chamada. Retorna (removidas, ainda há itens vencidos).
+        """
+        now = time.time()
+        removed = 0
+        processed = 0
         with self.lock:
-            expired_keys = []
-            for key, entry in self.cache.items():
-                if entry.is_expired():
-                    expired_keys.append(key)
-            
-            for key in expired_keys:
-                del self.cache[key]
-                if key in self.access_order:
-                    self.access_order.remove(key)
-            
-            self.stats['expired_cleanups'] += len(expired_keys)
-            return len(expired_keys)
+            heap = self.expiry_heap
+            while heap and heap[0][0] <= now:
+                if max_items is not None and processed >= max_items:
+                    return removed, True
+                deadline, _, key = heapq.heappop(heap)
+                processed += 1
+                entry = self.entries.get(key)
+                # Ignora itens de entradas já removidas ou regravadas com outro prazo
+                if entry is not None and entry.removable_at() == deadline:
+                    self._remove(key)
+                    removed += 1
+            self.stats['expired_cleanups'] += removed
+            return removed, False
+
+class CacheManager:
+    """
+    Gerenciador de cache com TTL e LRU, dividido em fatias com locks independentes.
+    Limita o número de itens (max_size) e, opcionalmente, o total de bytes (max_bytes).
+    Com um DiskCache (l2), faz read-through/write-through no segundo nível.
+    """
+    
+    def __init__(self, max_size: int = 1000, default_ttl: float = 3600, num_shards: int = 16,
+                 max_bytes: Optional[int] = None, l2: Optional[DiskCache] = None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.l2 = l2
+        self.default_ttl = default_ttl
+        self.num_shards = max(1, min(num_shards, max_size))
+        shard_size = -(-max_size // self.num_shards)  # divisão arredondada para cima
+        shard_bytes = -(-max_bytes // self.num_shards) if max_bytes else None
+        self.shards = [CacheShard(shard_size, shard_bytes) for _ in range(self.num_shards)]
+    
+    def _generate_key(self, *args, **kwargs) -> str:
+        """Gera chave única baseada nos argumentos"""
+        key_data = {
+            'args': args,
+            'kwargs': sorted(kwargs.items())
+        }
+        key_str = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.md5(key_str.encode()).hexdigest()
+    
+    def _shard(self, key: str) -> CacheShard:
+        return self.shards[hash(key) % self.num_shards]
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Recupera valor do cache (L1 em memória e, se faltar, L2 em disco)"""
+        cached = self.get_entry(key)
+        if cached is None or cached[1]:
+            return None
+        return cached[0]
+    
+    def get_entry(self, key: str, allow_stale: bool = False) -> Optional[Tuple[Any, bool]]:
+        """
+        Recupera (valor, obsoleto). Com allow_stale, entradas com TTL vencido mas ainda
+        dentro da janela de stale são retornadas com obsoleto=True.
+        """
+        shard = self._shard(key)
+        entry = shard.get(key, allow_stale)
+        if entry is not None:
+            return entry.data, entry.is_expired()
+        if self.l2 is None:
+            return None
+        
+        cached = self.l2.get(key, allow_stale)
+        if cached is None:
+            return None
+        
+        # Promove para o L1 com o TTL (e a janela de stale) que ainda resta
+        data, fresh_remaining, total_remaining = cached
+        ttl = max(fresh_remaining, 0.0)
+        shard.set(key, CacheEntry(data=data, timestamp=time.time(), ttl=ttl,
+                                  size=estimate_size(data), stale_ttl=total_remaining - ttl))
+        return data, fresh_remaining <= 0
+    
+    def set(self, key: str, data: Any, ttl: Optional[float] = None, stale_ttl: float = 0.0) -> bool:
+        """Armazena valor no cache (False se o item não couber no orçamento de bytes)"""
+        if ttl is None:
+            ttl = self.default_ttl
+        entry = CacheEntry(data=data, timestamp=time.time(), ttl=ttl, size=estimate_size(data),
+                           stale_ttl=stale_ttl)
+        stored = self._shard(key).set(key, entry)
+        if not stored:
+            logger.debug(f"Item de {entry.size} bytes grande demais para o cache: {key}")
+        if self.l2 is not None:
+            stored = self.l2.set(key, data, ttl, stale_ttl) or stored
+        return stored
+    
+    def delete(self, key: str) -> bool:
+        """Remove item do cache"""
+        deleted = self._shard(key).delete(key)
+        if self.l2 is not None:
+            deleted = self.l2.delete(key) or deleted
+        return deleted
+    
+    def clear(self):
+        """Limpa todo o cache"""
+        for shard in self.shards:
+            shard.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+    
+    def cleanup_expired(self, batch_size: int = 256) -> int:
+        """
+        Remove itens expirados do cache. Custa O(expirados · log n): cada fatia é
+        processada em lotes de batch_size, liberando o lock entre um lote e outro.
+        """
+        cleaned = 0
+        for shard in self.shards:
+            pending = True
+            while pending:
+                removed, pending = shard.cleanup_expired(batch_size)
+                cleaned += removed
+        if self.l2 is not None:
+            cleaned += self.l2.cleanup_expired()
+        return cleaned
+    
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self.shards)
     
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
-        with self.lock:
-            total_requests = self.stats['hits'] + self.stats['misses']
-            hit_rate = (self.stats['hits'] / total_requests * 100) if total_requests > 0 else 0
-            
-            return {
-                'size': len(self.cache),
-                'max_size': self.max_size,
-                'hit_rate': round(hit_rate, 2),
-                'hits': self.stats['hits'],
-                'misses': self.stats['misses'],
-                'evictions': self.stats['evictions'],
-                'expired_cleanups': self.stats['expired_cleanups']
-            }
+        totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired_cleanups': 0, 'rejected': 0, 'stale_hits': 0}
+        size = 0
+        size_bytes = 0
+        for shard in self.shards:
+            with shard.lock:
+                for name in totals:
+                    totals[name] += shard.stats[name]
+                size += len(shard.entries)
+                size_bytes += shard.current_bytes
+        
+        total_requests = totals['hits'] + totals['misses']
+        hit_rate = (totals['hits'] / total_requests * 100) if total_requests > 0 else 0
+        
+        # Campos de topo: L1 (memória); 'l2': disco
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'size_bytes': size_bytes,
+            'max_bytes': self.max_bytes,
+            'shards': self.num_shards,
+            'hit_rate': round(hit_rate, 2),
+            **totals,
+            'l2': self.l2.get_stats() if self.l2 is not None else None
+        }
     
     def get_memory_usage(self) -> Dict[str, Any]:
-        """Retorna informações sobre uso de memória"""
-        with self.lock:
-            total_size = 0
-            for entry in self.cache.values():
-                try:
-                    size = len(json.dumps(entry.data, default=str))
-                    total_size += size
-                except:
-                    total_size += 1000  # Estimativa para dados não serializáveis
-            
-            return {
-                'estimated_size_bytes': total_size,
-                'estimated_size_mb': round(total_size / 1024 / 1024, 2),
-                'entry_count': len(self.cache)
-            }
+        """Retorna informações sobre uso de memória (totais mantidos na inserção/remoção)"""
+        total_size = 0
+        entry_count = 0
+        for shard in self.shards:
+            with shard.lock:
+                total_size += shard.current_bytes
+                entry_count += len(shard.entries)
+        
+        usage = {
+            'estimated_size_bytes': total_size,
+            'estimated_size_mb': round(total_size / 1024 / 1024, 2),
+            'entry_count': entry_count
+        }
+        if self.max_bytes:
+            usage['max_size_mb'] = round(self.max_bytes / 1024 / 1024, 2)
+            usage['usage_percent'] = round(total_size / self.max_bytes * 100, 2)
+        return usage
 
 class CachedScraper:
-    """Decorator para adicionar cache a métodos de scraping"""
+    """
+    Decorator para adicionar cache a métodos de scraping.
+    
+    - TTLs por plataforma (policies, escolhidas pelo atributo platform do scraper).
+    - Stale-while-revalidate: após o TTL, a entrada ainda é servida por stale_ttl
+      segundos enquanto é atualizada em segundo plano.
+    - Cache negativo: resultados vazios ou bloqueados ficam negative_ttl segundos
+      no cache para que links com falha não voltem a consumir proxies a cada chamada.
+    """
+    
+    # Parâmetros tratados como URL de produto na chave do cache
+    URL_PARAMS = ('url', 'product_url', 'short_url')
     
-    def __init__(self, cache_manager: CacheManager, ttl: float = 3600):
+    # Marcador de resultado negativo guardado no cache
+    NEGATIVE_MARKER = '__negative__'
+    
+    def __init__(self, cache_manager: CacheManager, ttl: float = 3600,
+                 policies: Optional[Dict[str, Dict[str, float]]] = None,
+                 stale_ttl: float = 0.0, negative_ttl: float = 300, refresh_workers: int = 4):
         self.cache_manager = cache_manager
         self.ttl = ttl
+        self.policies = policies or {}
+        self.default_policy = {'ttl': ttl, 'stale_ttl': stale_ttl, 'negative_ttl': negative_ttl}
+        self.refresh_workers = refresh_workers
+        self.refresh_executor: Optional[ThreadPoolExecutor] = None
+        self.refreshing = set()
+        # Chave -> instante até o qual não se tenta nova atualização (após uma falha)
+        self.refresh_backoff: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {
+            'hits': 0, 'misses': 0, 'stale_hits': 0, 'negative_hits': 0,
+            'refreshes': 0, 'refresh_failures': 0
+        })
+    
+    def _build_key(self, func, signature: inspect.Signature, args, kwargs) -> str:
+        """
+        Gera a chave a partir dos argumentos nomeados, ignorando a instância
+        (self) e usando a identidade canônica do produto no lugar da URL.
+        """
+        try:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+        except TypeError:
+            arguments = {'args': args[1:], 'kwargs': kwargs}
+        
+        arguments.pop('self', None)
+        arguments.pop('cls', None)
+        for name in self.URL_PARAMS:
+            if isinstance(arguments.get(name), str):
+                arguments[name] = canonical_product_key(arguments[name])
+        
+        return self.cache_manager._generate_key(func.__qualname__, **arguments)
+    
+    def _policy(self, args) -> Dict[str, float]:
+        """TTLs da plataforma do scraper (primeiro argumento) ou os padrões"""
+        platform = getattr(args[0], 'platform', None) if args else None
+        return {**self.default_policy, **self.policies.get(platform, {})}
+    
+    @staticmethod
+    def _is_negative(result: Any) -> bool:
+        """Resultado que não deve ser servido como produto válido por muito tempo"""
+        if result is None:
+            return True
+        return isinstance(result, dict) and bool(result.get('_blocked') or result.get('_fallback'))
+    
+    def _store(self, key: str, result: Any, policy: Dict[str, float]):
+        if self._is_negative(result):
+            self.cache_manager.set(key, {self.NEGATIVE_MARKER: True, 'result': copy.deepcopy(result)},
+                                   policy['negative_ttl'])
+        else:
+            self.cache_manager.set(key, copy.deepcopy(result), policy['ttl'], policy['stale_ttl'])
+    
+    def _record(self, name: str, stat: str):
+        with self.lock:
+            self.stats[name][stat] += 1
+    
+    def _refresh(self, key: str, func, args, kwargs, policy: Dict[str, float]):
+        """
+        Atualiza uma entrada obsoleta. Em caso de falha a entrada antiga não é regravada:
+        continua servível só até o fim da sua janela de stale original, e novas tentativas
+        esperam negative_ttl segundos.
+        """
+        name = func.__qualname__
+        failed = False
+        try:
+            result = func(*args, **kwargs)
+            if self._is_negative(result):
+                failed = True
+            else:
+                self._record(name, 'refreshes')
+                self._store(key, result, policy)
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar cache de {name} em segundo plano: {e}")
+            failed = True
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+                if failed:
+                    self.refresh_backoff[key] = time.time() + policy['negative_ttl']
+                else:
+                    self.refresh_backoff.pop(key, None)
+        if failed:
+            self._record(name, 'refresh_failures')
+    
+    def _schedule_refresh(self, key: str, func, args, kwargs, policy: Dict[str, float]):
+        """Agenda no máximo uma atualização em segundo plano por chave"""
+        with self.lock:
+            if key in self.refreshing:
+                return
+            backoff_until = self.refresh_backoff.get(key)
+            if backoff_until is not None:
+                if backoff_until > time.time():
+                    return
+                del self.refresh_backoff[key]
+            self.refreshing.add(key)
+            if self.refresh_executor is None:
+                self.refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers, thread_name_prefix='cache-refresh'
+                )
+            executor = self.refresh_executor
+        executor.submit(self._refresh, key, func, args, kwargs, policy)
     
     def __call__(self, func):
+        signature = inspect.signature(func)
+        name = func.__qualname__
+        
+        @wraps(func)
         def wrapper(*args, **kwargs):
             # Gerar chave baseada na função e argumentos
-            key = self.cache_manager._generate_key(func.__name__, *args, **kwargs)
+            key = self._build_key(func, signature, args, kwargs)
+            policy = self._policy(args)
             
-            # Tentar recuperar do cache
-            cached_result = self.cache_manager.get(key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit para {func.__name__}")
-                return cached_result
+            # Tentar recuperar do cache (aceitando entradas na janela de stale)
+            cached = self.cache_manager.get_entry(key, allow_stale=True)
+            if cached is not None:
+                data, stale = cached
+                if isinstance(data, dict) and data.get(self.NEGATIVE_MARKER):
+                    logger.debug(f"Cache negativo para {name}")
+                    self._record(name, 'negative_hits')
+                    return copy.deepcopy(data['result'])
+                
+                self._record(name, 'hits')
+                if stale:
+                    logger.debug(f"Cache obsoleto para {name}, atualizando em segundo plano")
+                    self._record(name, 'stale_hits')
+                    self._schedule_refresh(key, func, args, kwargs, policy)
+                else:
+                    logger.debug(f"Cache hit para {name}")
+                # Cópia: quem chama pode alterar o dicionário retornado
+                return copy.deepcopy(data)
             
             # Executar função e armazenar resultado
-            logger.debug(f"Cache miss para {func.__name__}")
+            logger.debug(f"Cache miss para {name}")
+            self._record(name, 'misses')
             result = func(*args, **kwargs)
-            
-            if result is not None:
-                self.cache_manager.set(key, result, self.ttl)
-            
+            self._store(key, result, policy)
+            with self.lock:
+                self.refresh_backoff.pop(key, None)
             return result
         
         return wrapper
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna hits/misses (hits incluem obsoletos, negativos à parte) e taxa de acerto por função"""
+        with self.lock:
+            result = {}
+            for name, stats in self.stats.items():
+                served = stats['hits'] + stats['negative_hits']
+                total = served + stats['misses']
+                result[name] = {
+                    **stats,
+                    'hit_rate': round(served / total * 100, 2) if total > 0 else 0
+                }
+            return result
+
+def _create_l2_cache() -> Optional[DiskCache]:
+    """Cria o cache em disco configurado (ou None se desabilitado/indisponível)"""
+    config = ScrapingConfig.CACHE_CONFIG
+    if not config['l2_enabled']:
+        return None
+    try:
+        return DiskCache(config['l2_path'], max_entries=config['l2_max_entries'])
+    except Exception as e:
+        logger.warning(f"Cache em disco indisponível, usando apenas memória: {e}")
+        return None
 
 # Instâncias globais
-cache_manager = CacheManager(max_size=1000, default_ttl=3600)
-cached_scraper = CachedScraper(cache_manager)
+cache_manager = CacheManager(
+    max_size=ScrapingConfig.CACHE_CONFIG['max_size'],
+    default_ttl=ScrapingConfig.CACHE_CONFIG['ttl'],
+    num_shards=16,
+    max_bytes=ScrapingConfig.CACHE_CONFIG['max_bytes'],
+    l2=_create_l2_cache()
+)
+cached_scraper = CachedScraper(
+    cache_manager,
+    ttl=ScrapingConfig.CACHE_CONFIG['ttl'],
+    policies=ScrapingConfig.CACHE_CONFIG['platform_policies'],
+    stale_ttl=ScrapingConfig.CACHE_CONFIG['stale_ttl'],
+    negative_ttl=ScrapingConfig.CACHE_CONFIG['negative_ttl']
+)
 
 # Função para limpeza automática de cache
-def start_cache_cleanup(interval: int = 300):
+def start_cache_cleanup(interval: int = 60):
     """Inicia limpeza automática do cache em background"""
     def cleanup_worker():
         while True:
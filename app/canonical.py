@@ -0,0 +1,78 @@
+# /app/canonical.py
+"""
+Identidade canônica de produtos a partir de URLs (MLB id / ASIN),
+usada para deduplicar requisições, chaves de cache e tarefas da fila.
+"""
+
+import re
+from typing import Optional
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+# Parâmetros de rastreamento/afiliado que não mudam o produto
+TRACKING_PARAMS = {
+    'tracking_id', 'c_id', 'c_uid', 'pdp_filters', 'searchvariation', 'position', 'search_layout',
+    'type', 'sid', 'wid', 'matt_tool', 'matt_word', 'forcein', 'reco_item_pos', 'reco_backend',
+    'ref', 'ref_', 'tag', 'linkcode', 'th', 'psc', 'smid', 'pf_rd_r', 'pf_rd_p', 'pd_rd_r',
+    'pd_rd_w', 'pd_rd_wg', 'content-id', 'crid', 'sprefix', 'qid', 'sr', 'keywords',
+    'mshops', 'mshopps', 'gclid', 'fbclid'
+}
+
+ML_ITEM_PATTERN = re.compile(r'MLB-?(\d+)', re.IGNORECASE)
+ML_CATALOG_PATTERN = re.compile(r'/p/MLB(\d+)', re.IGNORECASE)
+ASIN_PATTERN = re.compile(r'/(?:dp|gp/product|gp/aw/d|exec/obidos/ASIN)/([A-Z0-9]{10})', re.IGNORECASE)
+
+def canonicalize_url(url: str) -> str:
+    """Remove parâmetros de rastreamento, âncoras e normaliza host/caminho"""
+    url = (url or '').strip()
+    parsed = urlparse(url)
+    if not parsed.netloc:
+        return url
+
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ]
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse((
+        parsed.scheme.lower() or 'https',
+        parsed.netloc.lower(),
+        path,
+        '',
+        urlencode(sorted(query)),
+        ''
+    ))
+
+def extract_product_id(url: str) -> Optional[str]:
+    """Retorna o identificador do produto (MLB... ou ASIN) se estiver na URL"""
+    url = url or ''
+    url_lower = url.lower()
+
+    if 'mercadolivre.com' in url_lower or 'mercadolibre.com' in url_lower:
+        # Links curtos de afiliado não trazem o id (só após expandir)
+        if '/sec/' in url_lower or '/social/' in url_lower:
+            return None
+        catalog_match = ML_CATALOG_PATTERN.search(url)
+        if catalog_match:
+            return f"MLBP{catalog_match.group(1)}"
+        item_match = ML_ITEM_PATTERN.search(url)
+        if item_match:
+            return f"MLB{item_match.group(1)}"
+        return None
+
+    if 'amazon.com' in url_lower:
+        asin_match = ASIN_PATTERN.search(url)
+        if asin_match:
+            return asin_match.group(1).upper()
+
+    return None
+
+def canonical_product_key(url: str) -> str:
+    """
+    Chave canônica do produto: 'mercadolivre:MLB123', 'amazon:B0ABCDEFGH'
+    ou, quando o id não está na URL, a própria URL canônica.
+    """
+    product_id = extract_product_id(url)
+    if product_id:
+        platform = 'amazon' if 'amazon.com' in (url or '').lower() else 'mercadolivre'
+        return f"{platform}:{product_id}"
+    return f"url:{canonicalize_url(url)}"
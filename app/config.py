@@ -61,11 +61,113 @@ class ScrapingConfig:
         'timeout': 30
     }
     
+    # Configurações do pool de sessões HTTP (keep-alive por domínio/proxy)
+    SESSION_POOL_CONFIG = {
+        'pool_connections': int(os.getenv("SESSION_POOL_CONNECTIONS", "10")),
+        'pool_maxsize': int(os.getenv("SESSION_POOL_MAXSIZE", "20")),
+        'max_sessions': int(os.getenv("SESSION_POOL_MAX_SESSIONS", "32")),
+        'idle_timeout': float(os.getenv("SESSION_POOL_IDLE_TIMEOUT", "120"))  # segundos
+    }
+    
+    # Configurações do motor de requisições assíncronas (aiohttp)
+    ASYNC_FETCH_CONFIG = {
+        'max_per_domain': int(os.getenv("ASYNC_FETCH_MAX_PER_DOMAIN", "4")),
+        'max_connections': int(os.getenv("ASYNC_FETCH_MAX_CONNECTIONS", "100"))
+    }
+    
+    # Configurações de busca paginada
+    SEARCH_CONFIG = {
+        'max_concurrent_pages': int(os.getenv("SEARCH_MAX_CONCURRENT_PAGES", "3")),
+        # Prazo (segundos) de cada plataforma na busca em todas as plataformas
+        'platform_deadlines': {
+            'mercadolivre': float(os.getenv("SEARCH_DEADLINE_MERCADOLIVRE", "30")),
+            'amazon': float(os.getenv("SEARCH_DEADLINE_AMAZON", "75"))
+        },
+        'default_platform_deadline': float(os.getenv("SEARCH_DEADLINE_DEFAULT", "45")),
+        # O prazo conta do início da execução; este é o limite de espera na fila do pool compartilhado
+        'max_queue_wait': float(os.getenv("SEARCH_MAX_QUEUE_WAIT", "30"))
+    }
+    
+    # Configurações da fila de scraping (QueueManager)
+    QUEUE_CONFIG = {
+        'max_workers': int(os.getenv("QUEUE_MAX_WORKERS", "5")),  # plataformas sem limite próprio
+        # Workers por plataforma (bulkheads): Amazon lenta não toma os workers do ML
+        'platform_workers': {
+            'mercadolivre': int(os.getenv("QUEUE_WORKERS_MERCADOLIVRE", "4")),
+            'amazon': int(os.getenv("QUEUE_WORKERS_AMAZON", "2"))
+        },
+        # Máximo de retentativas agendadas por minuto (somando todas as tarefas)
+        'retry_budget_per_minute': int(os.getenv("QUEUE_RETRY_BUDGET_PER_MINUTE", "120")),
+        # Admissão: backlog máximo; a fração reservada só aceita prioridade alta
+        'capacity': int(os.getenv("QUEUE_CAPACITY", "5000")),
+        'priority_reserve': float(os.getenv("QUEUE_PRIORITY_RESERVE", "0.1")),
+        'max_batch_size': int(os.getenv("QUEUE_MAX_BATCH_SIZE", "500")),  # /queue/add-batch
+        # Retenção das tarefas finalizadas (por idade e por quantidade)
+        'task_retention_seconds': float(os.getenv("QUEUE_TASK_RETENTION_SECONDS", str(24 * 3600))),
+        'max_finished_tasks': int(os.getenv("QUEUE_MAX_FINISHED_TASKS", "5000")),
+        'task_retention_sweep_interval': float(os.getenv("QUEUE_TASK_RETENTION_SWEEP_INTERVAL", "60")),
+        # Journal em disco para não perder tarefas em deploy/crash
+        'journal_enabled': os.getenv("QUEUE_JOURNAL_ENABLED", "true").lower() == "true",
+        'journal_path': os.getenv("QUEUE_JOURNAL_PATH", "app/data/queue_journal.db"),
+        'journal_compact_interval': float(os.getenv("QUEUE_JOURNAL_COMPACT_INTERVAL", "600"))  # segundos
+    }
+    
+    # Envio para grupos do WhatsApp (schedulers): pool paralelo com ritmo por conta e por grupo
+    WHATSAPP_SEND_CONFIG = {
+        'max_workers': int(os.getenv("WHATSAPP_SEND_WORKERS", "4")),
+        'account_rate_per_minute': int(os.getenv("WHATSAPP_ACCOUNT_RATE_PER_MINUTE", "60")),
+        'account_burst': int(os.getenv("WHATSAPP_ACCOUNT_BURST", "10")),
+        'group_rate_per_minute': int(os.getenv("WHATSAPP_GROUP_RATE_PER_MINUTE", "6")),
+        'sync_timeout': float(os.getenv("WHATSAPP_SEND_SYNC_TIMEOUT", "300")),  # envio imediato (rota) espera no máximo
+        # Fila de clonagem: máximo liberado por ciclo e ritmo de liberação (catch-up)
+        'clone_batch_size': int(os.getenv("CLONE_QUEUE_BATCH_SIZE", "100")),
+        'clone_rate_per_minute': int(os.getenv("CLONE_QUEUE_RATE_PER_MINUTE", "12")),
+        'clone_burst': int(os.getenv("CLONE_QUEUE_BURST", "3")),
+        # Mensagens da fila no dispatcher ao mesmo tempo (o ritmo real é o da conta)
+        'clone_max_in_flight': int(os.getenv("CLONE_QUEUE_MAX_IN_FLIGHT", "3")),
+        # 'enviando' há mais que isso volta para 'pendente' (processo morreu no meio)
+        'clone_stale_claim_minutes': int(os.getenv("CLONE_QUEUE_STALE_CLAIM_MINUTES", "15"))
+    }
+    
+    # Eleição do processo que roda os schedulers (um só entre workers/réplicas)
+    # file: lock local (um host); supabase: lease entre hosts; off: todos rodam
+    SCHEDULER_LEADER_CONFIG = {
+        'mode': os.getenv("SCHEDULER_LEADER_MODE", "file").lower(),
+        'lock_path': os.getenv("SCHEDULER_LOCK_PATH", "app/data/scheduler.lock"),
+        'lease_name': os.getenv("SCHEDULER_LEASE_NAME", "schedulers"),
+        'lease_ttl': int(os.getenv("SCHEDULER_LEASE_TTL", "15")),  # segundos até outro assumir
+        'renew_interval': float(os.getenv("SCHEDULER_LEADER_RENEW_INTERVAL", "5")),
+        'retry_interval': float(os.getenv("SCHEDULER_LEADER_RETRY_INTERVAL", "2")),
+        # supabase: timeout das chamadas do lease e folga antes do TTL em que o líder para de agir
+        'renew_timeout': float(os.getenv("SCHEDULER_LEADER_RENEW_TIMEOUT", "5")),
+        'fence_margin': float(os.getenv("SCHEDULER_LEADER_FENCE_MARGIN", "3")),
+        # Workers que não são líder avisam mudanças de agendamento tocando este arquivo (mesmo host)
+        'wake_path': os.getenv("SCHEDULER_WAKE_PATH", "app/data/scheduler.wake"),
+        'wake_poll_interval': float(os.getenv("SCHEDULER_WAKE_POLL_INTERVAL", "1")),
+        # Reconciliação com o banco; entre hosts (supabase) é o único aviso, então é mais frequente
+        'reconcile_interval': int(os.getenv(
+            "SCHEDULER_RECONCILE_INTERVAL",
+            "30" if os.getenv("SCHEDULER_LEADER_MODE", "file").lower() == "supabase" else "300"
+        ))
+    }
+    
     # Configurações de cache
     CACHE_CONFIG = {
         'enabled': True,
         'ttl': 3600,  # 1 hora
-        'max_size': 1000
+        'max_size': 1000,
+        'max_bytes': int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),  # 64 MB
+        # Segundo nível em disco (SQLite), compartilhado entre workers
+        'l2_enabled': os.getenv("CACHE_L2_ENABLED", "true").lower() == "true",
+        'l2_path': os.getenv("CACHE_L2_PATH", "app/cache/scrape_cache.db"),
+        'l2_max_entries': int(os.getenv("CACHE_L2_MAX_ENTRIES", "50000")),
+        # Produtos: janela de stale-while-revalidate e cache negativo (falhas/bloqueios)
+        'stale_ttl': 0,
+        'negative_ttl': 300,
+        'platform_policies': {
+            'mercadolivre': {'ttl': 3600, 'stale_ttl': 6 * 3600, 'negative_ttl': 300},
+            'amazon': {'ttl': 900, 'stale_ttl': 3600, 'negative_ttl': 120}  # preços mudam mais rápido
+        }
     }
     
     # Configurações de plataformas (mantém o que você já tem)
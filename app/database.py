@@ -12,6 +12,21 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Ouvintes de mudanças de agendamento (o scheduler acorda sem consultar o banco)
+_ouvintes_agendamento = []
+
+def registrar_ouvinte_agendamento(callback):
+    """Registra callback(produto_id, agendamento_iso) chamado quando um agendamento muda (None = removido)."""
+    if callback not in _ouvintes_agendamento:
+        _ouvintes_agendamento.append(callback)
+
+def _notificar_agendamento(produto_id, agendamento_iso):
+    for callback in list(_ouvintes_agendamento):
+        try:
+            callback(produto_id, agendamento_iso)
+        except Exception as e:
+            print(f"Erro ao notificar mudança de agendamento: {e}")
+
 def salvar_promocao(produto_dados, final_message=None, agendamento_data=None):
     """Salva os dados de uma promoção no Supabase."""
     try:
@@ -44,8 +59,10 @@ def salvar_promocao(produto_dados, final_message=None, agendamento_data=None):
             "fonte": produto_dados.get("fonte") # Adicionado para a visão unificada
         }
 
-        supabase.table("promocoes").insert(data_to_insert).execute()
+        response = supabase.table("promocoes").insert(data_to_insert).execute()
         print("DEBUG: Dados salvos no Supabase com sucesso!")
+        if agendamento_data and response.data:
+            _notificar_agendamento(response.data[0].get('id'), agendamento_data)
         return True
 
     except Exception as e:
@@ -87,28 +104,59 @@ def listar_produtos_db(status_filter, ordem_order, limit=200):
         print(traceback.format_exc())
         return []
 
+def listar_agendamentos_db(page_size=1000):
+    """
+    Lista (id, agendamento) de todos os produtos agendados, paginando sem limite total.
+    Usado pelo scheduler: não traz as colunas pesadas (imagem, mensagem).
+    """
+    agendamentos = []
+    offset = 0
+    while True:
+        response = supabase.table("promocoes").select("id, agendamento") \
+            .not_.is_("agendamento", "null") \
+            .order("agendamento") \
+            .range(offset, offset + page_size - 1) \
+            .execute()
+        agendamentos.extend(response.data or [])
+        if not response.data or len(response.data) < page_size:
+            return agendamentos
+        offset += page_size
+
 def deletar_produto_db(produto_id):
     """Deleta um produto do Supabase pelo ID."""
-    return supabase.table("promocoes").delete().eq("id", produto_id).execute()
+    response = supabase.table("promocoes").delete().eq("id", produto_id).execute()
+    _notificar_agendamento(produto_id, None)
+    return response
 
 def agendar_produto_db(produto_id, agendamento_iso):
     """Atualiza o agendamento de um produto no Supabase."""
-    return supabase.table("promocoes").update({'agendamento': agendamento_iso}).eq("id", produto_id).execute()
+    response = supabase.table("promocoes").update({'agendamento': agendamento_iso}).eq("id", produto_id).execute()
+    _notificar_agendamento(produto_id, agendamento_iso)
+    return response
 
-def obter_produto_db(produto_id):
-    """Busca um produto específico no Supabase pelo ID."""
+def obter_produto_db(produto_id, propagar_erro=False):
+    """
+    Busca um produto específico no Supabase pelo ID.
+    Com propagar_erro=True a falha na consulta levanta a exceção em vez de
+    retornar None (o scheduler precisa distinguir erro de produto removido).
+    """
     try:
         response = supabase.table("promocoes").select("*").eq("id", produto_id).execute()
         if response.data and len(response.data) > 0:
             return response.data[0]
         return None
     except Exception as e:
+        if propagar_erro:
+            raise
         print(f"Erro ao buscar produto no Supabase: {e}")
         return None
 
 def atualizar_produto_db(produto_id, dados_atualizacao):
     """Atualiza dados específicos de um produto no Supabase."""
-    return supabase.table("promocoes").update(dados_atualizacao).eq("id", produto_id).execute()
+    response = supabase.table("promocoes").update(dados_atualizacao).eq("id", produto_id).execute()
+    if 'agendamento' in dados_atualizacao:
+        _notificar_agendamento(produto_id, dados_atualizacao['agendamento'])
+    return response
 
 def upload_imagem_whatsapp(base64_string, titulo_produto, bucket_name='imagens_melhoradas_tech'):
     """
@@ -544,6 +592,98 @@ def obter_proxima_mensagem_fila() -> dict:
         return None
 
 
+# Funções de SQL_FUNCOES_FILA_MENSAGENS.sql; desligadas se ainda não foram criadas no banco
+_funcoes_fila_disponiveis = True
+
+def _rpc_fila(funcao: str, parametros: dict):
+    """
+    Chama uma função SQL da fila. Retorna None se ela não existe no banco
+    (PGRST202), para que o chamador use o caminho antigo.
+    """
+    global _funcoes_fila_disponiveis
+    if not _funcoes_fila_disponiveis:
+        return None
+    try:
+        return supabase.rpc(funcao, parametros).execute()
+    except Exception as e:
+        if getattr(e, 'code', None) == 'PGRST202':
+            print(f"⚠️ Função {funcao} não encontrada; execute SQL_FUNCOES_FILA_MENSAGENS.sql")
+            _funcoes_fila_disponiveis = False
+            return None
+        raise
+
+
+def reivindicar_mensagens_vencidas_fila(limite: int = 100) -> list:
+    """
+    Reivindica de uma vez até `limite` mensagens pendentes já vencidas, marcando-as
+    como 'enviando'. Usa reivindicar_mensagens_fila (FOR UPDATE SKIP LOCKED, um
+    round trip, conta a tentativa); sem ela, faz SELECT + UPDATE condicional ao
+    status 'pendente' e as tentativas são contadas só nos erros.
+
+    Returns:
+        Mensagens reivindicadas, da mais antiga para a mais nova
+    """
+    try:
+        response = _rpc_fila("reivindicar_mensagens_fila", {"p_limite": limite})
+        if response is not None:
+            return sorted(response.data or [], key=lambda mensagem: mensagem.get('agendamento_envio') or '')
+
+        agora = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+        vencidas = supabase.table("fila_mensagens_clonadas")\
+            .select("id")\
+            .eq("status", "pendente")\
+            .lte("agendamento_envio", agora)\
+            .order("agendamento_envio", desc=False)\
+            .limit(limite)\
+            .execute()
+
+        ids = [mensagem['id'] for mensagem in (vencidas.data or [])]
+        if not ids:
+            return []
+
+        response = supabase.table("fila_mensagens_clonadas")\
+            .update({"status": "enviando", "atualizado_em": agora})\
+            .in_("id", ids)\
+            .eq("status", "pendente")\
+            .execute()
+
+        return sorted(response.data or [], key=lambda mensagem: mensagem.get('agendamento_envio') or '')
+
+    except Exception as e:
+        print(f"❌ Erro ao reivindicar mensagens vencidas: {e}")
+        return []
+
+
+def devolver_mensagens_travadas_fila(minutos: int = 15, ignorar_ids: list = None) -> int:
+    """
+    Devolve para 'pendente' mensagens presas em 'enviando' há mais de `minutos`
+    (processo reiniciado ou morto no meio do envio). `ignorar_ids`: envios ainda
+    em andamento neste processo.
+
+    Returns:
+        Quantidade de mensagens devolvidas
+    """
+    try:
+        agora = datetime.datetime.now(datetime.timezone.utc)
+        limite = (agora - datetime.timedelta(minutes=minutos)).isoformat()
+
+        query = supabase.table("fila_mensagens_clonadas")\
+            .update({"status": "pendente", "atualizado_em": agora.isoformat()})\
+            .eq("status", "enviando")\
+            .lt("atualizado_em", limite)
+
+        if ignorar_ids:
+            query = query.not_.in_("id", list(ignorar_ids))
+
+        response = query.execute()
+        return len(response.data or [])
+
+    except Exception as e:
+        print(f"❌ Erro ao devolver mensagens travadas: {e}")
+        return 0
+
+
 def atualizar_status_mensagem_fila(mensagem_id: int, status: str, erro: str = None) -> dict:
     """
     Atualiza o status de uma mensagem na fila.
@@ -566,6 +706,11 @@ def atualizar_status_mensagem_fila(mensagem_id: int, status: str, erro: str = No
             update_data["enviado_em"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
         if status == 'erro' and erro:
+            # Com as funções SQL a tentativa já foi contada na reivindicação
+            response = _rpc_fila("registrar_erro_mensagem_fila", {"p_id": mensagem_id, "p_erro": erro})
+            if response is not None:
+                return {"success": True, "data": response.data}
+
             update_data["erro_mensagem"] = erro
             # Incrementar tentativas
             mensagem = supabase.table("fila_mensagens_clonadas").select("tentativas").eq("id", mensagem_id).execute()
@@ -627,15 +772,31 @@ def obter_estatisticas_fila() -> dict:
 
         proximo_envio = proxima.data[0]['agendamento_envio'] if proxima.data else None
 
+        # Backlog: pendentes que já passaram do horário (atraso da mais antiga)
+        agora = datetime.datetime.now(datetime.timezone.utc)
+        vencidas = supabase.table("fila_mensagens_clonadas")\
+            .select("id", count="exact")\
+            .eq("status", "pendente")\
+            .lte("agendamento_envio", agora.isoformat())\
+            .execute()
+
+        atraso_backlog = 0
+        if proximo_envio:
+            mais_antiga = datetime.datetime.fromisoformat(proximo_envio.replace('Z', '+00:00'))
+            atraso_backlog = max(0, int((agora - mais_antiga).total_seconds()))
+
         return {
             "pendentes": pendentes.count if hasattr(pendentes, 'count') else len(pendentes.data or []),
             "enviadas": enviadas.count if hasattr(enviadas, 'count') else len(enviadas.data or []),
             "erros": erros.count if hasattr(erros, 'count') else len(erros.data or []),
-            "proximo_envio": proximo_envio
+            "proximo_envio": proximo_envio,
+            "vencidas": vencidas.count if hasattr(vencidas, 'count') else len(vencidas.data or []),
+            "atraso_backlog_segundos": atraso_backlog
         }
 
     except Exception as e:
         print(f"❌ Erro ao obter estatísticas: {e}")
-        return {"pendentes": 0, "enviadas": 0, "erros": 0, "proximo_envio": None}
+        return {"pendentes": 0, "enviadas": 0, "erros": 0, "proximo_envio": None,
+                "vencidas": 0, "atraso_backlog_segundos": 0}
 
 
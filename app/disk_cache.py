@@ -0,0 +1,171 @@
+# /app/disk_cache.py
+"""
+Segundo nível (L2) do cache: SQLite em modo WAL num diretório local,
+compartilhado entre os workers do Gunicorn e preservado entre reinícios.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """Cache chave/valor em SQLite com TTL e valores comprimidos (zlib)"""
+
+    def __init__(self, path: str, max_entries: int = 50000, compress_level: int = 6,
+                 busy_timeout: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.compress_level = compress_level
+        self.busy_timeout = busy_timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'errors': 0
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            if columns and 'fresh_until' not in columns:
+                # Arquivo de uma versão anterior sem janela de stale: é só cache, recria
+                conn.execute("DROP TABLE cache")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " fresh_until REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache(expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Uma conexão por thread (e por processo: conexões não sobrevivem a fork)"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str):
+        with self.lock:
+            self.stats[name] += 1
+
+    def _encode(self, data: Any) -> bytes:
+        return zlib.compress(json.dumps(data, default=str).encode('utf-8'), self.compress_level)
+
+    @staticmethod
+    def _decode(value: bytes) -> Any:
+        return json.loads(zlib.decompress(value).decode('utf-8'))
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Tuple[Any, float, float]]:
+        """
+        Retorna (valor, segundos até deixar de ser fresco, segundos até expirar) ou None.
+        Sem allow_stale, entradas fora do TTL (mesmo na janela de stale) contam como miss.
+        """
+        try:
+            now = time.time()
+            row = self._connection().execute(
+                "SELECT value, fresh_until, expires_at FROM cache WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row is None or (not allow_stale and row[1] <= now):
+                self._count('misses')
+                return None
+            data = self._decode(row[0])
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            logger.warning(f"Erro ao ler cache em disco: {e}")
+            self._count('errors')
+            return None
+
+        self._count('hits')
+        return data, row[1] - now, row[2] - now
+
+    def set(self, key: str, data: Any, ttl: float, stale_ttl: float = 0.0) -> bool:
+        """Grava o valor (write-through a partir do L1); fica legível como stale por mais stale_ttl"""
+        try:
+            now = time.time()
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, fresh_until, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(self._encode(data)), now, now + ttl, now + ttl + stale_ttl)
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Erro ao gravar cache em disco: {e}")
+            self._count('errors')
+            return False
+
+        self._count('writes')
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Remove uma chave"""
+        try:
+            cursor = self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao remover do cache em disco: {e}")
+            self._count('errors')
+            return False
+
+    def clear(self):
+        """Remove todas as chaves"""
+        try:
+            self._connection().execute("DELETE FROM cache")
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao limpar cache em disco: {e}")
+            self._count('errors')
+
+    def cleanup_expired(self) -> int:
+        """Remove itens expirados e, se passar de max_entries, os que expiram primeiro"""
+        try:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            overflow = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                removed += conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)",
+                    (overflow,)
+                ).rowcount
+            return removed
+        except sqlite3.Error as e:
+            logger.warning(f"Erro na limpeza do cache em disco: {e}")
+            self._count('errors')
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do L2 (contadores deste processo, tamanho do arquivo compartilhado)"""
+        with self.lock:
+            stats = dict(self.stats)
+        total_requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / total_requests * 100, 2) if total_requests > 0 else 0
+
+        try:
+            row = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache"
+            ).fetchone()
+            stats['size'] = row[0]
+            stats['size_bytes'] = row[1]
+        except sqlite3.Error:
+            stats['size'] = None
+            stats['size_bytes'] = None
+
+        stats['max_entries'] = self.max_entries
+        stats['path'] = self.path
+        return stats
@@ -0,0 +1,298 @@
+# /app/leader_election.py
+"""
+Eleição de líder para os schedulers: só um processo (worker do Gunicorn ou
+réplica) roda os pollers. Em um host basta um lock de arquivo; entre hosts,
+um lease no Supabase renovado por heartbeat.
+"""
+
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows (desenvolvimento local)
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+class FileLockBackend:
+    """
+    Lock exclusivo não bloqueante num arquivo local. O sistema operacional solta o
+    lock quando o processo morre, então outro worker assume na próxima tentativa.
+    """
+
+    mode = 'file'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd: Optional[int] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def try_acquire(self, owner: str) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+
+        # Dono atual gravado só para diagnóstico
+        os.ftruncate(fd, 0)
+        os.write(fd, owner.encode('utf-8'))
+        self.fd = fd
+        return True
+
+    def renew(self, owner: str) -> bool:
+        # Enquanto o descritor estiver aberto o lock é nosso
+        return self.fd is not None
+
+    def release(self, owner: str):
+        if self.fd is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        os.close(self.fd)
+        self.fd = None
+
+class SupabaseLeaseBackend:
+    """
+    Lease com expiração na tabela scheduler_lideranca (SQL_LIDERANCA_SCHEDULER.sql).
+    A função SQL só entrega o lease se ele for do mesmo dono ou já tiver expirado;
+    se o líder morrer, outro assume em até lease_ttl segundos. As chamadas usam um
+    cliente próprio com timeout curto, para uma renovação lenta não prender a eleição.
+    """
+
+    mode = 'supabase'
+
+    def __init__(self, name: str, lease_ttl: int, request_timeout: float = 5.0):
+        self.name = name
+        self.lease_ttl = lease_ttl
+        self.request_timeout = request_timeout
+        self.client = None
+
+    def _client(self):
+        if self.client is None:
+            from supabase import create_client, ClientOptions
+            from . import database
+
+            self.client = create_client(database.SUPABASE_URL, database.SUPABASE_KEY,
+                                        options=ClientOptions(postgrest_client_timeout=self.request_timeout))
+        return self.client
+
+    def try_acquire(self, owner: str) -> bool:
+        response = self._client().rpc('adquirir_lideranca_scheduler', {
+            'p_nome': self.name,
+            'p_dono': owner,
+            'p_ttl_segundos': self.lease_ttl
+        }).execute()
+        return response.data is True
+
+    def renew(self, owner: str) -> bool:
+        return self.try_acquire(owner)
+
+    def release(self, owner: str):
+        self._client().rpc('liberar_lideranca_scheduler', {
+            'p_nome': self.name,
+            'p_dono': owner
+        }).execute()
+
+class LeaderElector:
+    """
+    Tenta assumir a liderança a cada retry_interval segundos; o líder renova a
+    cada renew_interval. on_elected/on_demoted ligam e desligam os schedulers.
+
+    Com backend de lease (lease_ttl), um vigia rebaixa o líder localmente quando a
+    última renovação confirmada passa de lease_ttl - fence_margin, mesmo com a
+    chamada de renovação ainda pendurada: depois disso outro processo pode ter
+    assumido e este não pode continuar enviando.
+    """
+
+    def __init__(self, backend, retry_interval: float = 2.0, renew_interval: float = 5.0,
+                 fence_margin: float = 3.0):
+        self.backend = backend
+        self.lease_ttl = getattr(backend, 'lease_ttl', None)
+        self.fence_margin = fence_margin
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.retry_interval = retry_interval
+        self.renew_interval = renew_interval
+        self.on_elected: Optional[Callable[[], None]] = None
+        self.on_demoted: Optional[Callable[[], None]] = None
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self.last_check: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_renew: Optional[float] = None  # monotonic do início da última renovação confirmada
+        self.running = False
+        self.thread = None
+        self.watchdog = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        # Serializa posse/perda da liderança entre a thread de eleição e o vigia
+        self.transition_lock = threading.RLock()
+        self.stats = {
+            'elections': 0,
+            'demotions': 0,
+            'fenced': 0,
+            'errors': 0
+        }
+
+    def start(self, on_elected: Callable[[], None], on_demoted: Callable[[], None]):
+        """Inicia a eleição em background (a primeira tentativa é síncrona)"""
+        if self.running:
+            return
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.running = True
+        self.stop_event.clear()
+        self._check()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        if self.lease_ttl:
+            self.watchdog = threading.Thread(target=self._watch, daemon=True)
+            self.watchdog.start()
+
+    def stop(self):
+        """Para a eleição e entrega a liderança"""
+        self.running = False
+        self.stop_event.set()
+        for thread in (self.thread, self.watchdog):
+            if thread:
+                thread.join(timeout=5)
+        with self.transition_lock:
+            if self.is_leader:
+                self._demote()
+        try:
+            self.backend.release(self.owner)
+        except Exception as e:
+            logger.warning(f'Erro ao liberar liderança: {e}')
+
+    def _run(self):
+        while self.running:
+            interval = self.renew_interval if self.is_leader else self.retry_interval
+            if self.stop_event.wait(interval):
+                break
+            self._check()
+
+    def _lease_expiring(self, since: float) -> bool:
+        """True se um lease confirmado em since já pode ter passado para outro processo"""
+        return bool(self.lease_ttl) and time.monotonic() - since >= self.lease_ttl - self.fence_margin
+
+    def _watch(self):
+        """Vigia do lease: rebaixa o líder que não conseguiu renovar a tempo"""
+        while not self.stop_event.wait(0.5):
+            with self.transition_lock:
+                if self.is_leader and self.last_renew is not None and self._lease_expiring(self.last_renew):
+                    logger.warning(f'Lease não renovado a tempo; {self.owner} deixa de agir como líder')
+                    with self.lock:
+                        self.stats['fenced'] += 1
+                    self._demote()
+
+    def _check(self):
+        # O lease vale a partir de algum momento depois do início da chamada; contar do
+        # início é conservador (o vigia nunca acha que o lease dura mais do que dura)
+        started = time.monotonic()
+        try:
+            if self.is_leader:
+                held = self.backend.renew(self.owner)
+            else:
+                held = self.backend.try_acquire(self.owner)
+            self.last_error = None
+        except Exception as e:
+            # Sem conseguir confirmar o lease, o líder deixa de agir (outro pode assumir)
+            logger.warning(f'Erro na eleição de líder ({self.backend.mode}): {e}')
+            with self.lock:
+                self.stats['errors'] += 1
+            self.last_error = str(e)
+            held = False
+        self.last_check = time.time()
+
+        with self.transition_lock:
+            if held and self._lease_expiring(started):
+                # Resposta chegou tarde demais para valer; a próxima tentativa confirma de novo
+                logger.warning(f'Confirmação do lease demorou demais ({self.backend.mode}); ignorada')
+                held = False
+            if held:
+                self.last_renew = started
+            if held and not self.is_leader:
+                self._elect()
+            elif not held and self.is_leader:
+                self._demote()
+
+    def _elect(self):
+        self.is_leader = True
+        self.leader_since = time.time()
+        with self.lock:
+            self.stats['elections'] += 1
+        logger.info(f'👑 {self.owner} assumiu a liderança dos schedulers ({self.backend.mode})')
+        if self.on_elected:
+            self.on_elected()
+
+    def _demote(self):
+        self.is_leader = False
+        self.leader_since = None
+        with self.lock:
+            self.stats['demotions'] += 1
+        logger.warning(f'{self.owner} perdeu a liderança dos schedulers')
+        if self.on_demoted:
+            self.on_demoted()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Situação da liderança neste processo (para /scheduler/status)"""
+        with self.lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            'mode': self.backend.mode,
+            'owner': self.owner,
+            'is_leader': self.is_leader,
+            'leader_since': self.leader_since,
+            'last_check': self.last_check,
+            'lease_age': round(time.monotonic() - self.last_renew, 1) if self.is_leader and self.last_renew else None,
+            'last_error': self.last_error
+        }
+
+class _AlwaysLeader:
+    """Sem eleição (SCHEDULER_LEADER_MODE=off): todo processo roda os schedulers"""
+
+    mode = 'off'
+
+    def try_acquire(self, owner: str) -> bool:
+        return True
+
+    def renew(self, owner: str) -> bool:
+        return True
+
+    def release(self, owner: str):
+        pass
+
+def _create_elector() -> LeaderElector:
+    from .config import ScrapingConfig
+
+    config = ScrapingConfig.SCHEDULER_LEADER_CONFIG
+    if config['mode'] == 'supabase':
+        backend = SupabaseLeaseBackend(config['lease_name'], config['lease_ttl'], config['renew_timeout'])
+    elif config['mode'] == 'off':
+        backend = _AlwaysLeader()
+    else:
+        backend = FileLockBackend(config['lock_path'])
+    return LeaderElector(backend, config['retry_interval'], config['renew_interval'], config['fence_margin'])
+
+# Instância global
+scheduler_leader = _create_elector()
@@ -10,6 +10,8 @@ from typing import Optional, Dict
 import json
 from bs4 import BeautifulSoup
 import re
+from .singleflight import single_flight
+from .canonical import canonical_product_key, canonicalize_url
 
 logger = logging.getLogger(__name__)
 
@@ -285,6 +287,7 @@ class MercadoLivreAffiliate:
 ml_affiliate = MercadoLivreAffiliate()
 
 
+@single_flight('expandir_link_curto_ml', lambda short_url: canonicalize_url(short_url))
 def expandir_link_curto_ml(short_url: str) -> Optional[str]:
     """
     Expande um link curto de afiliado do Mercado Livre (https://mercadolivre.com/sec/...)
@@ -403,6 +406,7 @@ def expandir_link_curto_ml(short_url: str) -> Optional[str]:
         return None
 
 
+@single_flight('gerar_link_afiliado_ml', lambda product_url: canonical_product_key(product_url))
 def gerar_link_afiliado_ml(product_url: str) -> Optional[str]:
     """
     Função auxiliar para gerar link de afiliado do Mercado Livre.
@@ -0,0 +1,171 @@
+# /app/pagination.py
+"""
+Planejador de buscas paginadas: busca as páginas em paralelo dentro do
+orçamento do rate limiter, preserva a ordem dos resultados e para na
+primeira página vazia.
+"""
+
+import asyncio
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional
+from .anti_bot import RateLimiter
+from .config import ScrapingConfig
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PageResult:
+    """Resultado da busca de uma página"""
+    page: int
+    items: List[Any] = field(default_factory=list)
+    latency: float = 0.0
+    error: Optional[str] = None
+    skipped: bool = False
+
+class PaginatedFetchPlanner:
+    """Busca páginas 1..max_pages em paralelo mantendo a ordem"""
+
+    def __init__(self, max_workers: int = 3, rate_limiter: Optional[RateLimiter] = None,
+                 domain: Optional[str] = None, platform: Optional[str] = None):
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.domain = domain
+        self.platform = platform
+
+    def fetch(self, fetch_page: Callable[[int], List[Any]], max_pages: int) -> List[PageResult]:
+        """
+        Executa fetch_page(page) para cada página e retorna os resultados em ordem.
+        Uma página vazia ou com erro encerra a busca: as páginas seguintes são descartadas
+        (e as que ainda não começaram nem chegam a ser buscadas).
+        """
+        if max_pages <= 0:
+            return []
+
+        lock = threading.Lock()
+        state = {'last_page': max_pages}
+
+        def run(page: int) -> PageResult:
+            with lock:
+                if page > state['last_page']:
+                    return PageResult(page=page, skipped=True)
+            if self.rate_limiter and self.domain:
+                self.rate_limiter.wait_if_needed(self.domain)
+
+            start_time = time.time()
+            try:
+                items = fetch_page(page) or []
+                result = PageResult(page=page, items=items, latency=time.time() - start_time)
+            except Exception as e:
+                result = PageResult(page=page, latency=time.time() - start_time, error=str(e))
+
+            if not result.items:
+                with lock:
+                    state['last_page'] = min(state['last_page'], page)
+            self._report(result)
+            return result
+
+        workers = max(1, min(self.max_workers, max_pages))
+        if workers == 1:
+            results = [run(page) for page in range(1, max_pages + 1)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(run, range(1, max_pages + 1)))
+
+        return self._ordered(results)
+
+    async def fetch_async(self, fetch_page: Callable[[int], Awaitable[List[Any]]], max_pages: int) -> List[PageResult]:
+        """Versão assíncrona de fetch (fetch_page é uma corrotina)"""
+        if max_pages <= 0:
+            return []
+
+        semaphore = asyncio.Semaphore(max(1, self.max_workers))
+        state = {'last_page': max_pages}
+
+        async def run(page: int) -> PageResult:
+            async with semaphore:
+                if page > state['last_page']:
+                    return PageResult(page=page, skipped=True)
+                if self.rate_limiter and self.domain:
+                    await self.rate_limiter.acquire(self.domain)
+
+                start_time = time.time()
+                try:
+                    items = await fetch_page(page) or []
+                    result = PageResult(page=page, items=items, latency=time.time() - start_time)
+                except Exception as e:
+                    result = PageResult(page=page, latency=time.time() - start_time, error=str(e))
+
+                if not result.items:
+                    state['last_page'] = min(state['last_page'], page)
+                self._report(result)
+                return result
+
+        results = await asyncio.gather(*(run(page) for page in range(1, max_pages + 1)))
+        return self._ordered(results)
+
+    @staticmethod
+    def _ordered(results: List[PageResult]) -> List[PageResult]:
+        """Mantém as páginas em ordem até a primeira vazia, com erro ou não buscada"""
+        ordered = []
+        for result in sorted(results, key=lambda r: r.page):
+            if result.skipped:
+                break
+            ordered.append(result)
+            if not result.items:
+                break
+        return ordered
+
+    def _report(self, result: PageResult):
+        """Registra a latência da página no log e nas métricas"""
+        if result.error:
+            logger.warning(f"Página {result.page} falhou em {result.latency:.2f}s: {result.error}")
+        else:
+            logger.info(f"Página {result.page}: {len(result.items)} itens em {result.latency:.2f}s")
+
+        if self.platform:
+            from .monitoring import metrics_collector
+            metrics_collector.record_scraping_metric(
+                platform=self.platform,
+                operation='search_page',
+                success=result.error is None,
+                response_time=result.latency,
+                products_found=len(result.items),
+                error_message=result.error
+            )
+
+def _default_planner(rate_limiter: Optional[RateLimiter], domain: Optional[str],
+                     platform: Optional[str]) -> PaginatedFetchPlanner:
+    return PaginatedFetchPlanner(
+        max_workers=ScrapingConfig.SEARCH_CONFIG['max_concurrent_pages'],
+        rate_limiter=rate_limiter,
+        domain=domain,
+        platform=platform
+    )
+
+def flatten_pages(results: List[PageResult]) -> List[Any]:
+    """Concatena os itens das páginas na ordem"""
+    items = []
+    for result in results:
+        items.extend(result.items)
+    return items
+
+def fetch_pages(fetch_page: Callable[[int], List[Any]], max_pages: int,
+                rate_limiter: Optional[RateLimiter] = None, domain: Optional[str] = None,
+                platform: Optional[str] = None) -> List[Any]:
+    """Atalho: busca as páginas com o planejador padrão e retorna os itens em ordem"""
+    planner = _default_planner(rate_limiter, domain, platform)
+    return flatten_pages(planner.fetch(fetch_page, max_pages))
+
+async def fetch_pages_async(fetch_page: Callable[[int], Awaitable[List[Any]]], max_pages: int,
+                            rate_limiter: Optional[RateLimiter] = None, domain: Optional[str] = None,
+                            platform: Optional[str] = None) -> List[Any]:
+    """Versão assíncrona de fetch_pages"""
+    planner = _default_planner(rate_limiter, domain, platform)
+    return flatten_pages(await planner.fetch_async(fetch_page, max_pages))
+
+# Rate limiter compartilhado pelas buscas que não passam pelo AntiBotManager
+search_rate_limiter = RateLimiter(max_requests_per_minute=30)
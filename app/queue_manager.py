@@ -4,15 +4,23 @@ Sistema de fila para processamento assíncrono de produtos
 """
 
 import asyncio
+import heapq
+import math
+import itertools
 import json
+import random
 import time
 import uuid
-from typing import Dict, List, Optional, Callable, Any
-from dataclasses import dataclass, asdict
+from collections import Counter, OrderedDict, deque
+from typing import Dict, List, Optional, Callable, Any, Tuple
+from dataclasses import dataclass, asdict, fields
 from enum import Enum
 import logging
 from concurrent.futures import ThreadPoolExecutor
 import threading
+from .config import ScrapingConfig
+from .canonical import canonical_product_key
+from .task_journal import TaskJournal
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +31,12 @@ class TaskStatus(Enum):
     FAILED = "failed"
     RETRYING = "retrying"
 
-@dataclass
+# Estados finais: a tarefa entra na política de retenção
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED)
+
+@dataclass(slots=True)
 class ScrapingTask:
-    """Representa uma tarefa de scraping"""
+    """Representa uma tarefa de scraping (__slots__: milhares ficam em memória)"""
     id: str
     url: str
     affiliate_link: str
@@ -39,25 +50,247 @@ class ScrapingTask:
     error_message: Optional[str] = None
     result: Optional[Dict] = None
     priority: int = 0  # 0 = normal, 1 = high, -1 = low
+    result_consumed: bool = False  # resultado já entregue e descartado
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        data = asdict(self)
+        data['status'] = self.status.value
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'ScrapingTask':
-        return cls(**data)
+        return cls(**{**data, 'status': TaskStatus(data['status'])})
 
-class QueueManager:
-    """Gerenciador de fila para processamento de produtos"""
+class PlatformLane:
+    """Fila, workers e estatísticas de uma plataforma (bulkhead)"""
     
-    def __init__(self, max_workers: int = 5):
+    def __init__(self, platform: str, max_workers: int):
+        self.platform = platform
         self.max_workers = max_workers
-        self.tasks: Dict[str, ScrapingTask] = {}
-        self.queue: List[str] = []  # IDs de tarefas ordenados por prioridade
+        # Heap de (-prioridade, ordem de chegada, ID): maior prioridade primeiro, FIFO no empate
+        self.queue: List[Tuple[int, int, str]] = []
+        self.queued: Dict[str, float] = {}  # ID -> momento em que entrou na fila (canceladas saem daqui)
         self.processing: set = set()  # IDs de tarefas sendo processadas
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"fila-{platform}")
+        self.stats = {
+            'dispatched': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0
+        }
+    
+    def can_dispatch(self) -> bool:
+        return bool(self.queued) and len(self.processing) < self.max_workers
+    
+    def push(self, task: 'ScrapingTask', sequence: int):
+        heapq.heappush(self.queue, (-task.priority, sequence, task.id))
+        self.queued[task.id] = time.time()
+    
+    def pop(self) -> Optional[str]:
+        while self.queue:
+            # Pega a tarefa de maior prioridade (ignorando as canceladas)
+            _, _, task_id = heapq.heappop(self.queue)
+            enqueued_at = self.queued.pop(task_id, None)
+            if enqueued_at is not None:
+                wait = time.time() - enqueued_at
+                self.stats['dispatched'] += 1
+                self.stats['total_wait'] += wait
+                self.stats['max_wait'] = max(self.stats['max_wait'], wait)
+                self.processing.add(task_id)
+                return task_id
+        return None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        dispatched = self.stats['dispatched']
+        return {
+            'max_workers': self.max_workers,
+            'queue_depth': len(self.queued),
+            'processing': len(self.processing),
+            'dispatched': dispatched,
+            'avg_wait_seconds': round(self.stats['total_wait'] / dispatched, 3) if dispatched else 0,
+            'max_wait_seconds': round(self.stats['max_wait'], 3)
+        }
+
+class QueueFullError(Exception):
+    """Fila acima da capacidade: o chamador deve tentar de novo após retry_after segundos"""
+    
+    def __init__(self, retry_after: int, backlog: int, capacity: int):
+        super().__init__(f"Fila cheia ({backlog}/{capacity} tarefas), tente novamente em {retry_after}s")
+        self.retry_after = retry_after
+        self.backlog = backlog
+        self.capacity = capacity
+
+class AdmissionController:
+    """
+    Controle de admissão da fila: tarefas normais/baixas entram até capacity * (1 - priority_reserve);
+    a reserva fica para prioridade alta. O Retry-After é estimado pela vazão observada.
+    Deve ser usado sob o lock do QueueManager.
+    """
+    
+    def __init__(self, capacity: int = 5000, priority_reserve: float = 0.1, window: float = 60,
+                 default_retry_after: int = 30, max_retry_after: int = 600):
+        self.capacity = capacity
+        self.priority_reserve = priority_reserve
+        self.window = window
+        self.default_retry_after = default_retry_after
+        self.max_retry_after = max_retry_after
+        self.drained = deque()  # momentos em que tarefas saíram do backlog (janela deslizante)
+        self.stats = {
+            'admitted': 0,
+            'rejected': 0,
+            'rejected_high_priority': 0
+        }
+    
+    def limit_for(self, priority: int) -> int:
+        if priority > 0:
+            return self.capacity
+        return int(self.capacity * (1 - self.priority_reserve))
+    
+    def record_drain(self):
+        self.drained.append(time.time())
+    
+    def drain_rate(self) -> float:
+        """Tarefas finalizadas por segundo na última janela"""
+        now = time.time()
+        while self.drained and self.drained[0] < now - self.window:
+            self.drained.popleft()
+        if not self.drained:
+            return 0.0
+        elapsed = max(now - self.drained[0], 1.0)
+        return len(self.drained) / elapsed
+    
+    def admit(self, backlog: int, priority: int, count: int = 1):
+        """Registra a admissão ou levanta QueueFullError com o Retry-After estimado"""
+        limit = self.limit_for(priority)
+        if backlog + count <= limit:
+            self.stats['admitted'] += count
+            return
+        
+        self.stats['rejected'] += count
+        if priority > 0:
+            self.stats['rejected_high_priority'] += count
+        
+        # Tempo para a fila escoar o excedente na vazão atual
+        rate = self.drain_rate()
+        excess = backlog + count - limit
+        retry_after = math.ceil(excess / rate) if rate > 0 else self.default_retry_after
+        raise QueueFullError(max(1, min(retry_after, self.max_retry_after)), backlog, limit)
+    
+    def get_stats(self, backlog: int) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'capacity': self.capacity,
+            'normal_limit': self.limit_for(0),
+            'backlog': backlog,
+            'utilization_percent': round(backlog / self.capacity * 100, 2) if self.capacity else 0,
+            'drain_rate_per_second': round(self.drain_rate(), 3)
+        }
+
+class RetryScheduler:
+    """
+    Agenda as retentativas numa única thread (heap de prazos) em vez de um
+    threading.Timer por retry. Aplica jitter ao backoff e um orçamento global
+    de retentativas por minuto (token bucket) para não amplificar ondas de bloqueio.
+    """
+    
+    def __init__(self, callback: Callable[[str], None], budget_per_minute: int = 120,
+                 max_delay: float = 60):
+        self.callback = callback
+        self.max_delay = max_delay
+        self.capacity = float(budget_per_minute)
+        self.tokens = float(budget_per_minute)
+        self.refill_rate = budget_per_minute / 60.0
+        self.last_refill = time.monotonic()
+        self.heap: List[Tuple[float, int, str]] = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self._thread = None
+        self.stats = {
+            'scheduled': 0,
+            'fired': 0,
+            'budget_exhausted': 0
+        }
+    
+    def backoff(self, attempt: int) -> float:
+        """Backoff exponencial com jitter: metade fixa, metade aleatória"""
+        delay = min(self.max_delay, 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def schedule(self, task_id: str, delay: float) -> bool:
+        """Agenda a retentativa; False se o orçamento global estiver esgotado"""
+        with self.condition:
+            if not self._take_token():
+                self.stats['budget_exhausted'] += 1
+                return False
+            heapq.heappush(self.heap, (time.monotonic() + delay, next(self.sequence), task_id))
+            self.stats['scheduled'] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='fila-retry', daemon=True)
+                self._thread.start()
+            self.condition.notify()
+        return True
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.heap or self.heap[0][0] > time.monotonic():
+                    timeout = self.heap[0][0] - time.monotonic() if self.heap else None
+                    self.condition.wait(timeout)
+                _, _, task_id = heapq.heappop(self.heap)
+                self.stats['fired'] += 1
+            try:
+                self.callback(task_id)
+            except Exception as e:
+                logger.error(f"Erro ao reagendar tarefa {task_id}: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self.condition:
+            return {
+                **self.stats,
+                'waiting': len(self.heap),
+                'budget_available': int(min(self.capacity, self.tokens))
+            }
+
+class QueueManager:
+    """
+    Gerenciador de fila para processamento de produtos. Cada plataforma tem sua
+    fila e seu pool de workers (bulkhead), e o despachante alterna entre elas.
+    """
+    
+    def __init__(self, max_workers: int = 5, journal: Optional[TaskJournal] = None,
+                 platform_workers: Optional[Dict[str, int]] = None, retry_budget_per_minute: int = 120,
+                 retention_seconds: float = 24 * 3600, max_finished_tasks: int = 5000,
+                 admission: Optional[AdmissionController] = None, retention_sweep_interval: float = 60):
+        self.max_workers = max_workers  # workers de plataformas sem limite próprio
+        self.platform_workers = platform_workers or {}
+        self.tasks: Dict[str, ScrapingTask] = {}
+        # Retenção: tarefas finalizadas em ordem de conclusão, descartadas por idade e quantidade
+        self.retention_seconds = retention_seconds
+        self.max_finished_tasks = max_finished_tasks
+        # A retenção por idade também roda com a fila ociosa (despachante acorda neste intervalo)
+        self.retention_sweep_interval = retention_sweep_interval
+        self.finished: "OrderedDict[str, float]" = OrderedDict()
+        self.status_counts: Counter = Counter()
+        # Chave canônica do produto -> tarefa ainda não finalizada (deduplicação do lote)
+        self.active_keys: Dict[str, str] = {}
+        self.admission = admission or AdmissionController()
+        self.lanes: Dict[str, PlatformLane] = {}
+        self.lane_order: List[str] = []  # ordem de rodízio entre plataformas
+        self.next_lane = 0
+        self.sequence = itertools.count()
+        self.lock = threading.RLock()
+        # Acorda o despachante quando chega tarefa ou um worker fica livre
+        self.condition = threading.Condition(self.lock)
         self.callbacks: Dict[str, Callable] = {}
+        self.retry_scheduler = RetryScheduler(self._retry_task, budget_per_minute=retry_budget_per_minute)
         self.running = False
         self._worker_thread = None
         
@@ -68,6 +301,102 @@ class QueueManager:
             'failed_tasks': 0,
             'retry_tasks': 0
         }
+        
+        # Journal durável: recupera tarefas de execuções anteriores e registra as transições
+        self.journal = journal
+        if self.journal:
+            self.journal.start(self._restore_tasks)
+    
+    def _set_status(self, task: ScrapingTask, status: TaskStatus):
+        """Muda o status mantendo os contadores por status e a fila de retenção"""
+        with self.lock:
+            self.status_counts[task.status] -= 1
+            self.status_counts[status] += 1
+            task.status = status
+            if status in FINISHED_STATUSES:
+                self._release_key(task)
+                self.admission.record_drain()
+                task.completed_at = task.completed_at or time.time()
+                self.finished[task.id] = task.completed_at
+                self.finished.move_to_end(task.id)
+                self._enforce_retention()
+    
+    def _register_key(self, task: ScrapingTask):
+        self.active_keys[canonical_product_key(task.url)] = task.id
+    
+    def _release_key(self, task: ScrapingTask):
+        key = canonical_product_key(task.url)
+        if self.active_keys.get(key) == task.id:
+            del self.active_keys[key]
+    
+    def _backlog(self) -> int:
+        """Tarefas aguardando execução (na fila ou no backoff de retry)"""
+        return self.status_counts[TaskStatus.PENDING] + self.status_counts[TaskStatus.RETRYING]
+    
+    def _enforce_retention(self):
+        """Descarta as tarefas finalizadas mais antigas (deve ser chamada com lock)"""
+        cutoff_time = time.time() - self.retention_seconds
+        removed = 0
+        while self.finished:
+            task_id, completed_at = next(iter(self.finished.items()))
+            if len(self.finished) <= self.max_finished_tasks and completed_at >= cutoff_time:
+                break
+            self.finished.popitem(last=False)
+            self._forget_task(task_id)
+            removed += 1
+        return removed
+    
+    def _forget_task(self, task_id: str):
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self.status_counts[task.status] -= 1
+            self._release_key(task)
+    
+    def get_task_data(self, task_id: str, consume: bool = False) -> Optional[Dict]:
+        """
+        Retorna a tarefa como dicionário. Com consume=True, se já concluída, descarta o
+        resultado depois de entregá-lo (a tarefa continua consultável, sem o dado pesado).
+        """
+        with self.lock:
+            self._enforce_retention()
+            task = self.tasks.get(task_id)
+            if not task:
+                return None
+            data = task.to_dict()
+            if consume and task.status == TaskStatus.COMPLETED and task.result is not None:
+                task.result = None
+                task.result_consumed = True
+            return data
+    
+    def _journal_task(self, task: ScrapingTask):
+        """Registra o estado atual da tarefa no journal (sem o resultado)"""
+        if not self.journal:
+            return
+        snapshot = {f.name: getattr(task, f.name) for f in fields(task) if f.name != 'result'}
+        snapshot['status'] = task.status.value
+        self.journal.record(snapshot)
+    
+    def _restore_tasks(self, snapshots: List[Dict]):
+        """Devolve para a fila as tarefas recuperadas do journal"""
+        names = {f.name for f in fields(ScrapingTask)}
+        restored = 0
+        with self.lock:
+            for snapshot in snapshots:
+                if snapshot.get('id') in self.tasks:
+                    continue
+                data = {key: value for key, value in snapshot.items() if key in names}
+                data.update(status=TaskStatus.PENDING, started_at=None, result=None)
+                task = ScrapingTask(**data)
+                self.tasks[task.id] = task
+                self.status_counts[TaskStatus.PENDING] += 1
+                self._register_key(task)
+                self._insert_into_queue(task.id)
+                self.stats['total_tasks'] += 1
+                restored += 1
+        
+        if restored:
+            logger.info(f"{restored} tarefas restauradas do journal")
+            self.start_processing()
     
     def register_callback(self, event: str, callback: Callable):
         """Registra callback para eventos"""
@@ -83,7 +412,7 @@ class QueueManager:
     
     def add_task(self, url: str, affiliate_link: str, platform: str, 
                  priority: int = 0, max_retries: int = 3) -> str:
-        """Adiciona nova tarefa à fila"""
+        """Adiciona nova tarefa à fila (levanta QueueFullError se a fila estiver cheia)"""
         task_id = str(uuid.uuid4())
         
         task = ScrapingTask(
@@ -98,9 +427,13 @@ class QueueManager:
         )
         
         with self.lock:
+            self.admission.admit(self._backlog(), priority)
             self.tasks[task_id] = task
+            self.status_counts[TaskStatus.PENDING] += 1
+            self._register_key(task)
             self._insert_into_queue(task_id)
             self.stats['total_tasks'] += 1
+        self._journal_task(task)
         
         logger.info(f"Tarefa {task_id} adicionada à fila (prioridade: {priority})")
         self._trigger_callback('task_added', task)
@@ -111,20 +444,73 @@ class QueueManager:
         
         return task_id
     
-    def _insert_into_queue(self, task_id: str):
-        """Insere tarefa na fila mantendo ordem de prioridade"""
-        task = self.tasks[task_id]
+    def add_tasks(self, items: List[Dict[str, Any]], max_retries: int = 3) -> List[Dict[str, Any]]:
+        """
+        Adiciona várias tarefas numa única aquisição do lock. Cada item traz url, platform,
+        affiliate_link e priority. Produtos já pendentes/em processamento (mesma chave
+        canônica) não são duplicados. Retorna, por item, o status: 'queued',
+        'duplicate' (com o task_id existente) ou 'rejected' (fila cheia, com retry_after).
+        """
+        now = time.time()
+        results = []
+        added = []
+        with self.lock:
+            for item in items:
+                key = canonical_product_key(item['url'])
+                existing_id = self.active_keys.get(key)
+                if existing_id:
+                    results.append({'url': item['url'], 'status': 'duplicate', 'task_id': existing_id})
+                    continue
+                
+                priority = item.get('priority', 0)
+                try:
+                    self.admission.admit(self._backlog(), priority)
+                except QueueFullError as e:
+                    results.append({'url': item['url'], 'status': 'rejected', 'retry_after': e.retry_after})
+                    continue
+                
+                task = ScrapingTask(
+                    id=str(uuid.uuid4()),
+                    url=item['url'],
+                    affiliate_link=item.get('affiliate_link', ''),
+                    platform=item['platform'],
+                    status=TaskStatus.PENDING,
+                    created_at=now,
+                    max_retries=max_retries,
+                    priority=priority
+                )
+                self.tasks[task.id] = task
+                self.status_counts[TaskStatus.PENDING] += 1
+                self.active_keys[key] = task.id
+                self._insert_into_queue(task.id)
+                self.stats['total_tasks'] += 1
+                added.append(task)
+                results.append({'url': item['url'], 'status': 'queued', 'task_id': task.id})
         
-        # Inserir na posição correta baseada na prioridade
-        insert_pos = 0
-        for i, queued_id in enumerate(self.queue):
-            queued_task = self.tasks[queued_id]
-            if task.priority > queued_task.priority:
-                insert_pos = i
-                break
-            insert_pos = i + 1
+        for task in added:
+            self._journal_task(task)
+            self._trigger_callback('task_added', task)
+        logger.info(f"Lote: {len(added)} de {len(items)} tarefas adicionadas à fila")
+        
+        if added and not self.running:
+            self.start_processing()
         
-        self.queue.insert(insert_pos, task_id)
+        return results
+    
+    def _lane(self, platform: str) -> PlatformLane:
+        """Fila da plataforma, criada na primeira tarefa (deve ser chamada com lock)"""
+        lane = self.lanes.get(platform)
+        if lane is None:
+            lane = PlatformLane(platform, self.platform_workers.get(platform, self.max_workers))
+            self.lanes[platform] = lane
+            self.lane_order.append(platform)
+        return lane
+    
+    def _insert_into_queue(self, task_id: str):
+        """Insere tarefa na fila da plataforma mantendo ordem de prioridade (deve ser chamada com lock)"""
+        task = self.tasks[task_id]
+        self._lane(task.platform).push(task, next(self.sequence))
+        self.condition.notify()
     
     def get_task(self, task_id: str) -> Optional[ScrapingTask]:
         """Retorna tarefa por ID"""
@@ -137,13 +523,19 @@ class QueueManager:
     def get_queue_status(self) -> Dict:
         """Retorna status da fila"""
         with self.lock:
+            self._enforce_retention()
             return {
                 'total_tasks': len(self.tasks),
-                'pending_tasks': len(self.queue),
-                'processing_tasks': len(self.processing),
-                'completed_tasks': len([t for t in self.tasks.values() if t.status == TaskStatus.COMPLETED]),
-                'failed_tasks': len([t for t in self.tasks.values() if t.status == TaskStatus.FAILED]),
-                'stats': self.stats.copy()
+                'pending_tasks': sum(len(lane.queued) for lane in self.lanes.values()),
+                'processing_tasks': sum(len(lane.processing) for lane in self.lanes.values()),
+                'completed_tasks': self.status_counts[TaskStatus.COMPLETED],
+                'failed_tasks': self.status_counts[TaskStatus.FAILED],
+                'retrying_tasks': self.status_counts[TaskStatus.RETRYING],
+                'stats': self.stats.copy(),
+                'platforms': {name: lane.get_stats() for name, lane in self.lanes.items()},
+                'retries': self.retry_scheduler.get_stats(),
+                'admission': self.admission.get_stats(self._backlog()),
+                'journal': self.journal.get_stats() if self.journal else None
             }
     
     def start_processing(self):
@@ -158,30 +550,34 @@ class QueueManager:
     
     def stop_processing(self):
         """Para processamento da fila"""
-        self.running = False
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
         if self._worker_thread:
             self._worker_thread.join(timeout=5)
         logger.info("Processamento da fila parado")
     
     def _process_queue(self):
-        """Processa tarefas da fila em paralelo usando ThreadPoolExecutor"""
+        """Processa tarefas da fila em paralelo, cada plataforma no seu pool de threads"""
         while self.running:
             try:
                 # Pegar múltiplas tarefas se houver workers disponíveis
                 tasks_to_process = []
-                with self.lock:
-                    available_workers = self.max_workers - len(self.processing)
-                    for _ in range(min(available_workers, len(self.queue))):
+                with self.condition:
+                    # Dorme até chegar tarefa ou um worker ficar livre numa plataforma com fila
+                    while self.running and not any(lane.can_dispatch() for lane in self.lanes.values()):
+                        if not self.condition.wait(self.retention_sweep_interval):
+                            self._enforce_retention()
+                    
+                    task_id = self._get_next_task_internal()
+                    while task_id:
+                        tasks_to_process.append(task_id)
                         task_id = self._get_next_task_internal()
-                        if task_id:
-                            tasks_to_process.append(task_id)
 
-                if tasks_to_process:
-                    # Submeter tarefas ao pool de threads
-                    for task_id in tasks_to_process:
-                        self.executor.submit(self._process_task, task_id)
-                else:
-                    time.sleep(0.5)  # Aguarda se não há tarefas
+                # Submeter tarefas ao pool da plataforma
+                for task_id in tasks_to_process:
+                    lane = self.lanes[self.tasks[task_id].platform]
+                    lane.executor.submit(self._process_task, task_id)
             except Exception as e:
                 logger.error(f"Erro no processamento da fila: {e}")
                 time.sleep(5)
@@ -192,14 +588,20 @@ class QueueManager:
             return self._get_next_task_internal()
 
     def _get_next_task_internal(self) -> Optional[str]:
-        """Versão interna sem lock (deve ser chamada dentro de contexto com lock)"""
-        if not self.queue:
-            return None
-
-        # Pega a primeira tarefa da fila
-        task_id = self.queue.pop(0)
-        self.processing.add(task_id)
-        return task_id
+        """
+        Versão interna sem lock (deve ser chamada dentro de contexto com lock).
+        Rodízio entre as plataformas com fila e workers livres: uma tarefa por vez de cada.
+        """
+        count = len(self.lane_order)
+        for offset in range(count):
+            index = (self.next_lane + offset) % count
+            lane = self.lanes[self.lane_order[index]]
+            if lane.can_dispatch():
+                task_id = lane.pop()
+                if task_id:
+                    self.next_lane = (index + 1) % count
+                    return task_id
+        return None
     
     def _process_task(self, task_id: str):
         """Processa uma tarefa específica"""
@@ -209,8 +611,9 @@ class QueueManager:
         
         try:
             # Atualizar status
-            task.status = TaskStatus.PROCESSING
+            self._set_status(task, TaskStatus.PROCESSING)
             task.started_at = time.time()
+            self._journal_task(task)
             
             logger.info(f"Processando tarefa {task_id}: {task.url}")
             self._trigger_callback('task_started', task)
@@ -220,10 +623,11 @@ class QueueManager:
             
             if result:
                 # Sucesso
-                task.status = TaskStatus.COMPLETED
                 task.completed_at = time.time()
                 task.result = result
+                self._set_status(task, TaskStatus.COMPLETED)
                 self.stats['completed_tasks'] += 1
+                self._journal_task(task)
                 
                 logger.info(f"Tarefa {task_id} concluída com sucesso")
                 self._trigger_callback('task_completed', task, result)
@@ -237,8 +641,9 @@ class QueueManager:
             self._handle_task_failure(task)
         
         finally:
-            with self.lock:
-                self.processing.discard(task_id)
+            with self.condition:
+                self.lanes[task.platform].processing.discard(task_id)
+                self.condition.notify()
     
     def _execute_scraping(self, task: ScrapingTask) -> Optional[Dict]:
         """Executa o scraping da tarefa"""
@@ -257,33 +662,39 @@ class QueueManager:
         
         if task.retry_count < task.max_retries:
             # Retry
-            task.status = TaskStatus.RETRYING
+            self._set_status(task, TaskStatus.RETRYING)
             task.error_message = f"Tentativa {task.retry_count} falhou"
             
-            # Reagendar com delay exponencial
-            delay = min(60, 2 ** task.retry_count)
-            threading.Timer(delay, self._retry_task, [task.id]).start()
+            # Reagendar com delay exponencial (com jitter), se o orçamento global permitir
+            delay = self.retry_scheduler.backoff(task.retry_count)
+            if self.retry_scheduler.schedule(task.id, delay):
+                self.stats['retry_tasks'] += 1
+                self._journal_task(task)
+                logger.info(f"Tarefa {task.id} será retentada em {delay:.1f}s (tentativa {task.retry_count})")
+                self._trigger_callback('task_retrying', task)
+                return
             
-            self.stats['retry_tasks'] += 1
-            logger.info(f"Tarefa {task.id} será retentada em {delay}s (tentativa {task.retry_count})")
-            self._trigger_callback('task_retrying', task)
-        else:
-            # Falha definitiva
-            task.status = TaskStatus.FAILED
-            task.completed_at = time.time()
-            self.stats['failed_tasks'] += 1
-            
-            logger.error(f"Tarefa {task.id} falhou definitivamente após {task.retry_count} tentativas")
-            self._trigger_callback('task_failed', task)
+            task.error_message = f"Tentativa {task.retry_count} falhou (orçamento de retentativas esgotado)"
+        
+        # Falha definitiva
+        task.completed_at = time.time()
+        self._set_status(task, TaskStatus.FAILED)
+        self.stats['failed_tasks'] += 1
+        self._journal_task(task)
+        
+        logger.error(f"Tarefa {task.id} falhou definitivamente após {task.retry_count} tentativas")
+        self._trigger_callback('task_failed', task)
     
     def _retry_task(self, task_id: str):
         """Reagenda tarefa para retry"""
         with self.lock:
-            if task_id in self.tasks:
-                task = self.tasks[task_id]
-                task.status = TaskStatus.PENDING
+            task = self.tasks.get(task_id)
+            # Tarefa cancelada durante o backoff não volta para a fila
+            if task and task.status == TaskStatus.RETRYING:
+                self._set_status(task, TaskStatus.PENDING)
                 task.started_at = None
                 self._insert_into_queue(task_id)
+                self._journal_task(task)
     
     def cancel_task(self, task_id: str) -> bool:
         """Cancela uma tarefa"""
@@ -291,9 +702,13 @@ class QueueManager:
             if task_id in self.tasks:
                 task = self.tasks[task_id]
                 if task.status in [TaskStatus.PENDING, TaskStatus.RETRYING]:
-                    task.status = TaskStatus.FAILED
                     task.error_message = "Cancelada pelo usuário"
-                    self.queue = [tid for tid in self.queue if tid != task_id]
+                    self._set_status(task, TaskStatus.FAILED)
+                    # Remoção preguiçosa: o item fica no heap e é descartado ao sair
+                    lane = self.lanes.get(task.platform)
+                    if lane:
+                        lane.queued.pop(task_id, None)
+                    self._journal_task(task)
                     return True
         return False
     
@@ -302,17 +717,41 @@ class QueueManager:
         cutoff_time = time.time() - (older_than_hours * 3600)
         
         with self.lock:
-            to_remove = []
-            for task_id, task in self.tasks.items():
-                if (task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED] and 
-                    task.completed_at and task.completed_at < cutoff_time):
-                    to_remove.append(task_id)
+            # finished está em ordem de conclusão: para na primeira mais recente que o corte
+            removed = 0
+            while self.finished:
+                task_id, completed_at = next(iter(self.finished.items()))
+                if completed_at >= cutoff_time:
+                    break
+                self.finished.popitem(last=False)
+                self._forget_task(task_id)
+                removed += 1
             
-            for task_id in to_remove:
-                del self.tasks[task_id]
-            
-            logger.info(f"Removidas {len(to_remove)} tarefas antigas")
-            return len(to_remove)
+            logger.info(f"Removidas {removed} tarefas antigas")
+            return removed
+
+def _create_journal() -> Optional[TaskJournal]:
+    """Cria o journal configurado (ou None se desabilitado/indisponível)"""
+    config = ScrapingConfig.QUEUE_CONFIG
+    if not config['journal_enabled']:
+        return None
+    try:
+        return TaskJournal(config['journal_path'], compact_interval=config['journal_compact_interval'])
+    except Exception as e:
+        logger.warning(f"Journal da fila indisponível, tarefas ficam só em memória: {e}")
+        return None
 
 # Instância global do gerenciador de fila
-queue_manager = QueueManager()
+queue_manager = QueueManager(
+    max_workers=ScrapingConfig.QUEUE_CONFIG['max_workers'],
+    journal=_create_journal(),
+    platform_workers=ScrapingConfig.QUEUE_CONFIG['platform_workers'],
+    retry_budget_per_minute=ScrapingConfig.QUEUE_CONFIG['retry_budget_per_minute'],
+    retention_seconds=ScrapingConfig.QUEUE_CONFIG['task_retention_seconds'],
+    max_finished_tasks=ScrapingConfig.QUEUE_CONFIG['max_finished_tasks'],
+    retention_sweep_interval=ScrapingConfig.QUEUE_CONFIG['task_retention_sweep_interval'],
+    admission=AdmissionController(
+        capacity=ScrapingConfig.QUEUE_CONFIG['capacity'],
+        priority_reserve=ScrapingConfig.QUEUE_CONFIG['priority_reserve']
+    )
+)
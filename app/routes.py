@@ -1,11 +1,14 @@
 # app/routes.py
 
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
 from functools import wraps
 import datetime
 import pytz
 import time
+import threading
+import json
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode # Importação adicionada para manipulação de URL
 import os
 import re
@@ -21,10 +24,11 @@ from . import amazon_scraping # Importa o módulo da Amazon
 
 # Importa o novo sistema unificado
 from .scraper_factory import ScraperFactory
-from .queue_manager import queue_manager
+from .queue_manager import queue_manager, QueueFullError
 from .monitoring import metrics_collector, health_checker, alert_manager
 from .cache_manager import cache_manager
 from .validators import product_validator
+from .config import ScrapingConfig
 
 # Importa funções de afiliados do Mercado Livre
 from .ml_affiliate import expandir_link_curto_ml
@@ -1111,102 +1115,253 @@ def scrape_unified():
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+# Pool dedicado às buscas por plataforma (uma busca lenta não segura as demais)
+search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='busca')
+# Espera na fila do pool (compartilhado entre requisições): sob carga é ela que cresce
+search_pool_stats = {'started': 0, 'total_queue_wait': 0.0, 'max_queue_wait': 0.0, 'queue_timeouts': 0}
+search_pool_lock = threading.Lock()
+
+def _registrar_espera_busca(queue_wait):
+    with search_pool_lock:
+        search_pool_stats['started'] += 1
+        search_pool_stats['total_queue_wait'] += queue_wait
+        search_pool_stats['max_queue_wait'] = max(search_pool_stats['max_queue_wait'], queue_wait)
+
+def get_search_pool_stats():
+    """Espera média/máxima das buscas na fila do pool (para /monitoring/stats)"""
+    with search_pool_lock:
+        stats = dict(search_pool_stats)
+    stats['avg_queue_wait'] = round(stats['total_queue_wait'] / stats['started'], 3) if stats['started'] else 0.0
+    stats['total_queue_wait'] = round(stats['total_queue_wait'], 3)
+    stats['max_queue_wait'] = round(stats['max_queue_wait'], 3)
+    stats['max_workers'] = search_executor._max_workers
+    return stats
+
+def _buscar_na_plataforma(platform_name, query, max_pages):
+    """Executa a busca em uma plataforma e registra as métricas"""
+    scraper = ScraperFactory.create_scraper(platform_name)
+    if not scraper:
+        raise ValueError(f'Plataforma {platform_name} não suportada')
+
+    start_time = time.time()
+    try:
+        platform_products = scraper.scrape_search(query, max_pages)
+    except Exception as e:
+        metrics_collector.record_scraping_metric(
+            platform=platform_name,
+            operation='search',
+            success=False,
+            response_time=time.time() - start_time,
+            error_message=str(e)
+        )
+        raise
+    response_time = time.time() - start_time
+
+    # ⭐ Aplica o ID de afiliado na URL dos resultados
+    if platform_name.lower() == 'mercadolivre':
+        for p in platform_products:
+            p['link'] = aplicar_afiliado_ml(p['link'])
+
+    # Registrar métricas
+    metrics_collector.record_scraping_metric(
+        platform=platform_name,
+        operation='search',
+        success=True,
+        response_time=response_time,
+        products_found=len(platform_products)
+    )
+    return platform_products, response_time
+
+def _buscar_em_todas_plataformas(query, max_pages):
+    """
+    Dispara a busca em todas as plataformas em paralelo e gera um resultado
+    por plataforma assim que ele fica pronto (ou quando o prazo dela estoura).
+    O prazo de cada plataforma conta a partir do início da execução, não da
+    submissão: com o pool ocupado por outras requisições a busca espera na fila
+    (até max_queue_wait) sem ser dada como estourada antes de rodar.
+    """
+    deadlines = ScrapingConfig.SEARCH_CONFIG['platform_deadlines']
+    default_deadline = ScrapingConfig.SEARCH_CONFIG['default_platform_deadline']
+    max_queue_wait = ScrapingConfig.SEARCH_CONFIG['max_queue_wait']
+    submitted_at = time.time()
+    started = {}  # plataforma -> momento em que a busca começou a rodar
+
+    def executar(platform_name):
+        started[platform_name] = time.time()
+        _registrar_espera_busca(started[platform_name] - submitted_at)
+        return _buscar_na_plataforma(platform_name, query, max_pages)
+
+    pending = {}
+    for platform_name in ScraperFactory.get_available_platforms():
+        future = search_executor.submit(executar, platform_name)
+        pending[future] = platform_name
+
+    def prazo(platform_name):
+        if platform_name in started:
+            return started[platform_name] + deadlines.get(platform_name, default_deadline)
+        return submitted_at + max_queue_wait
+
+    try:
+        while pending:
+            next_deadline = min(prazo(name) for name in pending.values())
+            timeout = max(0, next_deadline - time.time())
+            if any(name not in started for name in pending.values()):
+                timeout = min(timeout, 0.25)  # reavalia o prazo de quem começar a rodar
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                platform_name = pending.pop(future)
+                try:
+                    platform_products, response_time = future.result()
+                    yield {
+                        'platform': platform_name,
+                        'success': True,
+                        'products': platform_products,
+                        'total': len(platform_products),
+                        'response_time': round(response_time, 2)
+                    }
+                except Exception as e:
+                    yield {'platform': platform_name, 'success': False, 'error': str(e)}
+
+            # Plataformas que estouraram o prazo são reportadas como falha. A que nem começou
+            # sai da fila do pool com cancel(); a que já está rodando termina sozinha
+            now = time.time()
+            for future, platform_name in list(pending.items()):
+                if now < prazo(platform_name):
+                    continue
+                if platform_name not in started:
+                    if not future.cancel():
+                        continue  # começou a rodar agora: passa a valer o prazo da plataforma
+                    with search_pool_lock:
+                        search_pool_stats['queue_timeouts'] += 1
+                    error = 'Busca não iniciou: pool de buscas ocupado'
+                else:
+                    error = 'Prazo da busca excedido'
+                pending.pop(future)
+                metrics_collector.record_scraping_metric(
+                    platform=platform_name,
+                    operation='search',
+                    success=False,
+                    response_time=now - started.get(platform_name, submitted_at),
+                    error_message=error
+                )
+                yield {'platform': platform_name, 'success': False, 'error': error, 'timeout': True}
+    finally:
+        # Cliente desconectou no meio do stream: buscas que nem começaram saem da fila
+        for future in pending:
+            future.cancel()
+
+def _stream_busca(query, max_pages, stream_format):
+    """Gera a resposta da busca em streaming (NDJSON ou Server-Sent Events)"""
+    def formatar(event, payload):
+        if stream_format == 'sse':
+            return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        return json.dumps({'event': event, **payload}, ensure_ascii=False) + '\n'
+
+    def gerar():
+        total = 0
+        falhas = {}
+        for resultado in _buscar_em_todas_plataformas(query, max_pages):
+            if resultado['success']:
+                total += resultado['total']
+                yield formatar('platform', resultado)
+            else:
+                falhas[resultado['platform']] = resultado['error']
+                yield formatar('platform_error', resultado)
+        yield formatar('done', {'success': True, 'total': total, 'errors': falhas})
+
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    return Response(stream_with_context(gerar()), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @main_bp.route('/scrape/search', methods=['POST'])
 def search_unified():
-    """Endpoint unificado para busca em qualquer plataforma"""
+    """
+    Endpoint unificado para busca em qualquer plataforma.
+    Com platform='todas' as plataformas são buscadas em paralelo; use
+    stream='ndjson' ou stream='sse' para receber cada plataforma assim que terminar.
+    """
     try:
         data = request.get_json()
         query = data.get('query', '').strip()
         platform = data.get('platform', 'todas')
         max_pages = data.get('max_pages', 2)
+        stream_format = (data.get('stream') or request.args.get('stream') or '').lower()
         
         if not query:
             return jsonify({'error': 'Query é obrigatória'}), 400
         
         products = []
+        errors = {}
         
         if platform == 'todas':
-            # Buscar em todas as plataformas
-            available_platforms = ScraperFactory.get_available_platforms()
-            for platform_name in available_platforms:
-                try:
-                    scraper = ScraperFactory.create_scraper(platform_name)
-                    if scraper:
-                        start_time = time.time()
-                        platform_products = scraper.scrape_search(query, max_pages)
-                        response_time = time.time() - start_time
-                        
-                        # ⭐ Aplica o ID de afiliado na URL dos resultados
-                        if platform_name.lower() == 'mercadolivre':
-                             for p in platform_products:
-                                 p['link'] = aplicar_afiliado_ml(p['link'])
-                        
-                        # Registrar métricas
-                        metrics_collector.record_scraping_metric(
-                            platform=platform_name,
-                            operation='search',
-                            success=True,
-                            response_time=response_time,
-                            products_found=len(platform_products)
-                        )
-                        
-                        products.extend(platform_products)
-                        
-                except Exception as e:
-                    metrics_collector.record_scraping_metric(
-                        platform=platform_name,
-                        operation='search',
-                        success=False,
-                        response_time=0,
-                        error_message=str(e)
-                    )
+            if stream_format in ('ndjson', 'sse'):
+                return _stream_busca(query, max_pages, stream_format)
+
+            # Buscar em todas as plataformas em paralelo (ordem das plataformas preservada)
+            resultados = {r['platform']: r for r in _buscar_em_todas_plataformas(query, max_pages)}
+            for platform_name in ScraperFactory.get_available_platforms():
+                resultado = resultados.get(platform_name)
+                if not resultado:
                     continue
+                if resultado['success']:
+                    products.extend(resultado['products'])
+                else:
+                    errors[platform_name] = resultado['error']
         else:
             # Buscar em plataforma específica
             scraper = ScraperFactory.create_scraper(platform)
             if not scraper:
                 return jsonify({'error': f'Plataforma {platform} não suportada'}), 400
             
-            start_time = time.time()
-            products = scraper.scrape_search(query, max_pages)
-            response_time = time.time() - start_time
-
-            # ⭐ Aplica o ID de afiliado na URL dos resultados
-            if platform.lower() == 'mercadolivre':
-                for p in products:
-                    p['link'] = aplicar_afiliado_ml(p['link'])
-            
-            # Registrar métricas
-            metrics_collector.record_scraping_metric(
-                platform=platform,
-                operation='search',
-                success=True,
-                response_time=response_time,
-                products_found=len(products)
-            )
+            products, _ = _buscar_na_plataforma(platform, query, max_pages)
         
         return jsonify({
             'success': True,
             'products': products,
             'total': len(products),
-            'platform': platform
+            'platform': platform,
+            'errors': errors
         })
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+def _parse_priority(value):
+    """Prioridade da fila como int (ausente = 0); None se não for numérica"""
+    if value is None or value == '':
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _parse_text(value):
+    """Campo de texto do corpo já sem espaços (ausente = ''); None se não for string"""
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        return None
+    return value.strip()
+
 @main_bp.route('/queue/add', methods=['POST'])
 def add_to_queue():
     """Adiciona produto à fila de processamento"""
     try:
         data = request.get_json()
-        url = data.get('url', '').strip()
-        affiliate_link = data.get('affiliate_link', '').strip()
-        priority = data.get('priority', 0)
+        url = _parse_text(data.get('url'))
+        affiliate_link = _parse_text(data.get('affiliate_link'))
+        priority = _parse_priority(data.get('priority'))
+        
+        if url is None or affiliate_link is None:
+            return jsonify({'error': 'url e affiliate_link devem ser texto'}), 400
         
         if not url:
             return jsonify({'error': 'URL é obrigatória'}), 400
         
+        if priority is None:
+            return jsonify({'error': 'priority deve ser um número inteiro'}), 400
+        
         # Detectar plataforma
         platform = ScraperFactory.detect_platform_from_url(url)
         if not platform:
@@ -1222,6 +1377,85 @@ def add_to_queue():
             'message': 'Produto adicionado à fila'
         })
         
+    except QueueFullError as e:
+        response = jsonify({'success': False, 'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@main_bp.route('/queue/add-batch', methods=['POST'])
+def add_batch_to_queue():
+    """
+    Adiciona vários produtos à fila numa única chamada.
+    Corpo: {"items": [{"url": ..., "affiliate_link": ..., "priority": ...}, ...]}
+    (itens também podem ser só a URL). Produtos já na fila não são duplicados.
+    """
+    try:
+        data = request.get_json() or {}
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'items deve ser uma lista não vazia'}), 400
+        
+        max_batch_size = ScrapingConfig.QUEUE_CONFIG['max_batch_size']
+        if len(items) > max_batch_size:
+            return jsonify({'error': f'Máximo de {max_batch_size} itens por lote'}), 400
+        
+        # Validar e detectar a plataforma de todos os itens antes de tocar na fila
+        results = [None] * len(items)
+        valid = []
+        positions = []
+        for index, item in enumerate(items):
+            if isinstance(item, str):
+                item = {'url': item}
+            if not isinstance(item, dict):
+                results[index] = {'url': None, 'status': 'invalid', 'error': 'Item deve ser um objeto ou uma URL'}
+                continue
+            
+            url = _parse_text(item.get('url'))
+            affiliate_link = _parse_text(item.get('affiliate_link'))
+            if url is None or affiliate_link is None:
+                results[index] = {'url': item.get('url'), 'status': 'invalid',
+                                  'error': 'url e affiliate_link devem ser texto'}
+                continue
+            if not url:
+                results[index] = {'url': url, 'status': 'invalid', 'error': 'URL é obrigatória'}
+                continue
+            
+            platform = ScraperFactory.detect_platform_from_url(url)
+            if not platform:
+                results[index] = {'url': url, 'status': 'invalid', 'error': 'Plataforma não suportada'}
+                continue
+            
+            priority = _parse_priority(item.get('priority'))
+            if priority is None:
+                results[index] = {'url': url, 'status': 'invalid', 'error': 'priority deve ser um número inteiro'}
+                continue
+            
+            valid.append({
+                'url': url,
+                'affiliate_link': affiliate_link,
+                'platform': platform,
+                'priority': priority
+            })
+            positions.append(index)
+        
+        for index, item, result in zip(positions, valid, queue_manager.add_tasks(valid)):
+            results[index] = {**result, 'platform': item['platform']}
+        
+        summary = {status: sum(1 for r in results if r['status'] == status)
+                   for status in ('queued', 'duplicate', 'rejected', 'invalid')}
+        response = jsonify({'success': summary['queued'] > 0 or summary['duplicate'] > 0,
+                            'summary': summary, 'results': results})
+        
+        # Fila cheia: informa quando tentar de novo os itens recusados
+        retry_after = max((r['retry_after'] for r in results if r['status'] == 'rejected'), default=None)
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(retry_after)
+            if summary['rejected'] == len(valid):
+                return response, 429
+        return response
+        
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -1236,13 +1470,17 @@ def queue_status():
 
 @main_bp.route('/queue/task/<task_id>', methods=['GET'])
 def get_task_status(task_id):
-    """Retorna status de uma tarefa específica"""
+    """
+    Retorna status de uma tarefa específica. Com ?consume=1 o resultado é
+    descartado da memória depois desta resposta (GET repetido não o perde).
+    """
     try:
-        task = queue_manager.get_task(task_id)
+        consume = request.args.get('consume', '').lower() in ('1', 'true')
+        task = queue_manager.get_task_data(task_id, consume=consume)
         if not task:
             return jsonify({'error': 'Tarefa não encontrada'}), 404
         
-        return jsonify({'success': True, 'task': task.to_dict()})
+        return jsonify({'success': True, 'task': task})
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -1262,7 +1500,16 @@ def cancel_task(task_id):
 def get_monitoring_stats():
     """Retorna estatísticas de monitoramento"""
     try:
+        from .anti_bot import session_pool
+        from .singleflight import get_single_flight_stats
         stats = metrics_collector.get_stats_summary()
+        stats['session_pools'] = session_pool.get_stats()
+        stats['rate_limits'] = {
+            platform: scraper.anti_bot.rate_limiter.get_stats()
+            for platform, scraper in ScraperFactory.get_shared_scrapers().items()
+        }
+        stats['single_flight'] = get_single_flight_stats()
+        stats['search_pool'] = get_search_pool_stats()
         return jsonify({'success': True, 'stats': stats})
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
@@ -1298,11 +1545,13 @@ def get_platform_stats(platform):
 def get_cache_stats():
     """Retorna estatísticas do cache"""
     try:
+        from .cache_manager import cached_scraper
         stats = cache_manager.get_stats()
         memory_usage = cache_manager.get_memory_usage()
         return jsonify({
             'success': True,
             'cache_stats': stats,
+            'scraper_cache': cached_scraper.get_stats(),
             'memory_usage': memory_usage
         })
     except Exception as e:
@@ -1649,16 +1898,31 @@ def scheduler_status():
     """Retorna status do scheduler de mensagens"""
     try:
         from .scheduler import message_scheduler
+        from .send_dispatcher import send_dispatcher
+        from .leader_election import scheduler_leader
 
         return jsonify({
             'success': True,
             'running': message_scheduler.running,
             'check_interval': message_scheduler.check_interval,
-            'whatsapp_url': message_scheduler.whatsapp_url
+            'whatsapp_url': message_scheduler.whatsapp_url,
+            **message_scheduler.get_status(),
+            'envios': send_dispatcher.get_stats(),
+            'lideranca': scheduler_leader.get_status()
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@main_bp.route('/scheduler/envios/<job_id>', methods=['GET'])
+def scheduler_envio_status(job_id):
+    """Retorna o andamento de um envio para grupos (por grupo)"""
+    from .send_dispatcher import send_dispatcher
+
+    envio = send_dispatcher.get_job(job_id)
+    if not envio:
+        return jsonify({'success': False, 'error': 'Envio não encontrado'}), 404
+    return jsonify({'success': True, 'envio': envio})
+
 @main_bp.route('/configurar-grupos-auto', methods=['POST'])
 def configurar_grupos_auto():
     """Configura quais grupos recebem mensagens agendadas automaticamente"""
@@ -2141,6 +2405,9 @@ def estatisticas_fila_route():
             except:
                 pass
 
+        from .scheduler import clone_queue_scheduler
+        stats['drenagem'] = clone_queue_scheduler.get_status()
+
         return jsonify({'success': True, **stats})
 
     except Exception as e:
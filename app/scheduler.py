@@ -4,6 +4,7 @@ Sistema de agendamento automático de mensagens do WhatsApp.
 Processa produtos agendados e envia para os grupos configurados.
 """
 
+import heapq
 import logging
 import sys
 import time
@@ -14,6 +15,9 @@ import requests
 import os
 from typing import List, Dict, Optional
 
+from .config import ScrapingConfig
+from .send_dispatcher import send_dispatcher
+
 # Configurar logging para UTF-8 (fix para emojis no Windows)
 logger = logging.getLogger(__name__)
 
@@ -31,22 +35,55 @@ except (AttributeError, Exception):
     logger.addHandler(handler)
 
 class MessageScheduler:
-    """Classe para gerenciar agendamento e envio automático de mensagens"""
+    """
+    Classe para gerenciar agendamento e envio automático de mensagens.
+
+    Mantém em memória um heap (horário, id) dos produtos agendados e dorme até o
+    próximo vencimento. Mudanças feitas por este processo chegam via
+    database.registrar_ouvinte_agendamento; nos workers que não são líder o aviso
+    vira um toque no arquivo wake_path, que o líder observa. A reconciliação
+    periódica com o banco cobre outros hosts e alterações direto no Supabase.
+    """
 
     def __init__(self):
+        leader_config = ScrapingConfig.SCHEDULER_LEADER_CONFIG
         self.running = False
         self.thread = None
-        self.check_interval = 30  # Verificar a cada 30 segundos
+        self.reconcile_interval = leader_config['reconcile_interval']
+        self.wake_path = leader_config['wake_path']
+        self.wake_poll_interval = leader_config['wake_poll_interval']
+        self.wake_mtime = None
+        self.check_interval = self.reconcile_interval  # Compatibilidade com /scheduler/status
         self.whatsapp_url = os.getenv('WHATSAPP_MONITOR_URL', 'http://qrcode:3001')
         self.timezone = pytz.timezone('America/Sao_Paulo')
+        self.condition = threading.Condition()
+        self.heap = []  # (timestamp, seq, produto_id); itens desatualizados são ignorados
+        self.agendados = {}  # produto_id -> timestamp vigente
+        self.seq = 0
+        self.last_reconcile = None
+        # Avisos que chegam enquanto a reconciliação lê o banco: reaplicados sobre o resultado
+        self.reconciling = False
+        self.pending_changes = {}  # produto_id -> timestamp (None = removido)
+        # Falha ao buscar o produto vencido: tenta de novo com backoff em vez de esperar a reconciliação
+        self.retry_base_delay = 5
+        self.retry_max_delay = 300
+        self.falhas = {}  # produto_id -> falhas seguidas
 
     def start(self):
         """Inicia o scheduler em uma thread separada"""
+        from . import database
+
         if self.running:
             logger.warning('⚠️ Scheduler já está rodando')
             return
 
+        # Thread de um stop() anterior ainda terminando (envio em curso): espera sair
+        # para não ficarem duas rodando após uma troca rápida de liderança
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+
         self.running = True
+        database.registrar_ouvinte_agendamento(self.notificar_agendamento)
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
         logger.info('✅ Scheduler de mensagens iniciado')
@@ -54,68 +91,215 @@ class MessageScheduler:
     def stop(self):
         """Para o scheduler"""
         self.running = False
+        with self.condition:
+            self.condition.notify_all()
         if self.thread:
             self.thread.join(timeout=5)
         logger.info('🛑 Scheduler de mensagens parado')
 
+    def _parse_agendamento(self, agendamento_str: str) -> float:
+        """Converte o agendamento ISO do banco em timestamp"""
+        agendamento_dt = datetime.fromisoformat(agendamento_str.replace('Z', '+00:00'))
+        return agendamento_dt.astimezone(self.timezone).timestamp()
+
+    def notificar_agendamento(self, produto_id, agendamento_str: Optional[str]):
+        """Atualiza o heap quando um agendamento é criado, alterado ou removido"""
+        if produto_id is None:
+            return
+        if not self.running:
+            # O scheduler ativo está em outro processo: avisa pelo arquivo
+            self._touch_wake()
+            return
+        try:
+            timestamp = self._parse_agendamento(agendamento_str) if agendamento_str else None
+        except (TypeError, ValueError) as e:
+            logger.error(f'❌ Agendamento inválido para produto {produto_id}: {e}')
+            return
+
+        with self.condition:
+            if self.reconciling:
+                self.pending_changes[produto_id] = timestamp
+            if timestamp is None:
+                self.agendados.pop(produto_id, None)
+            else:
+                self._push(produto_id, timestamp)
+            # Acorda a thread para recalcular quanto dormir
+            self.condition.notify()
+
+    def _touch_wake(self):
+        """Sinaliza ao líder (outro worker do mesmo host) que algum agendamento mudou"""
+        try:
+            directory = os.path.dirname(self.wake_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.wake_path, 'a'):
+                pass
+            os.utime(self.wake_path, None)
+        except OSError as e:
+            logger.warning(f'⚠️ Não foi possível sinalizar o scheduler: {e}')
+
+    def _wake_changed(self) -> bool:
+        """True se outro processo tocou o arquivo de aviso desde a última verificação"""
+        try:
+            mtime = os.stat(self.wake_path).st_mtime_ns
+        except OSError:
+            self.wake_mtime = 0  # Arquivo ainda não existe: a criação conta como aviso
+            return False
+        changed = self.wake_mtime is not None and mtime != self.wake_mtime
+        self.wake_mtime = mtime
+        return changed
+
+    def _push(self, produto_id, timestamp: float):
+        """Registra o vencimento (chamar com self.condition adquirido)"""
+        self.agendados[produto_id] = timestamp
+        self.seq += 1
+        heapq.heappush(self.heap, (timestamp, self.seq, produto_id))
+
+    def _reconcile(self):
+        """
+        Recarrega (id, agendamento) do banco e reconstrói o heap. Avisos recebidos
+        durante a leitura podem não estar no resultado, então são reaplicados por cima.
+        """
+        from . import database
+
+        with self.condition:
+            self.reconciling = True
+            self.pending_changes = {}
+        try:
+            agendados = {}
+            for row in database.listar_agendamentos_db():
+                try:
+                    agendados[row['id']] = self._parse_agendamento(row['agendamento'])
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.error(f'❌ Agendamento inválido para produto {row.get("id")}: {e}')
+
+            with self.condition:
+                for produto_id, timestamp in self.pending_changes.items():
+                    if timestamp is None:
+                        agendados.pop(produto_id, None)
+                    else:
+                        agendados[produto_id] = timestamp
+                self.agendados = {}
+                self.heap = []
+                for produto_id, timestamp in agendados.items():
+                    self._push(produto_id, timestamp)
+                self.last_reconcile = time.time()
+        finally:
+            with self.condition:
+                self.reconciling = False
+                self.pending_changes = {}
+
+        logger.info(f'🔄 Agendamentos reconciliados: {len(agendados)} em memória')
+
+    def _pop_due(self) -> List:
+        """Remove do heap os ids vencidos (chamar com self.condition adquirido)"""
+        now = time.time()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            timestamp, _, produto_id = heapq.heappop(self.heap)
+            # Item desatualizado: agendamento removido ou remarcado depois do push
+            if self.agendados.get(produto_id) != timestamp:
+                continue
+            del self.agendados[produto_id]
+            due.append(produto_id)
+        return due
+
+    def _discard_stale(self):
+        """Descarta do topo do heap os itens desatualizados"""
+        while self.heap and self.agendados.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
     def _run(self):
-        """Loop principal do scheduler"""
-        logger.info('🔄 Scheduler rodando... Verificando mensagens agendadas a cada 30s')
+        """Loop principal do scheduler: dorme até o próximo vencimento ou reconciliação"""
+        logger.info(f'🔄 Scheduler rodando... Reconciliando agendamentos a cada {self.reconcile_interval}s')
 
+        next_reconcile = 0.0
         while self.running:
             try:
-                self._check_and_send_scheduled_messages()
+                if self._wake_changed() or time.time() >= next_reconcile:
+                    # Só agenda a próxima após sucesso; se falhar, tenta de novo após a pausa abaixo
+                    self._reconcile()
+                    next_reconcile = time.time() + self.reconcile_interval
+
+                with self.condition:
+                    due = self._pop_due()
+                    if not due:
+                        self._discard_stale()
+                        wake_at = min(next_reconcile, time.time() + self.wake_poll_interval)
+                        if self.heap:
+                            wake_at = min(wake_at, self.heap[0][0])
+                        timeout = wake_at - time.time()
+                        if timeout > 0 and self.running:
+                            self.condition.wait(timeout)
+                        continue
+
+                for produto_id in due:
+                    self._send_due_product(produto_id)
             except Exception as e:
                 logger.error(f'❌ Erro no scheduler: {e}')
                 import traceback
                 logger.error(traceback.format_exc())
+                # Evita laço quente se o banco estiver fora (interrompível por stop())
+                with self.condition:
+                    if self.running:
+                        self.condition.wait(5)
 
-            # Aguardar antes da próxima verificação
-            time.sleep(self.check_interval)
-
-    def _check_and_send_scheduled_messages(self):
-        """Verifica e envia mensagens que chegaram no horário agendado"""
+    def _send_due_product(self, produto_id):
+        """Busca o produto vencido, confirma o agendamento no banco e envia"""
         from . import database
 
         try:
-            # Buscar produtos agendados
-            produtos = database.listar_produtos_db('agendado', 'asc')
+            produto = database.obter_produto_db(produto_id, propagar_erro=True)
+        except Exception as e:
+            # O item já saiu do heap: sem recolocar, o envio só voltaria na próxima reconciliação
+            falhas = self.falhas.get(produto_id, 0) + 1
+            self.falhas[produto_id] = falhas
+            delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (falhas - 1))
+            logger.error(f'❌ Erro ao buscar produto {produto_id}: {e}. Nova tentativa em {delay}s')
+            with self.condition:
+                if produto_id not in self.agendados:
+                    self._push(produto_id, time.time() + delay)
+            return
+        self.falhas.pop(produto_id, None)
 
-            if not produtos:
+        try:
+            agendamento_str = produto.get('agendamento') if produto else None
+            if not agendamento_str:
                 return
 
-            now = datetime.now(self.timezone)
-
-            for produto in produtos:
-                agendamento_str = produto.get('agendamento')
-                if not agendamento_str:
-                    continue
-
-                try:
-                    # Converter agendamento para datetime
-                    agendamento_dt = datetime.fromisoformat(agendamento_str.replace('Z', '+00:00'))
-                    agendamento_dt = agendamento_dt.astimezone(self.timezone)
-
-                    # Verificar se já passou do horário agendado
-                    if now >= agendamento_dt:
-                        logger.info(f'⏰ Horário atingido para produto: {produto.get("titulo", "")[:50]}...')
+            # Pode ter sido remarcado por outro processo desde a última reconciliação
+            timestamp = self._parse_agendamento(agendamento_str)
+            if timestamp > time.time():
+                with self.condition:
+                    self._push(produto_id, timestamp)
+                return
 
-                        # Enviar mensagem
-                        self._send_scheduled_message(produto)
+            logger.info(f'⏰ Horário atingido para produto: {produto.get("titulo", "")[:50]}...')
 
-                        # Remover agendamento (não atualizar enviado_em pois coluna não existe)
-                        database.atualizar_produto_db(
-                            produto['id'],
-                            {'agendamento': None}
-                        )
+            # Remover agendamento antes de enviar (não atualizar enviado_em pois coluna não existe);
+            # se a liderança cair antes de qualquer grupo receber, o callback do envio o devolve
+            database.atualizar_produto_db(produto_id, {'agendamento': None})
 
-                        logger.info(f'✅ Mensagem enviada e agendamento removido: {produto["id"]}')
+            # Enviar mensagem
+            self._send_scheduled_message(produto)
 
-                except Exception as e:
-                    logger.error(f'❌ Erro ao processar produto {produto.get("id")}: {e}')
+            logger.info(f'✅ Mensagem enviada e agendamento removido: {produto_id}')
 
         except Exception as e:
-            logger.error(f'❌ Erro ao verificar mensagens agendadas: {e}')
+            logger.error(f'❌ Erro ao processar produto {produto_id}: {e}')
+
+    def get_status(self) -> Dict:
+        """Resumo do heap em memória para /scheduler/status"""
+        with self.condition:
+            self._discard_stale()
+            proximo = self.heap[0][0] if self.heap else None
+            return {
+                'agendados_em_memoria': len(self.agendados),
+                'proximo_envio': datetime.fromtimestamp(proximo, self.timezone).isoformat() if proximo else None,
+                'ultima_reconciliacao': datetime.fromtimestamp(self.last_reconcile, self.timezone).isoformat()
+                if self.last_reconcile else None,
+                'reconcile_interval': self.reconcile_interval
+            }
 
     def _send_scheduled_message(self, produto: Dict) -> bool:
         """Envia mensagem agendada para o WhatsApp"""
@@ -140,18 +324,27 @@ class MessageScheduler:
                 logger.error('❌ Produto sem mensagem formatada')
                 return False
 
-            # Enviar para cada grupo
-            sucesso = True
-            for grupo_id in grupos_destino:
-                try:
-                    self._send_to_whatsapp(grupo_id, mensagem, imagem_url)
-                    logger.info(f'✅ Enviado para grupo: {grupo_id}')
-                    time.sleep(2)  # Delay entre envios
-                except Exception as e:
-                    logger.error(f'❌ Erro ao enviar para {grupo_id}: {e}')
-                    sucesso = False
-
-            return sucesso
+            # Enviar para os grupos em paralelo (ritmo controlado pelo dispatcher);
+            # não bloqueia o próximo agendamento
+            def on_complete(job):
+                resumo = job.to_dict()
+                if job.suspended and job.sent == 0:
+                    # Nenhum grupo recebeu: o agendamento volta para o próximo líder enviar
+                    from . import database
+                    database.agendar_produto_db(produto.get('id'), produto.get('agendamento'))
+                    logger.warning(f'⚠️ Envio {job.id} suspenso (perda da liderança); agendamento devolvido')
+                    return
+                logger.info(f'✅ Envio {job.id} concluído: {resumo["enviados"]}/{resumo["total"]} grupos '
+                            f'em {resumo["duracao"]}s')
+
+            send_dispatcher.submit(
+                grupos_destino,
+                lambda grupo_id: self._send_to_whatsapp(grupo_id, mensagem, imagem_url),
+                label=f'agendado:{produto.get("id")}',
+                on_complete=on_complete,
+                leader_only=True
+            )
+            return True
 
         except Exception as e:
             logger.error(f'❌ Erro ao enviar mensagem agendada: {e}')
@@ -254,15 +447,15 @@ class MessageScheduler:
             if not mensagem:
                 return {'success': False, 'error': 'Produto sem mensagem formatada'}
 
-            # Enviar para grupos
-            resultados = []
-            for grupo_id in grupos:
-                try:
-                    self._send_to_whatsapp(grupo_id, mensagem, imagem_url)
-                    resultados.append({'grupo': grupo_id, 'sucesso': True})
-                    time.sleep(2)  # Delay entre envios
-                except Exception as e:
-                    resultados.append({'grupo': grupo_id, 'sucesso': False, 'erro': str(e)})
+            # Enviar para grupos (em paralelo, aguardando a conclusão)
+            job = send_dispatcher.send_and_wait(
+                grupos,
+                lambda grupo_id: self._send_to_whatsapp(grupo_id, mensagem, imagem_url),
+                label=f'imediato:{produto_id}',
+                timeout=ScrapingConfig.WHATSAPP_SEND_CONFIG['sync_timeout']
+            )
+            resumo = job.to_dict()
+            resultados = resumo['resultados']
 
             # Não marcar como enviado no banco (coluna não existe)
             # TODO: Adicionar coluna 'enviado_em' no Supabase se necessário
@@ -271,7 +464,10 @@ class MessageScheduler:
                 'success': True,
                 'resultados': resultados,
                 'total_enviado': sum(1 for r in resultados if r['sucesso']),
-                'total_falhou': sum(1 for r in resultados if not r['sucesso'])
+                'total_falhou': sum(1 for r in resultados if not r['sucesso']),
+                # Não concluídos dentro do timeout continuam no dispatcher (ver /scheduler/envios/<id>)
+                'total_pendente': resumo['pendentes'],
+                'envio_id': job.id
             }
 
         except Exception as e:
@@ -291,15 +487,38 @@ class CloneQueueScheduler:
     """
     Scheduler para processar fila de mensagens clonadas.
     Envia mensagens automaticamente quando chega o horário agendado.
+
+    A cada ciclo drena as mensagens vencidas (até clone_batch_size) sem esperar um
+    ciclo por mensagem: reivindica lotes de no máximo clone_burst, no ritmo de
+    clone_rate_per_minute e só enquanto houver menos de clone_max_in_flight
+    mensagens no dispatcher. Só fica em 'enviando' o que está de fato sendo
+    enviado; mensagens travadas (processo morto no meio) voltam para 'pendente'
+    após clone_stale_claim_minutes.
     """
 
     def __init__(self):
+        from .anti_bot import RateLimiter
+
+        send_config = ScrapingConfig.WHATSAPP_SEND_CONFIG
         self.running = False
         self.thread = None
         self.check_interval = 30  # Verificar a cada 30 segundos
         self.whatsapp_url = os.getenv('WHATSAPP_MONITOR_URL', 'http://localhost:3001')
         self.timezone = pytz.timezone('America/Sao_Paulo')
         self.intervalo_minutos = 5  # Intervalo padrão entre envios
+        self.batch_size = send_config['clone_batch_size']
+        self.pacer = RateLimiter(send_config['clone_rate_per_minute'], burst=send_config['clone_burst'])
+        self.max_in_flight = max(1, send_config['clone_max_in_flight'])
+        self.stale_claim_minutes = send_config['clone_stale_claim_minutes']
+        self.in_flight = set()  # ids no dispatcher (neste processo)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.stats = {
+            'ciclos_com_envio': 0,
+            'liberadas': 0,
+            'recuperadas_travadas': 0,
+            'ultimo_ciclo': 0
+        }
 
     def start(self):
         """Inicia o scheduler da fila de clonagem"""
@@ -307,7 +526,12 @@ class CloneQueueScheduler:
             logger.warning('[CLONE] Scheduler de clonagem ja esta rodando')
             return
 
+        # Thread de um stop() anterior ainda terminando: espera sair antes de criar outra
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+
         self.running = True
+        self.stop_event.clear()
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
         logger.info('[CLONE] Scheduler de fila de clonagem iniciado')
@@ -315,6 +539,7 @@ class CloneQueueScheduler:
     def stop(self):
         """Para o scheduler"""
         self.running = False
+        self.stop_event.set()
         if self.thread:
             self.thread.join(timeout=5)
         logger.info('[CLONE] Scheduler de fila de clonagem parado')
@@ -344,61 +569,116 @@ class CloneQueueScheduler:
                 import traceback
                 logger.error(traceback.format_exc())
 
-            time.sleep(self.check_interval)
+            # Interrompível por stop()
+            self.stop_event.wait(self.check_interval)
 
     def _process_queue(self):
-        """Processa mensagens pendentes na fila"""
+        """Drena as mensagens vencidas em lotes pequenos, no ritmo configurado"""
         from . import database
 
         try:
-            # Buscar próxima mensagem pendente que já passou do horário
-            mensagem = database.obter_proxima_mensagem_fila()
-
-            if not mensagem:
-                return  # Nada para processar
-
-            mensagem_id = mensagem['id']
-            logger.info(f'[CLONE] Processando mensagem ID {mensagem_id}')
+            self._reclaim_stale()
 
-            # Marcar como "enviando"
-            database.atualizar_status_mensagem_fila(mensagem_id, 'enviando')
-
-            # Verificar conexão WhatsApp
+            # Conexão e grupos antes de reivindicar: se faltar algo, as mensagens ficam pendentes
             if not self._check_whatsapp_connection():
-                database.atualizar_status_mensagem_fila(
-                    mensagem_id, 'erro',
-                    'WhatsApp nao conectado'
-                )
-                logger.warning('[CLONE] WhatsApp nao conectado. Mensagem ficara pendente.')
+                logger.warning('[CLONE] WhatsApp nao conectado. Mensagens ficarao pendentes.')
                 return
 
-            # Obter grupos destino
             grupos_destino = self._get_target_groups()
-
             if not grupos_destino:
-                database.atualizar_status_mensagem_fila(
-                    mensagem_id, 'erro',
-                    'Nenhum grupo destino configurado'
-                )
                 logger.warning('[CLONE] Nenhum grupo destino configurado')
                 return
 
-            # Enviar mensagem
-            texto = mensagem.get('mensagem_com_afiliado') or mensagem.get('mensagem_original', '')
-            imagem_url = mensagem.get('imagem_url')
+            liberadas = 0
+            while self.running and liberadas < self.batch_size:
+                with self.lock:
+                    livres = self.max_in_flight - len(self.in_flight)
+                if livres <= 0:
+                    # Dispatcher ocupado com as anteriores: espera alguma concluir
+                    if self.stop_event.wait(1):
+                        break
+                    continue
 
-            sucesso_total = True
-            for grupo_id in grupos_destino:
-                try:
-                    self._send_to_whatsapp(grupo_id, texto, imagem_url)
-                    logger.info(f'[CLONE] Enviado para grupo: {grupo_id[:20]}...')
-                    time.sleep(2)  # Delay entre grupos
-                except Exception as e:
-                    logger.error(f'[CLONE] Erro ao enviar para {grupo_id}: {e}')
-                    sucesso_total = False
-
-            # Atualizar status
-            if sucesso_total:
+                lote = min(self.pacer.burst, livres, self.batch_size - liberadas)
+                # Ritmo reservado antes de reivindicar: durante a espera as mensagens seguem pendentes
+                wait_time = max(self.pacer.reserve('clone') for _ in range(lote))
+                if wait_time > 0 and self.stop_event.wait(wait_time):
+                    break
+
+                mensagens = database.reivindicar_mensagens_vencidas_fila(lote)
+                for mensagem in mensagens:
+                    self._submit_message(mensagem, grupos_destino)
+                liberadas += len(mensagens)
+                if len(mensagens) < lote:
+                    break  # Backlog vazio
+
+            if liberadas:
+                logger.info(f'[CLONE] {liberadas} mensagem(ns) vencida(s) liberada(s) para envio')
+                with self.lock:
+                    self.stats['ciclos_com_envio'] += 1
+                    self.stats['liberadas'] += liberadas
+                    self.stats['ultimo_ciclo'] = liberadas
+
+        except Exception as e:
+            logger.error(f'[CLONE] Erro ao processar fila: {e}')
+
+    def _reclaim_stale(self):
+        """Devolve para a fila mensagens presas em 'enviando' (exceto as em envio aqui)"""
+        from . import database
+
+        with self.lock:
+            em_envio = list(self.in_flight)
+        devolvidas = database.devolver_mensagens_travadas_fila(self.stale_claim_minutes, em_envio)
+        if devolvidas:
+            logger.warning(f'[CLONE] {devolvidas} mensagem(ns) travada(s) em enviando devolvida(s) para a fila')
+            with self.lock:
+                self.stats['recuperadas_travadas'] += devolvidas
+
+    def _submit_message(self, mensagem: Dict, grupos: List[str]):
+        """Entrega a mensagem ao dispatcher; o status é gravado quando todos os grupos terminarem"""
+        mensagem_id = mensagem['id']
+        texto = mensagem.get('mensagem_com_afiliado') or mensagem.get('mensagem_original', '')
+        imagem_url = mensagem.get('imagem_url')
+
+        logger.info(f'[CLONE] Processando mensagem ID {mensagem_id}')
+        with self.lock:
+            self.in_flight.add(mensagem_id)
+        return send_dispatcher.submit(
+            grupos,
+            lambda grupo_id: self._send_to_whatsapp(grupo_id, texto, imagem_url),
+            label=f'clone:{mensagem_id}',
+            on_complete=lambda job: self._on_send_complete(mensagem_id, job),
+            leader_only=True
+        )
+
+    def get_status(self) -> Dict:
+        """Estatísticas do drain da fila para /fila-mensagens/estatisticas"""
+        with self.lock:
+            return {
+                **self.stats,
+                'running': self.running,
+                'em_envio': len(self.in_flight),
+                'max_em_envio': self.max_in_flight,
+                'lote_maximo': self.batch_size,
+                'ritmo_por_minuto': self.pacer.max_requests,
+                'rajada': self.pacer.burst
+            }
+
+    def _on_send_complete(self, mensagem_id, job):
+        """Atualiza o status da mensagem quando todos os grupos terminaram"""
+        from . import database
+
+        try:
+            if job.suspended and job.sent == 0:
+                # Perda da liderança antes de qualquer grupo: o próximo líder envia
+                database.atualizar_status_mensagem_fila(mensagem_id, 'pendente')
+                logger.warning(f'[CLONE] Mensagem {mensagem_id} devolvida para a fila (perda da liderança)')
+            elif job.suspended:
+                database.atualizar_status_mensagem_fila(
+                    mensagem_id, 'erro',
+                    'Envio interrompido pela perda da liderança'
+                )
+            elif job.success:
                 database.atualizar_status_mensagem_fila(mensagem_id, 'enviado')
                 logger.info(f'[CLONE] Mensagem {mensagem_id} enviada com sucesso!')
             else:
@@ -408,7 +688,10 @@ class CloneQueueScheduler:
                 )
 
         except Exception as e:
-            logger.error(f'[CLONE] Erro ao processar fila: {e}')
+            logger.error(f'[CLONE] Erro ao atualizar status da mensagem {mensagem_id}: {e}')
+        finally:
+            with self.lock:
+                self.in_flight.discard(mensagem_id)
 
     def _check_whatsapp_connection(self) -> bool:
         """Verifica se WhatsApp está conectado"""
@@ -467,56 +750,38 @@ class CloneQueueScheduler:
         from . import database
 
         try:
+            if not self._check_whatsapp_connection():
+                return {
+                    'success': False,
+                    'error': 'WhatsApp nao conectado',
+                    'processadas': 0
+                }
+
+            grupos = self._get_target_groups()
+            if not grupos:
+                return {
+                    'success': False,
+                    'error': 'Nenhum grupo configurado',
+                    'processadas': 0
+                }
+
             mensagens_processadas = 0
             erros = 0
 
             while True:
-                mensagem = database.obter_proxima_mensagem_fila()
-                if not mensagem:
+                # Lotes de max_in_flight: só fica em 'enviando' o que está sendo enviado
+                mensagens = database.reivindicar_mensagens_vencidas_fila(self.max_in_flight)
+                if not mensagens:
                     break
 
-                mensagem_id = mensagem['id']
-
-                try:
-                    # Marcar como enviando
-                    database.atualizar_status_mensagem_fila(mensagem_id, 'enviando')
-
-                    # Verificar conexão
-                    if not self._check_whatsapp_connection():
-                        database.atualizar_status_mensagem_fila(mensagem_id, 'pendente')
-                        return {
-                            'success': False,
-                            'error': 'WhatsApp nao conectado',
-                            'processadas': mensagens_processadas
-                        }
-
-                    # Obter grupos
-                    grupos = self._get_target_groups()
-                    if not grupos:
-                        database.atualizar_status_mensagem_fila(
-                            mensagem_id, 'erro',
-                            'Nenhum grupo configurado'
-                        )
+                # Os envios do lote correm juntos; aguarda cada mensagem concluir
+                jobs = [self._submit_message(mensagem, grupos) for mensagem in mensagens]
+                for job in jobs:
+                    job.wait()
+                    if job.success:
+                        mensagens_processadas += 1
+                    else:
                         erros += 1
-                        continue
-
-                    # Enviar
-                    texto = mensagem.get('mensagem_com_afiliado') or mensagem.get('mensagem_original', '')
-                    imagem = mensagem.get('imagem_url')
-
-                    for grupo in grupos:
-                        self._send_to_whatsapp(grupo, texto, imagem)
-                        time.sleep(1)
-
-                    database.atualizar_status_mensagem_fila(mensagem_id, 'enviado')
-                    mensagens_processadas += 1
-
-                    # Delay entre mensagens
-                    time.sleep(2)
-
-                except Exception as e:
-                    database.atualizar_status_mensagem_fila(mensagem_id, 'erro', str(e))
-                    erros += 1
 
             return {
                 'success': True,
@@ -1,6 +1,8 @@
+import asyncio
 import logging
 import time
 import re
+import threading
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any
 from .config import ScrapingConfig
@@ -8,10 +10,17 @@ from .anti_bot import AntiBotManager
 from .selectors import AdaptiveSelector
 from .validators import product_validator
 from .cache_manager import cached_scraper
+from .pagination import fetch_pages, fetch_pages_async
+from .singleflight import single_flight
+from .canonical import canonical_product_key
 from . import amazon_scraping
 
 logger = logging.getLogger(__name__)
 
+def _product_flight_key(scraper: 'BaseScraper', url: str, affiliate_link: str = "") -> str:
+    """Chave de coalescência: plataforma + produto canônico + link de afiliado"""
+    return f"{scraper.platform}|{canonical_product_key(url)}|{affiliate_link or ''}"
+
 class BaseScraper(ABC):
     def __init__(self, platform: str):
         self.platform = platform
@@ -27,6 +36,14 @@ class BaseScraper(ABC):
     def scrape_search(self, query: str, max_pages: int = 2) -> List[Dict[str, Any]]:
         pass
 
+    async def scrape_product_async(self, url: str, affiliate_link: str = "") -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de scrape_product (padrão: executa a versão síncrona em uma thread)"""
+        return await asyncio.to_thread(self.scrape_product, url, affiliate_link)
+
+    async def scrape_search_async(self, query: str, max_pages: int = 2) -> List[Dict[str, Any]]:
+        """Versão assíncrona de scrape_search (padrão: executa a versão síncrona em uma thread)"""
+        return await asyncio.to_thread(self.scrape_search, query, max_pages)
+
     def _validate_and_sanitize(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
         return product_validator.validate_product(product_data)
 
@@ -127,24 +144,30 @@ class MercadoLivreScraper(BaseScraper):
             logger.warning(f"Erro ao seguir redirect: {e}. Usando URL original.")
             return url
 
+    def _resolve_product_urls(self, url: str, affiliate_link: str = "") -> tuple[str, str]:
+        """Retorna (URL do produto para scraping, link de afiliado a ser usado)"""
+        # Determinar se a URL fornecida é um link de afiliado
+        is_affiliate_link = ('mercadolivre.com/sec/' in url or
+                           'mercadolivre.com.br/sec/' in url or
+                           '/s/c/' in url)
+
+        # Se for link de afiliado, extrair URL do produto E manter link de afiliado
+        if is_affiliate_link:
+            logger.info("🔗 Link de afiliado detectado, extraindo informações...")
+            return self._extract_real_affiliate_link(url)
+
+        # Se não for link de afiliado, seguir fluxo normal
+        return self._follow_redirect_if_needed(url), affiliate_link or url
+
+    @staticmethod
+    def _is_incomplete(product_data: Dict[str, Any]) -> bool:
+        return product_data.get('titulo') == 'Produto sem título' or product_data.get('preco_atual') == 'Preço não disponível'
+
     @cached_scraper
+    @single_flight('scrape_product', lambda self, url, affiliate_link="": _product_flight_key(self, url, affiliate_link))
     def scrape_product(self, url: str, affiliate_link: str = "") -> Optional[Dict[str, Any]]:
         try:
-            # Determinar se a URL fornecida é um link de afiliado
-            is_affiliate_link = ('mercadolivre.com/sec/' in url or
-                               'mercadolivre.com.br/sec/' in url or
-                               '/s/c/' in url)
-
-            # Se for link de afiliado, extrair URL do produto E manter link de afiliado
-            if is_affiliate_link:
-                logger.info("🔗 Link de afiliado detectado, extraindo informações...")
-                product_url, real_affiliate_link = self._extract_real_affiliate_link(url)
-                final_url = product_url
-                affiliate_to_use = real_affiliate_link
-            else:
-                # Se não for link de afiliado, seguir fluxo normal
-                final_url = self._follow_redirect_if_needed(url)
-                affiliate_to_use = affiliate_link or url
+            final_url, affiliate_to_use = self._resolve_product_urls(url, affiliate_link)
 
             logger.info(f"📦 Fazendo scraping de: {final_url}")
             logger.info(f"🔗 Link de afiliado a ser usado: {affiliate_to_use[:80]}...")
@@ -160,7 +183,7 @@ class MercadoLivreScraper(BaseScraper):
             product_data = self._extract_product_data(soup, final_url, affiliate_to_use)
 
             # Verificar se conseguiu extrair dados válidos
-            if product_data.get('titulo') == 'Produto sem título' or product_data.get('preco_atual') == 'Preço não disponível':
+            if self._is_incomplete(product_data):
                 logger.warning("Dados incompletos. Tentando via ScraperAPI...")
                 try:
                     response = self.anti_bot.make_request_via_api(final_url)
@@ -174,39 +197,78 @@ class MercadoLivreScraper(BaseScraper):
             logger.error(f"Erro ao fazer scraping do produto ML: {e}")
             return None
 
-    def scrape_search(self, query: str, max_pages: int = 2) -> List[Dict[str, Any]]:
+    async def scrape_product_async(self, url: str, affiliate_link: str = "") -> Optional[Dict[str, Any]]:
+        try:
+            # A resolução de links de afiliado ainda usa requests: executar fora do event loop
+            final_url, affiliate_to_use = await asyncio.to_thread(self._resolve_product_urls, url, affiliate_link)
+
+            logger.info(f"📦 Fazendo scraping (async) de: {final_url}")
+
+            response = await self.anti_bot.make_request_async(final_url)
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(response.text, 'html.parser')
+            product_data = self._extract_product_data(soup, final_url, affiliate_to_use)
+
+            if self._is_incomplete(product_data):
+                logger.warning("Dados incompletos. Tentando via ScraperAPI...")
+                try:
+                    response = await self.anti_bot.make_request_via_api_async(final_url)
+                    soup = BeautifulSoup(response.text, 'html.parser')
+                    product_data = self._extract_product_data(soup, final_url, affiliate_to_use)
+                except Exception as api_error:
+                    logger.error(f"ScraperAPI também falhou: {api_error}")
+
+            return self._validate_and_sanitize(product_data)
+        except Exception as e:
+            logger.error(f"Erro ao fazer scraping do produto ML: {e}")
+            return None
+
+    def _search_page_url(self, query_formatted: str, page: int) -> str:
+        if page == 1:
+            return f"{self.config['base_url']}/{query_formatted}"
+        offset = (page - 1) * self.config['pagination']['step']
+        return f"{self.config['base_url']}/{query_formatted}_Desde_{offset + 1}"
+
+    def _parse_search_page(self, html: str) -> List[Dict[str, Any]]:
+        """Extrai e valida os produtos de uma página de resultados"""
+        from bs4 import BeautifulSoup
+        # Usar response.text em vez de response.content para lidar com encoding/compression
+        soup = BeautifulSoup(html, 'html.parser')
         products = []
-        query_formatted = query.replace(' ', '-')
-        for page in range(1, max_pages + 1):
+        product_items = self.selector.find_elements(soup, 'product_items')
+        for item in product_items:
             try:
-                if page == 1:
-                    url = f"{self.config['base_url']}/{query_formatted}"
-                else:
-                    offset = (page - 1) * self.config['pagination']['step']
-                    url = f"{self.config['base_url']}/{query_formatted}_Desde_{offset + 1}"
-                # Usar requisição direta primeiro
-                response = self.anti_bot.make_request(url)
-                from bs4 import BeautifulSoup
-                # Usar response.text em vez de response.content para lidar com encoding/compression
-                soup = BeautifulSoup(response.text, 'html.parser')
-                if not soup:
-                    break
-                product_items = self.selector.find_elements(soup, 'product_items')
-                for item in product_items:
-                    try:
-                        product_data = self._extract_search_item_data(item)
-                        if product_data:
-                            validated_data = self._validate_and_sanitize(product_data)
-                            products.append(validated_data)
-                    except Exception as e:
-                        logger.warning(f"Erro ao processar item da busca: {e}")
-                        continue
-                time.sleep(self.anti_bot.get_page_delay())
+                product_data = self._extract_search_item_data(item)
+                if product_data:
+                    validated_data = self._validate_and_sanitize(product_data)
+                    products.append(validated_data)
             except Exception as e:
-                logger.error(f"Erro na página {page} da busca ML: {e}")
-                break
+                logger.warning(f"Erro ao processar item da busca: {e}")
+                continue
         return products
 
+    def scrape_search(self, query: str, max_pages: int = 2) -> List[Dict[str, Any]]:
+        query_formatted = query.replace(' ', '-')
+
+        def fetch_page(page: int) -> List[Dict[str, Any]]:
+            url = self._search_page_url(query_formatted, page)
+            # Usar requisição direta primeiro (make_request já aplica o rate limit por domínio)
+            response = self.anti_bot.make_request(url)
+            return self._parse_search_page(response.text)
+
+        # Páginas buscadas em paralelo, resultados na ordem original
+        return fetch_pages(fetch_page, max_pages, platform=self.platform)
+
+    async def scrape_search_async(self, query: str, max_pages: int = 2) -> List[Dict[str, Any]]:
+        query_formatted = query.replace(' ', '-')
+
+        async def fetch_page(page: int) -> List[Dict[str, Any]]:
+            url = self._search_page_url(query_formatted, page)
+            response = await self.anti_bot.make_request_async(url)
+            return self._parse_search_page(response.text)
+
+        return await fetch_pages_async(fetch_page, max_pages, platform=self.platform)
+
     def _extract_product_data(self, soup, url: str, affiliate_link: str) -> Dict[str, Any]:
         title_elem = self.selector.find_element(soup, 'title')
         title = title_elem.get_text(strip=True) if title_elem else "Produto sem título"
@@ -328,6 +390,8 @@ class AmazonScraper(BaseScraper):
     def __init__(self):
         super().__init__('amazon')
 
+    @cached_scraper
+    @single_flight('scrape_product', lambda self, url, affiliate_link="": _product_flight_key(self, url, affiliate_link))
     def scrape_product(self, url: str, affiliate_link: str = "") -> Optional[Dict[str, Any]]:
         try:
             # Usar ScraperAPI para Amazon (mais confiável)
@@ -360,6 +424,31 @@ class AmazonScraper(BaseScraper):
             logger.error(f"Erro ao fazer scraping do produto Amazon: {e}")
             return self._create_fallback_product(url, affiliate_link)
 
+    async def scrape_product_async(self, url: str, affiliate_link: str = "") -> Optional[Dict[str, Any]]:
+        try:
+            logger.info(f"Tentando scraping (async) de produto Amazon via ScraperAPI: {url}")
+            response = await self.anti_bot.make_request_via_api_async(url)
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(response.text, 'html.parser')
+            product_data = self._extract_product_data(soup, url, affiliate_link)
+
+            if (product_data.get('titulo') == 'Produto sem título' or
+                product_data.get('preco_atual') == 'Preço não disponível'):
+                logger.warning("Dados incompletos extraídos via API.")
+                logger.info("Tentando com requisição direta como fallback...")
+                try:
+                    response = await self.anti_bot.make_request_async(url)
+                    soup = BeautifulSoup(response.text, 'html.parser')
+                    product_data = self._extract_product_data(soup, url, affiliate_link)
+                except Exception as fallback_error:
+                    logger.error(f"Fallback também falhou: {fallback_error}")
+                    return self._create_fallback_product(url, affiliate_link)
+
+            return self._validate_and_sanitize(product_data)
+        except Exception as e:
+            logger.error(f"Erro ao fazer scraping do produto Amazon: {e}")
+            return self._create_fallback_product(url, affiliate_link)
+
     def _create_fallback_product(self, url: str, affiliate_link: str) -> Dict[str, Any]:
         asin_match = re.search(r'/dp/([A-Z0-9]{10})', url)
         asin = asin_match.group(1) if asin_match else "UNKNOWN"
@@ -494,14 +583,39 @@ class ScraperFactory:
         'mercadolivre': MercadoLivreScraper,
         'amazon': AmazonScraper,
     }
+    # Instâncias compartilhadas: rate limit, saúde dos proxies e sessões valem para o processo todo
+    _instances: Dict[str, BaseScraper] = {}
+    _lock = threading.Lock()
 
     @classmethod
     def create_scraper(cls, platform: str) -> Optional[BaseScraper]:
+        """Retorna a instância compartilhada do scraper da plataforma"""
         platform = platform.lower()
-        if platform in cls._scrapers:
-            return cls._scrapers[platform]()
-        logger.error(f"Scraper não encontrado para plataforma: {platform}")
-        return None
+        if platform not in cls._scrapers:
+            logger.error(f"Scraper não encontrado para plataforma: {platform}")
+            return None
+
+        scraper = cls._instances.get(platform)
+        if scraper is None:
+            with cls._lock:
+                scraper = cls._instances.get(platform)
+                if scraper is None:
+                    scraper = cls._scrapers[platform]()
+                    cls._instances[platform] = scraper
+                    logger.info(f"Scraper {platform} criado e registrado")
+        return scraper
+
+    @classmethod
+    def get_shared_scrapers(cls) -> Dict[str, BaseScraper]:
+        """Retorna as instâncias compartilhadas já criadas"""
+        with cls._lock:
+            return dict(cls._instances)
+
+    @classmethod
+    def reset_scrapers(cls):
+        """Descarta as instâncias compartilhadas (próxima chamada cria novas)"""
+        with cls._lock:
+            cls._instances.clear()
 
     @classmethod
     def get_available_platforms(cls) -> List[str]:
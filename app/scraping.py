@@ -6,6 +6,7 @@ import requests
 from bs4 import BeautifulSoup
 import time
 import re
+from .pagination import fetch_pages, search_rate_limiter
 
 load_dotenv()
 USER_AGENT = os.getenv("USER_AGENT")
@@ -386,52 +387,56 @@ def extrair_precos(produto_elem):
     
     return precos_info
 
-def scrape_mercadolivre(produto, max_pages=3):
-    produto_formatado = produto.replace(' ', '-')
+def _scrape_pagina_busca_ml(url_final):
+    """Busca e extrai os produtos de uma página de resultados do Mercado Livre."""
+    # headers com cookie são usados aqui
+    r = requests.get(url_final, headers=headers, proxies=proxies, timeout=20)
+    if r.status_code != 200:
+        raise requests.RequestException(f"Status {r.status_code} em {url_final}")
+    site = BeautifulSoup(r.content, 'html.parser')
+    produtos_encontrados = site.select('li.ui-search-layout__item')
     resultados = []
-    for page in range(1, max_pages + 1):
+    for produto_elem in produtos_encontrados:
         try:
-            url_final = f'https://lista.mercadolivre.com.br/{produto_formatado}_Desde_{(page - 1) * 50 + 1}' if page > 1 else f'https://lista.mercadolivre.com.br/{produto_formatado}'
-            # headers com cookie são usados aqui
-            r = requests.get(url_final, headers=headers, proxies=proxies, timeout=20)
-            if r.status_code != 200: break
-            site = BeautifulSoup(r.content, 'html.parser')
-            produtos_encontrados = site.select('li.ui-search-layout__item')
-            if not produtos_encontrados: break
-            for produto_elem in produtos_encontrados:
-                try:
-                    # Seletores atualizados para título
-                    titulo_selectors = ['a.poly-component__title', 'h3.poly-component__title-wrapper', 'h2.ui-search-item__title']
-                    titulo_elem = None
-                    for ts in titulo_selectors:
-                        titulo_elem = produto_elem.select_one(ts)
-                        if titulo_elem:
-                            break
-
-                    # Seletores atualizados para link
-                    link_selectors = ['a.poly-component__title', 'a.ui-search-link']
-                    link_elem = None
-                    for ls in link_selectors:
-                        link_elem = produto_elem.select_one(ls)
-                        if link_elem:
-                            break
-
-                    if not titulo_elem or not link_elem:
-                        continue
-                    titulo = titulo_elem.get_text().strip()
-                    link = link_elem.get('href')
-                    precos_info = extrair_precos(produto_elem)
-                    imagem_url = extrair_imagem_produto(produto_elem)
-                    # A busca não mostra o nome da loja, então deixamos em branco
-                    loja = '' 
-                    if titulo and link:
-                        resultados.append({'titulo': titulo, **precos_info, 'imagem': imagem_url, 'link': link, 'loja': loja})
-                except Exception: continue
-            time.sleep(2)
-        except Exception as e:
-            print(f"Erro ao processar página de busca do Mercado Livre: {e}")
-            break
+            # Seletores atualizados para título
+            titulo_selectors = ['a.poly-component__title', 'h3.poly-component__title-wrapper', 'h2.ui-search-item__title']
+            titulo_elem = None
+            for ts in titulo_selectors:
+                titulo_elem = produto_elem.select_one(ts)
+                if titulo_elem:
+                    break
+
+            # Seletores atualizados para link
+            link_selectors = ['a.poly-component__title', 'a.ui-search-link']
+            link_elem = None
+            for ls in link_selectors:
+                link_elem = produto_elem.select_one(ls)
+                if link_elem:
+                    break
+
+            if not titulo_elem or not link_elem:
+                continue
+            titulo = titulo_elem.get_text().strip()
+            link = link_elem.get('href')
+            precos_info = extrair_precos(produto_elem)
+            imagem_url = extrair_imagem_produto(produto_elem)
+            # A busca não mostra o nome da loja, então deixamos em branco
+            loja = '' 
+            if titulo and link:
+                resultados.append({'titulo': titulo, **precos_info, 'imagem': imagem_url, 'link': link, 'loja': loja})
+        except Exception: continue
     return resultados
 
+def scrape_mercadolivre(produto, max_pages=3):
+    produto_formatado = produto.replace(' ', '-')
+
+    def buscar_pagina(page):
+        url_final = f'https://lista.mercadolivre.com.br/{produto_formatado}_Desde_{(page - 1) * 50 + 1}' if page > 1 else f'https://lista.mercadolivre.com.br/{produto_formatado}'
+        return _scrape_pagina_busca_ml(url_final)
+
+    # Páginas buscadas em paralelo dentro do rate limit; para na primeira página vazia
+    return fetch_pages(buscar_pagina, max_pages, rate_limiter=search_rate_limiter,
+                       domain='lista.mercadolivre.com.br', platform='mercadolivre')
+
 def busca_alternativa(produto):
     return []
\ No newline at end of file
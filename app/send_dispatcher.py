@@ -0,0 +1,206 @@
+# /app/send_dispatcher.py
+"""
+Disparo paralelo de mensagens para grupos do WhatsApp: pool limitado de
+workers, ritmo por grupo e por conta (token bucket) e acompanhamento da
+conclusão de cada mensagem enviada para vários grupos.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .anti_bot import RateLimiter
+from .config import ScrapingConfig
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_KEY = 'account'
+SUSPENDED_ERROR = 'Envio suspenso: este processo deixou de ser o líder dos schedulers'
+
+class SendJob:
+    """Uma mensagem enviada para vários grupos"""
+
+    def __init__(self, label: str, groups: List[str],
+                 on_complete: Optional[Callable[['SendJob'], None]] = None, leader_only: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.groups = list(dict.fromkeys(groups))  # grupo repetido: um envio só
+        self.leader_only = leader_only
+        self.suspended = False  # algum grupo deixou de ser enviado por perda da liderança
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.on_complete = on_complete
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.event = threading.Event()
+
+    @property
+    def success(self) -> bool:
+        return all(result['sucesso'] for result in self.results.values())
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for result in self.results.values() if result['sucesso'])
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.event.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        sent = self.sent
+        return {
+            'id': self.id,
+            'label': self.label,
+            'total': len(self.groups),
+            'enviados': sent,
+            'falhas': len(self.results) - sent,
+            'pendentes': len(self.groups) - len(self.results),
+            'concluido': self.event.is_set(),
+            'suspenso': self.suspended,
+            'duracao': round((self.finished_at or time.time()) - self.created_at, 2),
+            'resultados': [self.results[group] for group in self.groups if group in self.results]
+        }
+
+class SendDispatcher:
+    """
+    Distribui os envios num pool de workers. Antes de cada POST o worker reserva
+    um token no bucket da conta (limite global do número) e no do grupo (evita
+    rajadas no mesmo grupo) e espera o maior dos dois atrasos.
+    Jobs leader_only (dos schedulers) deixam de enviar assim que suspend_leader_jobs()
+    é chamado na perda da liderança, inclusive os que já estavam no pool.
+    """
+
+    def __init__(self, max_workers: int = 4, account_rate_per_minute: int = 60,
+                 account_burst: int = 10, group_rate_per_minute: int = 6,
+                 max_tracked_jobs: int = 200):
+        self.max_workers = max_workers
+        self.account_limiter = RateLimiter(account_rate_per_minute, burst=account_burst)
+        self.group_limiter = RateLimiter(group_rate_per_minute, burst=1)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='whatsapp-send')
+        self.max_tracked_jobs = max_tracked_jobs
+        self.jobs: 'OrderedDict[str, SendJob]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.leader_jobs_suspended = False
+        self.stats = {
+            'jobs': 0,
+            'sends': 0,
+            'failures': 0,
+            'suspended': 0,
+            'total_wait': 0.0
+        }
+
+    def suspend_leader_jobs(self):
+        """Perda da liderança: jobs leader_only param de enviar imediatamente"""
+        with self.lock:
+            self.leader_jobs_suspended = True
+
+    def resume_leader_jobs(self):
+        with self.lock:
+            self.leader_jobs_suspended = False
+
+    def submit(self, groups: List[str], send_func: Callable[[str], None], label: str = '',
+               on_complete: Optional[Callable[[SendJob], None]] = None,
+               leader_only: bool = False) -> SendJob:
+        """
+        Agenda send_func(grupo_id) para cada grupo e retorna o job imediatamente.
+        on_complete(job) é chamado (numa thread do pool) quando todos terminarem.
+        """
+        job = SendJob(label, groups, on_complete, leader_only)
+        with self.lock:
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.max_tracked_jobs:
+                self.jobs.popitem(last=False)
+            self.stats['jobs'] += 1
+
+        if not job.groups:
+            self._finish(job)
+            return job
+
+        for group_id in job.groups:
+            self.executor.submit(self._send_one, job, group_id, send_func)
+        return job
+
+    def send_and_wait(self, groups: List[str], send_func: Callable[[str], None],
+                      label: str = '', timeout: Optional[float] = None) -> SendJob:
+        """Versão síncrona de submit (para rotas que respondem com o resultado)"""
+        job = self.submit(groups, send_func, label)
+        job.wait(timeout)
+        return job
+
+    def _send_one(self, job: SendJob, group_id: str, send_func: Callable[[str], None]):
+        wait_time = 0.0
+        if not self._suspended(job):
+            wait_time = max(self.account_limiter.reserve(ACCOUNT_KEY), self.group_limiter.reserve(group_id))
+            if wait_time > 0:
+                time.sleep(wait_time)
+
+        # Verifica de novo depois da espera do ritmo: a liderança pode ter caído nesse meio tempo
+        if self._suspended(job):
+            result = {'grupo': group_id, 'sucesso': False, 'erro': SUSPENDED_ERROR}
+        else:
+            try:
+                send_func(group_id)
+                result = {'grupo': group_id, 'sucesso': True}
+            except Exception as e:
+                logger.error(f'[ENVIO] Erro ao enviar para {group_id}: {e}')
+                result = {'grupo': group_id, 'sucesso': False, 'erro': str(e)}
+
+        with self.lock:
+            if result.get('erro') == SUSPENDED_ERROR:
+                job.suspended = True
+                self.stats['suspended'] += 1
+            else:
+                self.stats['sends'] += 1
+                self.stats['total_wait'] += wait_time
+                if not result['sucesso']:
+                    self.stats['failures'] += 1
+            job.results[group_id] = result
+            done = len(job.results) == len(job.groups)
+
+        if done:
+            self._finish(job)
+
+    def _suspended(self, job: SendJob) -> bool:
+        return job.leader_only and self.leader_jobs_suspended
+
+    def _finish(self, job: SendJob):
+        job.finished_at = time.time()
+        # Callback antes de liberar quem espera: wait() retorna com o status já gravado
+        if job.on_complete:
+            try:
+                job.on_complete(job)
+            except Exception as e:
+                logger.error(f'[ENVIO] Erro no callback do envio {job.id}: {e}')
+        job.event.set()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Situação de um envio recente"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do disparador"""
+        with self.lock:
+            in_progress = sum(1 for job in self.jobs.values() if not job.event.is_set())
+            recent = [job.to_dict() for job in list(self.jobs.values())[-10:]]
+            stats = dict(self.stats)
+        stats['total_wait'] = round(stats['total_wait'], 2)
+        return {
+            **stats,
+            'max_workers': self.max_workers,
+            'jobs_in_progress': in_progress,
+            'recent_jobs': [{k: v for k, v in job.items() if k != 'resultados'} for job in recent],
+            'account': self.account_limiter.get_stats().get(ACCOUNT_KEY)
+        }
+
+# Instância global (compartilhada pelos schedulers: a conta do WhatsApp é uma só)
+_send_config = ScrapingConfig.WHATSAPP_SEND_CONFIG
+send_dispatcher = SendDispatcher(
+    max_workers=_send_config['max_workers'],
+    account_rate_per_minute=_send_config['account_rate_per_minute'],
+    account_burst=_send_config['account_burst'],
+    group_rate_per_minute=_send_config['group_rate_per_minute']
+)
@@ -0,0 +1,116 @@
+# /app/singleflight.py
+"""
+Coalescência de requisições (single-flight): chamadas concorrentes com a
+mesma chave esperam uma única execução e compartilham o resultado.
+"""
+
+import copy
+import threading
+import logging
+from functools import wraps
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """Execução em andamento para uma chave"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Grupo de chamadas coalescidas por chave"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls: Dict[str, _Call] = {}
+        self.lock = threading.Lock()
+        self.stats = {
+            'calls': 0,
+            'executed': 0,
+            'coalesced': 0,
+            'errors': 0
+        }
+
+    def do(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """Executa func uma única vez por chave entre as chamadas simultâneas"""
+        with self.lock:
+            self.stats['calls'] += 1
+            call = self.calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"[{self.name}] Requisição coalescida para {key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            # Cópia para que um chamador não altere o resultado dos outros
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException as e:
+            call.error = e
+            with self.lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                waiters = call.waiters
+            if waiters and call.error is None:
+                # Cópia guardada antes que o chamador original possa alterar o resultado
+                call.result = copy.deepcopy(result)
+            call.event.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do grupo"""
+        with self.lock:
+            calls = self.stats['calls']
+            return {
+                **self.stats,
+                'in_flight': len(self.calls),
+                'coalesced_rate': round(self.stats['coalesced'] / calls * 100, 2) if calls else 0
+            }
+
+# Grupos registrados (expostos em /monitoring/stats)
+single_flight_groups: Dict[str, SingleFlight] = {}
+_registry_lock = threading.Lock()
+
+def get_group(name: str) -> SingleFlight:
+    """Retorna (criando se necessário) o grupo com esse nome"""
+    with _registry_lock:
+        group = single_flight_groups.get(name)
+        if group is None:
+            group = SingleFlight(name)
+            single_flight_groups[name] = group
+        return group
+
+def single_flight(name: str, key_func: Callable[..., str]):
+    """Decorator: coalesce chamadas simultâneas cuja key_func(*args, **kwargs) coincide"""
+    group = get_group(name)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return group.do(key_func(*args, **kwargs), func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def get_single_flight_stats() -> Dict[str, Dict]:
+    """Estatísticas de todos os grupos"""
+    with _registry_lock:
+        groups = dict(single_flight_groups)
+    return {name: group.get_stats() for name, group in groups.items()}
@@ -0,0 +1,270 @@
+# /app/task_journal.py
+"""
+Journal durável das tarefas da fila: registra cada transição de estado
+num log append-only em SQLite (WAL), com fsync em lote, recuperação das
+tarefas pendentes na inicialização e compactação periódica.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados em que a tarefa ainda precisa ser executada
+ACTIVE_STATUSES = ('pending', 'processing', 'retrying')
+
+class TaskJournal:
+    """
+    Log de snapshots de tarefas. Cada processo grava como um 'owner' com heartbeat;
+    tarefas ativas de owners sem heartbeat (processo reiniciado ou morto) são
+    reivindicadas e devolvidas para a fila por quem estiver vivo.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.05, max_batch: int = 1000,
+                 compact_interval: float = 600, owner_timeout: float = 30,
+                 recover_interval: float = 15):
+        self.path = path
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_interval = compact_interval
+        self.owner_timeout = owner_timeout
+        self.recover_interval = recover_interval
+        self.pending: List[tuple] = []
+        self.lock = threading.Lock()  # protege pending e stats
+        self.db_lock = threading.Lock()  # serializa o uso da conexão
+        self.wakeup = threading.Event()
+        self.running = False
+        self._writer_thread = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {
+            'records': 0,
+            'flushes': 0,
+            'compactions': 0,
+            'recovered_tasks': 0,
+            'errors': 0
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.db_lock:
+            self._create_tables(self._connection())
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_journal ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " task_id TEXT NOT NULL,"
+            " owner TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_task_journal_task ON task_journal(task_id, seq)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS journal_owners ("
+            " owner TEXT PRIMARY KEY,"
+            " heartbeat_at REAL NOT NULL)"
+        )
+        self._heartbeat(conn)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão única do processo, usada sempre sob db_lock"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL: cada commit faz fsync; o custo é diluído pelos lotes
+            conn.execute("PRAGMA synchronous=FULL")
+            self._conn = conn
+        return self._conn
+
+    def _heartbeat(self, conn: sqlite3.Connection):
+        conn.execute(
+            "INSERT OR REPLACE INTO journal_owners (owner, heartbeat_at) VALUES (?, ?)",
+            (self.owner, time.time())
+        )
+
+    def record(self, snapshot: Dict[str, Any]):
+        """Enfileira o snapshot de uma tarefa para a próxima gravação em lote"""
+        row = (snapshot['id'], self.owner, snapshot['status'],
+               json.dumps(snapshot, default=str), time.time())
+        with self.lock:
+            self.pending.append(row)
+            full = len(self.pending) >= self.max_batch
+        if full:
+            self.wakeup.set()
+
+    def flush(self) -> int:
+        """Grava os snapshots pendentes numa única transação (um fsync por lote)"""
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return 0
+
+        with self.db_lock:
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO task_journal (task_id, owner, status, payload, recorded_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._heartbeat(conn)
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao gravar journal da fila: {e}")
+                self._rollback()
+                with self.lock:
+                    self.stats['errors'] += 1
+                    # Devolve as linhas para a próxima tentativa
+                    self.pending = rows + self.pending
+                return 0
+
+        with self.lock:
+            self.stats['records'] += len(rows)
+            self.stats['flushes'] += 1
+        return len(rows)
+
+    def _rollback(self):
+        try:
+            self._connection().execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+
+    def claim_orphans(self) -> List[Dict[str, Any]]:
+        """
+        Reivindica as tarefas ativas cujo owner não dá sinal de vida há owner_timeout
+        segundos e retorna seus snapshots (passam a pertencer a este processo).
+        """
+        now = time.time()
+        with self.db_lock:
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                self._heartbeat(conn)
+                rows = conn.execute(
+                    "SELECT j.task_id, j.payload FROM task_journal j"
+                    " JOIN (SELECT task_id, MAX(seq) AS seq FROM task_journal GROUP BY task_id) last"
+                    "   ON j.seq = last.seq"
+                    " WHERE j.status IN (?, ?, ?)"
+                    "   AND j.owner NOT IN (SELECT owner FROM journal_owners WHERE heartbeat_at >= ?)",
+                    (*ACTIVE_STATUSES, now - self.owner_timeout)
+                ).fetchall()
+
+                snapshots = []
+                for task_id, payload in rows:
+                    snapshot = json.loads(payload)
+                    snapshot['status'] = 'pending'
+                    snapshots.append(snapshot)
+                    conn.execute(
+                        "INSERT INTO task_journal (task_id, owner, status, payload, recorded_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (task_id, self.owner, 'pending', json.dumps(snapshot, default=str), now)
+                    )
+                conn.execute(
+                    "DELETE FROM journal_owners WHERE heartbeat_at < ?", (now - self.owner_timeout,)
+                )
+                conn.execute("COMMIT")
+            except (sqlite3.Error, ValueError) as e:
+                logger.error(f"Erro ao recuperar tarefas do journal: {e}")
+                self._rollback()
+                with self.lock:
+                    self.stats['errors'] += 1
+                return []
+
+        with self.lock:
+            self.stats['recovered_tasks'] += len(snapshots)
+        return snapshots
+
+    def compact(self) -> int:
+        """Descarta snapshots substituídos e tarefas já finalizadas"""
+        self.flush()
+        with self.db_lock:
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                removed = conn.execute(
+                    "DELETE FROM task_journal WHERE seq NOT IN"
+                    " (SELECT MAX(seq) FROM task_journal GROUP BY task_id)"
+                ).rowcount
+                removed += conn.execute(
+                    "DELETE FROM task_journal WHERE status NOT IN (?, ?, ?)", ACTIVE_STATUSES
+                ).rowcount
+                conn.execute("COMMIT")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao compactar journal da fila: {e}")
+                self._rollback()
+                with self.lock:
+                    self.stats['errors'] += 1
+                return 0
+
+        with self.lock:
+            self.stats['compactions'] += 1
+        return removed
+
+    def start(self, on_recovered: Callable[[List[Dict[str, Any]]], None]):
+        """
+        Recupera as tarefas órfãs (replay) e inicia a thread de escrita, que também
+        compacta o log e reivindica periodicamente órfãs de processos que morreram.
+        """
+        if self.running:
+            return
+        self.running = True
+
+        recovered = self.claim_orphans()
+        if recovered:
+            logger.info(f"Journal: {len(recovered)} tarefas recuperadas")
+            on_recovered(recovered)
+
+        def writer():
+            last_compact = time.time()
+            last_recover = time.time()
+            while self.running:
+                self.wakeup.wait(self.flush_interval)
+                self.wakeup.clear()
+                try:
+                    self.flush()
+                    now = time.time()
+                    if now - last_recover >= self.recover_interval:
+                        last_recover = now
+                        orphans = self.claim_orphans()
+                        if orphans:
+                            logger.info(f"Journal: {len(orphans)} tarefas órfãs reivindicadas")
+                            on_recovered(orphans)
+                    if now - last_compact >= self.compact_interval:
+                        last_compact = now
+                        removed = self.compact()
+                        logger.info(f"Journal compactado: {removed} registros removidos")
+                except Exception as e:
+                    logger.error(f"Erro na thread do journal: {e}")
+            self.flush()
+
+        self._writer_thread = threading.Thread(target=writer, daemon=True)
+        self._writer_thread.start()
+
+    def stop(self):
+        """Grava o que falta e para a thread de escrita"""
+        self.running = False
+        self.wakeup.set()
+        if self._writer_thread:
+            self._writer_thread.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do journal"""
+        with self.lock:
+            return {
+                **self.stats,
+                'pending_records': len(self.pending),
+                'owner': self.owner,
+                'path': self.path
+            }
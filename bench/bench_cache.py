@@ -0,0 +1,69 @@
+# /bench/bench_cache.py
+"""
+Benchmark de get/set do CacheManager (LRU em fatias) sob concorrência.
+
+    python bench/bench_cache.py [--sizes 10000 100000 1000000] [--threads 16] [--shards 16]
+
+Para cada capacidade, preenche o cache e roda --threads threads fazendo get
+(e set no miss) de chaves aleatórias num espaço 2x maior que a capacidade,
+o que força despejos de LRU o tempo todo. Fica fora do pytest (não é test_*).
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.x')
+os.environ.setdefault('CACHE_L2_ENABLED', 'false')
+
+from app.cache_manager import CacheManager  # noqa: E402
+
+VALOR = {'titulo': 'Produto de teste', 'preco': 99.9}
+
+
+def medir(capacidade: int, threads: int, shards: int, ops_por_thread: int) -> float:
+    cache = CacheManager(max_size=capacidade, default_ttl=3600, num_shards=shards)
+    chaves = [f'produto:{i}' for i in range(capacidade * 2)]
+    for chave in chaves[:capacidade]:
+        cache.set(chave, VALOR)
+
+    largada = threading.Barrier(threads + 1)
+
+    def trabalhar(seed):
+        rnd = random.Random(seed)
+        largada.wait()
+        for _ in range(ops_por_thread):
+            chave = rnd.choice(chaves)
+            if cache.get(chave) is None:
+                cache.set(chave, VALOR)
+
+    workers = [threading.Thread(target=trabalhar, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return threads * ops_por_thread / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=20_000, help='operações por thread')
+    args = parser.parse_args()
+
+    for capacidade in args.sizes:
+        ops = medir(capacidade, args.threads, args.shards, args.ops)
+        print(f'{capacidade:>9} entradas, {args.threads} threads, {args.shards} fatias: {ops:,.0f} ops/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# /bench/bench_queue_dispatch.py
+"""
+Benchmark do despacho da fila (QueueManager) com scraping no-op.
+
+    python bench/bench_queue_dispatch.py [--tasks 100000] [--workers 5]
+
+Mede: tempo para enfileirar N tarefas, latência até uma tarefa de prioridade
+alta começar com N na fila, tempo para drenar a fila e latência add_task ->
+início da execução com a fila ociosa (p50/p99). Fica fora do pytest (não é test_*).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.x')
+os.environ.setdefault('QUEUE_JOURNAL_ENABLED', 'false')
+
+from app.queue_manager import AdmissionController, QueueManager, TaskStatus  # noqa: E402
+
+
+def _novo_manager(tasks: int, workers: int) -> QueueManager:
+    return QueueManager(max_workers=workers, admission=AdmissionController(capacity=tasks * 2),
+                        max_finished_tasks=tasks * 2)
+
+
+def _url(i: int) -> str:
+    return f'https://www.mercadolivre.com.br/produto/p/MLB{i}'
+
+
+def medir_fila_cheia(tasks: int, workers: int):
+    manager = _novo_manager(tasks, workers)
+    inicios = {}
+    alvo = threading.Event()
+
+    def execute(task):
+        inicios.setdefault(task.id, time.perf_counter())
+        if task.priority > 0:
+            alvo.set()
+        return {'ok': True}
+
+    manager._execute_scraping = execute
+    # Enfileira tudo antes de ligar o despachante
+    manager.start_processing = lambda: None
+    inicio = time.perf_counter()
+    for i in range(tasks):
+        manager.add_task(_url(i), '', 'mercadolivre')
+    enfileirar = time.perf_counter() - inicio
+
+    # Com N na fila e os workers ocupados, a tarefa de prioridade alta passa na frente
+    del manager.start_processing
+    manager.start_processing()
+    time.sleep(0.05)
+    na_fila = manager.get_queue_status()['pending_tasks']
+    adicionada = time.perf_counter()
+    task_id = manager.add_task(_url(tasks), '', 'mercadolivre', priority=10)
+    alvo.wait(10)
+    prioridade = inicios[task_id] - adicionada
+
+    while manager.status_counts[TaskStatus.COMPLETED] < tasks + 1:
+        time.sleep(0.01)
+    drenar = time.perf_counter() - inicio
+    manager.stop_processing()
+    return enfileirar, na_fila, prioridade, drenar
+
+
+def medir_fila_ociosa(amostras: int, workers: int):
+    manager = _novo_manager(amostras, workers)
+    iniciou = threading.Event()
+    manager._execute_scraping = lambda task: (iniciou.set(), {'ok': True})[1]
+    manager.start_processing()
+
+    latencias = []
+    for i in range(amostras):
+        iniciou.clear()
+        adicionada = time.perf_counter()
+        manager.add_task(_url(i), '', 'mercadolivre')
+        iniciou.wait(5)
+        latencias.append(time.perf_counter() - adicionada)
+        time.sleep(0.001)  # deixa o worker terminar: mede a fila vazia, não a disputa
+    manager.stop_processing()
+    latencias.sort()
+    return statistics.median(latencias), latencias[int(len(latencias) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tasks', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=5)
+    parser.add_argument('--samples', type=int, default=1000)
+    args = parser.parse_args()
+
+    enfileirar, na_fila, prioridade, drenar = medir_fila_cheia(args.tasks, args.workers)
+    print(f'enfileirar {args.tasks}: {enfileirar:.2f}s')
+    print(f'prioridade alta com {na_fila} na fila: {prioridade * 1000:.2f} ms até iniciar')
+    print(f'drenar {args.tasks + 1}: {drenar:.2f}s (desde o início do enfileiramento)')
+
+    p50, p99 = medir_fila_ociosa(args.samples, args.workers)
+    print(f'fila ociosa add_task -> início: p50 {p50 * 1000:.3f} ms, p99 {p99 * 1000:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# /bench/bench_scraper_connections.py
+"""
+Benchmark de reaproveitamento de conexões do scraper compartilhado.
+
+    python bench/bench_scraper_connections.py [--requests 300]
+
+Sobe um http.server local (HTTP/1.1, keep-alive) que conta conexões TCP novas
+e chama scrape_product repetidamente pelo ScraperFactory, primeiro com uma
+sessão nova por requisição (comportamento anterior ao pool) e depois com a
+instância compartilhada e o SessionPool. Atrasos anti-bot e o rate limit são
+zerados para medir só o custo de conexão. Fica fora do pytest (não é test_*).
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.x')
+os.environ.setdefault('CACHE_L2_ENABLED', 'false')
+os.environ.pop('SCRAPERAPI_KEY', None)
+
+import requests  # noqa: E402
+
+from app.anti_bot import RateLimiter  # noqa: E402
+from app.config import ScrapingConfig  # noqa: E402
+from app.scraper_factory import ScraperFactory  # noqa: E402
+
+PAGINA = (b'<html><head><title>Produto</title></head><body>'
+          b'<h1 class="ui-pdp-title">Produto de teste</h1>'
+          b'<span class="andes-money-amount__fraction">199</span></body></html>')
+
+
+class ContadorDeConexoes(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.conexoes = 0
+        self.requisicoes = 0
+        self.lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.conexoes += 1
+        super().process_request(request, client_address)
+
+
+class Produto(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalho e corpo saem em dois writes; sem isso o Nagle + ACK atrasado somam ~40 ms
+    # por resposta numa conexão keep-alive e mascaram o ganho do reaproveitamento
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requisicoes += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGINA)))
+        self.end_headers()
+        self.wfile.write(PAGINA)
+
+    def log_message(self, *args):
+        pass
+
+
+class SessaoNovaPorRequisicao:
+    """Substitui o SessionPool: uma requests.Session por requisição, como antes"""
+
+    @contextmanager
+    def session(self, domain, proxy=None):
+        session = requests.Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+
+def medir(servidor, scraper, inicio_id: int, total: int):
+    servidor.conexoes = servidor.requisicoes = 0
+    inicio = time.perf_counter()
+    for i in range(inicio_id, inicio_id + total):
+        # IDs distintos: o cache de resultados não responde no lugar do servidor
+        scraper.scrape_product(f'http://127.0.0.1:{servidor.server_port}/produto/MLB{i}')
+    return time.perf_counter() - inicio, servidor.conexoes, servidor.requisicoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)  # a página mínima não tem todos os seletores
+    ScrapingConfig.DELAY_CONFIG.update(min_delay=0.0, max_delay=0.0)
+    servidor = ContadorDeConexoes(('127.0.0.1', 0), Produto)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    scraper = ScraperFactory.create_scraper('mercadolivre')
+    assert ScraperFactory.create_scraper('mercadolivre') is scraper  # instância compartilhada
+    scraper.anti_bot.rate_limiter = RateLimiter(max_requests_per_minute=10_000_000)
+
+    pool = scraper.anti_bot.session_pool
+    scraper.anti_bot.session_pool = SessaoNovaPorRequisicao()
+    duracao, conexoes, requisicoes = medir(servidor, scraper, 0, args.requests)
+    print(f'sessão nova por requisição: {conexoes} conexões para {requisicoes} GETs, '
+          f'{duracao / args.requests * 1000:.2f} ms/chamada')
+
+    scraper.anti_bot.session_pool = pool
+    duracao, conexoes, requisicoes = medir(servidor, scraper, args.requests, args.requests)
+    print(f'scraper compartilhado + pool: {conexoes} conexões para {requisicoes} GETs, '
+          f'{duracao / args.requests * 1000:.2f} ms/chamada')
+
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
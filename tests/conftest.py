@@ -0,0 +1,15 @@
+# /tests/conftest.py
+"""Configuração comum dos testes: raiz do projeto no path e ambiente sem serviços externos."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.database cria o cliente do Supabase na importação; nenhum teste fala com ele
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.x')
+# Sem arquivos em app/data e app/cache durante os testes
+os.environ.setdefault('CACHE_L2_ENABLED', 'false')
+os.environ.setdefault('QUEUE_JOURNAL_ENABLED', 'false')
@@ -0,0 +1,100 @@
+# /tests/test_async_fetch_engine.py
+"""AsyncFetchEngine contra um http.server local: limite por domínio e uma ClientSession por event loop."""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from app.anti_bot import AsyncFetchEngine  # noqa: E402
+
+
+class ServidorLento(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.em_curso = defaultdict(int)
+        self.pico = defaultdict(int)
+        self.pico_total = 0
+        self.conexoes = 0
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.conexoes += 1
+        super().process_request(request, client_address)
+
+
+class Lento(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        servidor = self.server
+        host = self.headers['Host'].split(':')[0]
+        with servidor.lock:
+            servidor.em_curso[host] += 1
+            servidor.pico[host] = max(servidor.pico[host], servidor.em_curso[host])
+            servidor.pico_total = max(servidor.pico_total, sum(servidor.em_curso.values()))
+        time.sleep(0.1)
+        with servidor.lock:
+            servidor.em_curso[host] -= 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorLento(('127.0.0.1', 0), Lento)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_semaforo_limita_cada_dominio_sem_travar_os_outros(servidor):
+    engine = AsyncFetchEngine(max_per_domain=2)
+    # Mesmo servidor com dois nomes: para o engine são dois domínios
+    urls = [f'http://{host}:{servidor.server_port}/{i}' for host in ('127.0.0.1', 'localhost') for i in range(6)]
+
+    async def buscar_todas():
+        return await asyncio.gather(*(engine.fetch(url) for url in urls))
+
+    respostas = engine.run(buscar_todas())
+
+    assert [r.status_code for r in respostas] == [200] * len(urls)
+    assert servidor.pico['127.0.0.1'] == 2 and servidor.pico['localhost'] == 2
+    assert servidor.pico_total > 2  # os domínios andam em paralelo
+
+
+def test_uma_client_session_por_event_loop(servidor):
+    engine = AsyncFetchEngine(max_per_domain=2)
+    url = f'http://127.0.0.1:{servidor.server_port}/'
+
+    async def buscar_em_sequencia():
+        sessoes = []
+        for lote in range(3):
+            await asyncio.gather(*(engine.fetch(url) for _ in range(4)))
+            sessoes.append(engine._loops[asyncio.get_running_loop()]['session'])
+        return sessoes
+
+    primeira = engine.run(buscar_em_sequencia())
+    assert all(sessao is primeira[0] for sessao in primeira)
+    # 12 GETs pela mesma sessão: no máximo uma conexão por vaga do semáforo
+    assert servidor.conexoes <= 2
+    assert primeira[0].closed  # run() fecha a sessão do loop ao final
+
+    # Outro event loop (outra thread/asyncio.run) recebe a sua própria sessão
+    segunda = engine.run(buscar_em_sequencia())
+    assert segunda[0] is not primeira[0]
@@ -0,0 +1,40 @@
+# /tests/test_busca_todas_plataformas.py
+"""Busca em todas as plataformas: o prazo conta do início da execução, não da fila do pool."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import routes
+
+
+@pytest.fixture
+def pool_de_um_worker(monkeypatch):
+    # Um worker só: a segunda plataforma espera a primeira terminar, como num pool lotado
+    monkeypatch.setattr(routes, 'search_executor', ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(routes.ScraperFactory, 'get_available_platforms',
+                        classmethod(lambda cls: ['mercadolivre', 'amazon']))
+    monkeypatch.setattr(routes, '_buscar_na_plataforma',
+                        lambda platform, query, max_pages: (time.sleep(0.6), ([], 0.6))[1])
+    config = dict(routes.ScrapingConfig.SEARCH_CONFIG, platform_deadlines={}, default_platform_deadline=1)
+    monkeypatch.setattr(routes.ScrapingConfig, 'SEARCH_CONFIG', config)
+    return config
+
+
+def test_espera_na_fila_nao_conta_no_prazo(pool_de_um_worker):
+    pool_de_um_worker['max_queue_wait'] = 5
+    resultados = list(routes._buscar_em_todas_plataformas('fone', 1))
+
+    # amazon termina 1.2s após a submissão, mas só 0.6s após começar: dentro do prazo de 1s
+    assert [(r['platform'], r['success']) for r in resultados] == [('mercadolivre', True), ('amazon', True)]
+
+
+def test_busca_que_nao_sai_da_fila_e_cancelada(pool_de_um_worker):
+    pool_de_um_worker['max_queue_wait'] = 0.3
+    antes = routes.get_search_pool_stats()['queue_timeouts']
+    resultados = {r['platform']: r for r in routes._buscar_em_todas_plataformas('fone', 1)}
+
+    assert resultados['mercadolivre']['success']
+    assert resultados['amazon']['error'] == 'Busca não iniciou: pool de buscas ocupado'
+    assert routes.get_search_pool_stats()['queue_timeouts'] == antes + 1
@@ -0,0 +1,63 @@
+# /tests/test_cache_manager.py
+"""CacheManager: orçamento de bytes e expiração pelo heap (relógio controlado)."""
+
+import time
+import types
+
+import pytest
+
+from app import cache_manager as cache_module
+from app.cache_manager import CacheManager, estimate_size
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = types.SimpleNamespace(agora=1000.0)
+    monkeypatch.setattr(cache_module, 'time', types.SimpleNamespace(time=lambda: relogio.agora, sleep=time.sleep))
+    return relogio
+
+
+def test_orcamento_de_bytes_remove_os_menos_usados():
+    valor = 'x' * 18
+    assert estimate_size(valor) == 20
+    cache = CacheManager(max_size=100, num_shards=1, max_bytes=100)
+
+    for i in range(5):
+        assert cache.set(f'k{i}', valor)
+    cache.get('k0')  # k0 passa a ser o mais recente
+    assert cache.set('k5', valor)
+
+    assert cache.get('k1') is None  # menos recentemente usado saiu para caber
+    assert all(cache.get(f'k{i}') == valor for i in (0, 2, 3, 4, 5))
+    stats = cache.get_stats()
+    assert stats['size_bytes'] == 100 and stats['evictions'] == 1
+
+    # Maior que o orçamento inteiro: recusado sem despejar ninguém
+    assert not cache.set('grande', 'y' * 200)
+    assert len(cache) == 5 and cache.get_stats()['rejected'] == 1
+
+
+def test_expiracao_pelo_heap_respeita_a_janela_de_stale(relogio):
+    cache = CacheManager(max_size=100, num_shards=1)
+    cache.set('a', 'valor', ttl=10, stale_ttl=20)
+    cache.set('b', 'valor', ttl=10)
+
+    relogio.agora += 15
+    assert cache.cleanup_expired() == 1  # só b; a ainda está na janela de stale
+    assert cache.get_entry('a', allow_stale=True) == ('valor', True)
+    assert cache.get('a') is None
+
+    relogio.agora += 20
+    assert cache.cleanup_expired() == 1
+    assert len(cache) == 0 and cache.shards[0].current_bytes == 0
+
+
+def test_item_regravado_nao_sai_pelo_prazo_antigo(relogio):
+    cache = CacheManager(max_size=100, num_shards=1)
+    cache.set('a', 'antigo', ttl=10)
+    relogio.agora += 5
+    cache.set('a', 'novo', ttl=60)
+
+    relogio.agora += 10
+    assert cache.cleanup_expired() == 0
+    assert cache.get('a') == 'novo'
@@ -0,0 +1,71 @@
+# /tests/test_leader_election.py
+"""LeaderElector com lease: o líder para de agir antes do TTL mesmo com a renovação pendurada."""
+
+import threading
+import time
+
+from app.leader_election import LeaderElector
+
+
+class LentoNaRenovacao:
+    """Lease em memória cuja renovação fica presa até liberar"""
+
+    mode = 'teste'
+
+    def __init__(self, lease_ttl):
+        self.lease_ttl = lease_ttl
+        self.renovacao_liberada = threading.Event()
+        self.renovando = threading.Event()
+
+    def try_acquire(self, owner):
+        return True
+
+    def renew(self, owner):
+        self.renovando.set()
+        self.renovacao_liberada.wait(10)
+        return True
+
+    def release(self, owner):
+        pass
+
+
+def test_renovacao_presa_rebaixa_antes_do_ttl():
+    backend = LentoNaRenovacao(lease_ttl=2)
+    elector = LeaderElector(backend, retry_interval=0.1, renew_interval=0.1, fence_margin=0.5)
+    rebaixado = threading.Event()
+    elector.start(on_elected=lambda: None, on_demoted=rebaixado.set)
+    inicio = time.monotonic()
+    try:
+        assert elector.is_leader
+        assert backend.renovando.wait(2)
+
+        # Rebaixa com a renovação ainda pendente, antes de o lease poder ter expirado
+        assert rebaixado.wait(3)
+        assert time.monotonic() - inicio < backend.lease_ttl
+        assert not elector.is_leader
+        assert elector.get_status()['fenced'] == 1
+
+        # A confirmação atrasada não devolve a liderança; a seguinte, rápida, devolve
+        backend.renovacao_liberada.set()
+        deadline = time.monotonic() + 3
+        while not elector.is_leader and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert elector.is_leader
+        assert elector.get_status()['elections'] == 2
+    finally:
+        backend.renovacao_liberada.set()
+        elector.stop()
+
+
+def test_sem_lease_nao_tem_vigia():
+    class Arquivo:
+        mode = 'file'
+        try_acquire = renew = lambda self, owner: True
+        release = lambda self, owner: None
+
+    elector = LeaderElector(Arquivo(), retry_interval=0.1, renew_interval=0.1)
+    elector.start(on_elected=lambda: None, on_demoted=lambda: None)
+    try:
+        assert elector.is_leader and elector.watchdog is None
+    finally:
+        elector.stop()
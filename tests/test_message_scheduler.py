@@ -0,0 +1,51 @@
+# /tests/test_message_scheduler.py
+"""MessageScheduler: heap em memória x reconciliação com o banco, sem Supabase."""
+
+import time
+
+import pytest
+
+from app import database
+from app.scheduler import MessageScheduler
+
+ISO_FUTURO = '2099-01-01T12:00:00+00:00'
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = MessageScheduler()
+    scheduler.running = True  # avisos vão para o heap (sem thread e sem arquivo de aviso)
+    return scheduler
+
+
+def test_aviso_durante_reconciliacao_nao_se_perde(scheduler, monkeypatch):
+    scheduler.notificar_agendamento(2, ISO_FUTURO)
+
+    def listar_agendamentos_db():
+        # Chegam enquanto o banco responde com o estado anterior
+        scheduler.notificar_agendamento(1, ISO_FUTURO)
+        scheduler.notificar_agendamento(2, None)
+        return [{'id': 2, 'agendamento': ISO_FUTURO}, {'id': 3, 'agendamento': ISO_FUTURO}]
+
+    monkeypatch.setattr(database, 'listar_agendamentos_db', listar_agendamentos_db)
+    scheduler._reconcile()
+
+    assert set(scheduler.agendados) == {1, 3}
+    assert not scheduler.reconciling and not scheduler.pending_changes
+
+
+def test_erro_ao_buscar_produto_recoloca_com_backoff(scheduler, monkeypatch):
+    def obter_produto_db(produto_id, propagar_erro=False):
+        raise ConnectionError('banco fora')
+
+    monkeypatch.setattr(database, 'obter_produto_db', obter_produto_db)
+
+    antes = time.time()
+    scheduler._send_due_product(7)
+    primeiro = scheduler.agendados[7]
+    assert antes + scheduler.retry_base_delay <= primeiro <= time.time() + scheduler.retry_base_delay
+
+    # Falhou de novo: espera o dobro
+    del scheduler.agendados[7]
+    scheduler._send_due_product(7)
+    assert scheduler.agendados[7] >= antes + 2 * scheduler.retry_base_delay
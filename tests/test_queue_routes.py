@@ -0,0 +1,78 @@
+# /tests/test_queue_routes.py
+"""Rotas da fila (/queue/*) contra um QueueManager local, sem processar as tarefas."""
+
+import time
+
+import pytest
+from flask import Flask
+
+from app import routes
+from app.queue_manager import QueueManager
+
+
+@pytest.fixture
+def client(monkeypatch):
+    manager = QueueManager(max_workers=1)
+    monkeypatch.setattr(manager, 'start_processing', lambda: None)
+    monkeypatch.setattr(routes, 'queue_manager', manager)
+    app = Flask(__name__)
+    app.register_blueprint(routes.main_bp)
+    return app.test_client()
+
+
+def test_lote_com_itens_invalidos_enfileira_os_validos(client):
+    response = client.post('/queue/add-batch', json={'items': [
+        {'url': 'https://www.mercadolivre.com.br/produto/p/MLB111'},
+        {'url': 123},
+        {'url': 'https://www.amazon.com.br/dp/B0ABCDEFGH', 'affiliate_link': ['x']},
+        {'url': 'https://www.mercadolivre.com.br/produto/p/MLB222', 'priority': 'alta'},
+        42,
+        'https://www.amazon.com.br/dp/B0ABCDEFGH'
+    ]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['summary'] == {'queued': 2, 'duplicate': 0, 'rejected': 0, 'invalid': 4}
+    assert [r['status'] for r in data['results']] == ['queued', 'invalid', 'invalid', 'invalid', 'invalid', 'queued']
+    assert data['results'][1]['error'] == 'url e affiliate_link devem ser texto'
+
+
+def test_add_rejeita_url_que_nao_e_texto(client):
+    response = client.post('/queue/add', json={'url': 123})
+    assert response.status_code == 400
+
+
+def _tarefa_concluida(manager, resultado):
+    manager._execute_scraping = lambda task: resultado
+    task_id = manager.add_task('https://www.mercadolivre.com.br/produto/p/MLB333', '', 'mercadolivre')
+    manager._process_task(task_id)
+    return task_id
+
+
+def test_get_da_tarefa_so_descarta_o_resultado_com_consume(client):
+    manager = routes.queue_manager
+    task_id = _tarefa_concluida(manager, {'titulo': 'Produto'})
+
+    for _ in range(2):  # GET repetido (retry, prefetch) continua vendo o resultado
+        response = client.get(f'/queue/task/{task_id}')
+        assert response.get_json()['task']['result'] == {'titulo': 'Produto'}
+
+    assert client.get(f'/queue/task/{task_id}?consume=1').get_json()['task']['result'] == {'titulo': 'Produto'}
+    task = client.get(f'/queue/task/{task_id}').get_json()['task']
+    assert task['result'] is None and task['result_consumed']
+
+
+def test_retencao_por_idade_roda_com_a_fila_ociosa():
+    manager = QueueManager(max_workers=1, retention_seconds=0.1, retention_sweep_interval=0.05)
+    try:
+        manager._execute_scraping = lambda task: {'titulo': 'Produto'}
+        task_id = manager.add_task('https://www.mercadolivre.com.br/produto/p/MLB333', '', 'mercadolivre')
+        assert task_id in manager.tasks
+
+        # Nenhuma outra tarefa termina nem o status é consultado: o despachante ocioso limpa
+        deadline = time.monotonic() + 2
+        while task_id in manager.tasks and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert task_id not in manager.tasks
+    finally:
+        manager.stop_processing()
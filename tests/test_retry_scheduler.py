@@ -0,0 +1,46 @@
+# /tests/test_retry_scheduler.py
+"""
+RetryScheduler: mil tarefas falhando ao mesmo tempo não podem criar uma
+thread por retentativa (como fazia o threading.Timer por tarefa).
+"""
+
+import threading
+import time
+
+from app.queue_manager import QueueManager, TaskStatus
+
+TOTAL_TAREFAS = 1000
+WORKERS = 4
+
+
+def test_mil_falhas_simultaneas_nao_multiplicam_threads(monkeypatch):
+    manager = QueueManager(max_workers=WORKERS, retry_budget_per_minute=10 * TOTAL_TAREFAS)
+    monkeypatch.setattr(manager, '_execute_scraping', lambda task: None)
+    # Backoff curto e fixo: as retentativas ficam pendentes juntas sem alongar o teste
+    monkeypatch.setattr(manager.retry_scheduler, 'backoff', lambda attempt: 0.5)
+
+    baseline = threading.active_count()
+    items = [{'url': f'https://example.com/produto/{i}', 'platform': 'mercadolivre', 'affiliate_link': ''}
+             for i in range(TOTAL_TAREFAS)]
+    try:
+        results = manager.add_tasks(items, max_retries=3)
+        assert all(result['status'] == 'queued' for result in results)
+
+        pico_threads = baseline
+        pico_aguardando = 0
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            pico_threads = max(pico_threads, threading.active_count())
+            pico_aguardando = max(pico_aguardando, manager.retry_scheduler.get_stats()['waiting'])
+            if manager.status_counts[TaskStatus.FAILED] == TOTAL_TAREFAS:
+                break
+            time.sleep(0.01)
+    finally:
+        manager.stop_processing()
+
+    assert manager.status_counts[TaskStatus.FAILED] == TOTAL_TAREFAS
+    assert manager.retry_scheduler.get_stats()['scheduled'] == 2 * TOTAL_TAREFAS
+    # Centenas de retentativas aguardando ao mesmo tempo...
+    assert pico_aguardando >= TOTAL_TAREFAS // 2
+    # ...com threads fixas: despachante, pool da plataforma e a thread de retry
+    assert pico_threads <= baseline + WORKERS + 2
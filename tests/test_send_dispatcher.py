@@ -0,0 +1,111 @@
+# /tests/test_send_dispatcher.py
+"""SendDispatcher: ritmo por conta/grupo, callback de conclusão e suspensão na perda da liderança."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.scheduler import MessageScheduler
+from app.send_dispatcher import SendDispatcher, SUSPENDED_ERROR
+
+
+class WhatsAppMonitorFalso(BaseHTTPRequestHandler):
+    """Stand-in de POST /groups/send-message: registra (momento, grupo) de cada envio"""
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.envios.append((time.monotonic(), corpo['groupId']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def monitor():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), WhatsAppMonitorFalso)
+    servidor.envios = []
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    scheduler = MessageScheduler()
+    scheduler.whatsapp_url = f'http://127.0.0.1:{servidor.server_port}'
+    yield servidor, lambda grupo_id: scheduler._send_to_whatsapp(grupo_id, 'oferta')
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_ritmo_da_conta_limita_o_total_de_envios(monitor):
+    servidor, enviar = monitor
+    # 10/s com rajada de 2: seis grupos levam pelo menos (6 - 2) / 10 = 0.4s
+    dispatcher = SendDispatcher(max_workers=6, account_rate_per_minute=600, account_burst=2,
+                                group_rate_per_minute=6000)
+    inicio = time.monotonic()
+    job = dispatcher.submit([f'g{i}' for i in range(6)], enviar)
+
+    assert job.wait(5) and job.success
+    momentos = sorted(momento for momento, _ in servidor.envios)
+    assert len(momentos) == 6
+    for ordem, momento in enumerate(momentos[2:], start=1):
+        assert momento - inicio >= ordem * 0.1 - 0.02
+
+
+def test_ritmo_por_grupo_espaca_envios_ao_mesmo_grupo(monitor):
+    servidor, enviar = monitor
+    # Grupo: 2/s (rajada 1); conta folgada. Dois jobs para g1 ficam a 0.5s um do outro
+    dispatcher = SendDispatcher(max_workers=4, account_rate_per_minute=6000, account_burst=100,
+                                group_rate_per_minute=120)
+    primeiro = dispatcher.submit(['g1', 'g2'], enviar)
+    segundo = dispatcher.submit(['g1'], enviar)
+
+    assert primeiro.wait(5) and segundo.wait(5)
+    g1 = sorted(momento for momento, grupo in servidor.envios if grupo == 'g1')
+    assert len(g1) == 2 and g1[1] - g1[0] >= 0.5 - 0.02
+    # g2 não espera pelo ritmo de g1
+    g2 = [momento for momento, grupo in servidor.envios if grupo == 'g2']
+    assert g2[0] < g1[1]
+
+
+def test_on_complete_roda_antes_de_liberar_quem_espera(monitor):
+    _, enviar = monitor
+    dispatcher = SendDispatcher(max_workers=2, account_rate_per_minute=6000, account_burst=100)
+    visto = {}
+
+    def on_complete(job):
+        time.sleep(0.1)  # quem espera não pode acordar antes do callback terminar
+        visto['evento_liberado'] = job.event.is_set()
+        visto['concluido'] = job.to_dict()['enviados']
+
+    job = dispatcher.submit(['g1', 'g2'], enviar, on_complete=on_complete)
+    assert job.wait(5)
+    assert visto == {'evento_liberado': False, 'concluido': 2}
+
+
+def test_suspensao_corta_envios_dos_schedulers_ja_no_pool():
+    dispatcher = SendDispatcher(max_workers=1, account_rate_per_minute=6000, account_burst=100)
+    liberar = threading.Event()
+    enviados = []
+
+    def enviar(grupo_id):
+        liberar.wait(5)
+        enviados.append(grupo_id)
+
+    # g1 ocupa o único worker; g2 e g3 ficam esperando no pool
+    job = dispatcher.submit(['g1', 'g2', 'g3'], enviar, leader_only=True)
+    manual = dispatcher.submit(['g4'], enviados.append)
+    dispatcher.suspend_leader_jobs()
+    liberar.set()
+
+    assert job.wait(5) and manual.wait(5)
+    assert enviados == ['g1', 'g4']  # envio manual (não é do scheduler) segue normalmente
+    assert job.suspended and job.sent == 1
+    assert [job.results[g].get('erro') for g in ('g2', 'g3')] == [SUSPENDED_ERROR] * 2
+
+    dispatcher.resume_leader_jobs()
+    assert dispatcher.submit(['g5'], enviados.append, leader_only=True).wait(5)
+    assert enviados[-1] == 'g5'